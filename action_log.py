@@ -0,0 +1,318 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# File layout:
+#   MAGIC | u32 header length | header JSON (metadata)
+#   records: u32 length | u8 kind | payload
+#   footer (written on close): u64 offset per record | u64 index offset | u32 count | FOOTER_MAGIC
+# A log without a footer (crashed session) is still readable by scanning records.
+MAGIC = b"ACTLOG1\n"
+FOOTER_MAGIC = b"ALIX"
+_TRAILER = struct.Struct("<QI4s")
+_LEN = struct.Struct("<I")
+
+_BUTTONS = ['left', 'right', 'middle']
+
+# Fixed-layout kinds; anything else is stored as JSON under KIND_JSON
+KIND_CLICK = 1
+KIND_KEY = 2
+KIND_SCROLL = 3
+KIND_TAP = 4
+KIND_SWIPE = 5
+KIND_SCROLL_SERIES = 6
+KIND_JSON = 255
+
+_CLICK = struct.Struct("<dffB")     # timestamp, x, y, button
+_SCROLL = struct.Struct("<dffii")   # timestamp, x, y, dx, dy
+_TAP = struct.Struct("<diii")       # delay, x, y, duration_ms
+_SWIPE = struct.Struct("<diiiii")   # delay, x1, y1, x2, y2, duration_ms
+_KEY = struct.Struct("<d")          # timestamp, followed by the UTF-8 key name
+_SERIES = struct.Struct("<dffI")    # timestamp, x, y, n; then n float32 offsets, n int32 dx, n int32 dy
+
+
+_F32 = struct.Struct("<f")
+_I32_MIN, _I32_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _is_time(v: Any) -> bool:
+    """A float kept exactly by a double field."""
+    return type(v) is float
+
+
+def _is_f32(v: Any) -> bool:
+    """A float that survives the float32 round trip unchanged."""
+    return type(v) is float and _F32.unpack(_F32.pack(v))[0] == v
+
+
+def _is_i32(v: Any) -> bool:
+    return type(v) is int and _I32_MIN <= v <= _I32_MAX
+
+
+def _is_i32_list(v: Any) -> bool:
+    return isinstance(v, list) and all(_is_i32(i) for i in v)
+
+
+def _is_delay(v: Any) -> bool:
+    """A delay that decode_action's rounding to milliseconds gives back unchanged."""
+    return type(v) is float and round(v, 3) == v
+
+
+def _is_offsets(t: Any) -> bool:
+    """Series offsets that decode_action's float32 + rounding gives back unchanged."""
+    return isinstance(t, list) and all(
+        type(v) is float and round(_F32.unpack(_F32.pack(v))[0], 4) == v for v in t)
+
+
+def _fits(action: Dict[str, Any], fields: Dict[str, Callable[[Any], bool]]) -> bool:
+    """True if the action has exactly these keys (besides 'type') and every value passes its check."""
+    return set(action) == {'type', *fields} and all(check(action[k]) for k, check in fields.items())
+
+
+def encode_action(action: Dict[str, Any]) -> bytes:
+    """
+    Pack one action dict into kind byte + payload.
+
+    The fixed layouts are only used when decode_action gives back an equal
+    dict (same keys, values and types); anything else, e.g. integer click
+    coordinates or a float tap position, is stored as JSON so it replays
+    exactly as recorded.
+    """
+    kind = action.get('type')
+    if kind == 'click' and _fits(action, {'x': _is_f32, 'y': _is_f32, 'timestamp': _is_time,
+                                          'button': lambda b: b in _BUTTONS}):
+        return bytes([KIND_CLICK]) + _CLICK.pack(action['timestamp'], action['x'], action['y'],
+                                                 _BUTTONS.index(action['button']))
+    if kind == 'key' and _fits(action, {'key': lambda k: type(k) is str, 'timestamp': _is_time}):
+        return bytes([KIND_KEY]) + _KEY.pack(action['timestamp']) + action['key'].encode('utf-8')
+    if kind == 'scroll' and _fits(action, {'x': _is_f32, 'y': _is_f32, 'dx': _is_i32, 'dy': _is_i32,
+                                           'timestamp': _is_time}):
+        return bytes([KIND_SCROLL]) + _SCROLL.pack(action['timestamp'], action['x'], action['y'],
+                                                   action['dx'], action['dy'])
+    if kind == 'scroll_series' and _fits(action, {'x': _is_f32, 'y': _is_f32, 'timestamp': _is_time,
+                                                  't': _is_offsets, 'dx': _is_i32_list, 'dy': _is_i32_list}) \
+            and len(action['t']) == len(action['dx']) == len(action['dy']):
+        n = len(action['t'])
+        return (bytes([KIND_SCROLL_SERIES]) + _SERIES.pack(action['timestamp'], action['x'], action['y'], n)
+                + array('f', action['t']).tobytes() + array('i', action['dx']).tobytes()
+                + array('i', action['dy']).tobytes())
+    if kind == 'tap' and _fits(action, {'x': _is_i32, 'y': _is_i32, 'duration_ms': _is_i32,
+                                        'delay': _is_delay}):
+        return bytes([KIND_TAP]) + _TAP.pack(action['delay'], action['x'], action['y'],
+                                             action['duration_ms'])
+    if kind == 'swipe' and _fits(action, {'x1': _is_i32, 'y1': _is_i32, 'x2': _is_i32, 'y2': _is_i32,
+                                          'duration_ms': _is_i32, 'delay': _is_delay}):
+        return bytes([KIND_SWIPE]) + _SWIPE.pack(action['delay'], action['x1'], action['y1'],
+                                                 action['x2'], action['y2'], action['duration_ms'])
+    return bytes([KIND_JSON]) + json.dumps(action, separators=(',', ':')).encode('utf-8')
+
+
+def decode_action(record: bytes) -> Dict[str, Any]:
+    kind, payload = record[0], record[1:]
+    if kind == KIND_CLICK:
+        t, x, y, b = _CLICK.unpack(payload)
+        return {'type': 'click', 'x': x, 'y': y, 'button': _BUTTONS[b], 'timestamp': t}
+    if kind == KIND_KEY:
+        (t,) = _KEY.unpack_from(payload)
+        return {'type': 'key', 'key': payload[_KEY.size:].decode('utf-8'), 'timestamp': t}
+    if kind == KIND_SCROLL:
+        t, x, y, dx, dy = _SCROLL.unpack(payload)
+        return {'type': 'scroll', 'x': x, 'y': y, 'dx': dx, 'dy': dy, 'timestamp': t}
+    if kind == KIND_SCROLL_SERIES:
+        ts, x, y, n = _SERIES.unpack_from(payload)
+        t, dx, dy = array('f'), array('i'), array('i')
+        pos = _SERIES.size
+        t.frombytes(payload[pos:pos + 4 * n])
+        dx.frombytes(payload[pos + 4 * n:pos + 8 * n])
+        dy.frombytes(payload[pos + 8 * n:pos + 12 * n])
+        return {'type': 'scroll_series', 'x': x, 'y': y, 'timestamp': ts,
+                't': [round(v, 4) for v in t], 'dx': dx.tolist(), 'dy': dy.tolist()}
+    if kind == KIND_TAP:
+        d, x, y, ms = _TAP.unpack(payload)
+        return {'type': 'tap', 'x': x, 'y': y, 'duration_ms': ms, 'delay': round(d, 3)}
+    if kind == KIND_SWIPE:
+        d, x1, y1, x2, y2, ms = _SWIPE.unpack(payload)
+        return {'type': 'swipe', 'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2, 'duration_ms': ms, 'delay': round(d, 3)}
+    if kind == KIND_JSON:
+        return json.loads(bytes(payload).decode('utf-8'))
+    raise ValueError(f"Unknown action record kind {kind}")
+
+
+class ActionLogWriter:
+    """
+    Append-only action log written as events arrive.
+
+    Every record is flushed to the OS as soon as it is appended, so a crash
+    loses at most the action being written. close() adds an index footer
+    for random access.
+    """
+
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'wb')
+        header = json.dumps(metadata or {}).encode('utf-8')
+        self._file.write(MAGIC + _LEN.pack(len(header)) + header)
+        self._file.flush()
+        self._offsets: List[int] = []
+        self.bytes_written = self._file.tell()
+
+    def append(self, action: Dict[str, Any]) -> None:
+        record = encode_action(action)
+        self._offsets.append(self._file.tell())
+        self._file.write(_LEN.pack(len(record)) + record)
+        self._file.flush()
+        self.bytes_written += _LEN.size + len(record)
+
+    @property
+    def count(self) -> int:
+        return len(self._offsets)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._file.write(struct.pack(f"<{len(self._offsets)}Q", *self._offsets))
+        self._file.write(_TRAILER.pack(index_offset, len(self._offsets), FOOTER_MAGIC))
+        self._file.close()
+
+    def __enter__(self) -> "ActionLogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ActionLogReader:
+    """
+    Memory-mapped reader; actions are decoded lazily on iteration or indexing.
+
+    Uses the index footer when present, otherwise scans the records (e.g. a
+    log from a session that crashed) and ignores a truncated final record.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC) + _LEN.size:
+            raise ValueError(f"{path} is not an action log")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an action log")
+
+        (header_len,) = _LEN.unpack_from(self._map, len(MAGIC))
+        self._data_start = len(MAGIC) + _LEN.size + header_len
+        self.metadata = json.loads(self._map[len(MAGIC) + _LEN.size:self._data_start] or b"{}")
+        self.complete = False
+        self._offsets = self._read_index(size)
+
+    def _read_index(self, size: int) -> List[int]:
+        if size >= self._data_start + _TRAILER.size:
+            index_offset, count, magic = _TRAILER.unpack_from(self._map, size - _TRAILER.size)
+            if magic == FOOTER_MAGIC and index_offset + 8 * count + _TRAILER.size == size:
+                self.complete = True
+                return list(struct.unpack_from(f"<{count}Q", self._map, index_offset))
+        return self._scan(size)
+
+    def _scan(self, size: int) -> List[int]:
+        offsets = []
+        pos = self._data_start
+        while pos + _LEN.size <= size:
+            (length,) = _LEN.unpack_from(self._map, pos)
+            if length == 0 or pos + _LEN.size + length > size:
+                break
+            offsets.append(pos)
+            pos += _LEN.size + length
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        pos = self._offsets[i]
+        (length,) = _LEN.unpack_from(self._map, pos)
+        return decode_action(self._map[pos + _LEN.size:pos + _LEN.size + length])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self._offsets)):
+            yield self[i]
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "ActionLogReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def is_action_log(path: str) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def json_to_log(json_path: str, log_path: Optional[str] = None) -> str:
+    """Convert a recordings/*.json file into an action log next to it (or at log_path)."""
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    actions = data.get('actions', []) if isinstance(data, dict) else data
+    metadata = {k: v for k, v in data.items() if k != 'actions'} if isinstance(data, dict) else {}
+    log_path = log_path or os.path.splitext(json_path)[0] + ".alog"
+    with ActionLogWriter(log_path, metadata) as writer:
+        for action in actions:
+            writer.append(action)
+    return log_path
+
+
+def log_to_json(log_path: str, json_path: Optional[str] = None) -> str:
+    """Convert an action log back into the recordings/*.json format."""
+    with ActionLogReader(log_path) as reader:
+        data = dict(reader.metadata)
+        data['actions'] = list(reader)
+        data['total_actions'] = len(data['actions'])
+    json_path = json_path or os.path.splitext(log_path)[0] + ".json"
+    with open(json_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return json_path
+
+
+def load_recording_data(path: str) -> Dict[str, Any]:
+    """Recording data ({..., 'actions': [...]}) from either a JSON recording or an action log."""
+    if is_action_log(path):
+        with ActionLogReader(path) as reader:
+            data = dict(reader.metadata)
+            data['actions'] = list(reader)
+        return data
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data if isinstance(data, dict) else {'actions': data}
+
+
+def main() -> None:
+    import sys
+    # Usage: python3 action_log.py <file.json|file.alog> [output]
+    if len(sys.argv) < 2:
+        print("Usage: python3 action_log.py <recording.json | recording.alog> [output]")
+        sys.exit(1)
+    src = sys.argv[1]
+    out = sys.argv[2] if len(sys.argv) > 2 else None
+    if is_action_log(src):
+        print(f"💾 Wrote {log_to_json(src, out)}")
+    else:
+        print(f"💾 Wrote {json_to_log(src, out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+import os
+import socket
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from adb_transport import ShellSession
+
+
+ADB_HOST = os.environ.get("ADB_SERVER_HOST", "127.0.0.1")
+ADB_PORT = int(os.environ.get("ADB_SERVER_PORT", "5037"))
+
+
+class AdbError(RuntimeError):
+    pass
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise AdbError("adb server closed the connection")
+        buf += chunk
+    return bytes(buf)
+
+
+def _send_request(sock: socket.socket, request: str) -> None:
+    """Send one host-protocol request and wait for OKAY/FAIL."""
+    payload = request.encode()
+    sock.sendall(b"%04x" % len(payload) + payload)
+    status = _recv_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        length = int(_recv_exact(sock, 4), 16)
+        raise AdbError(_recv_exact(sock, length).decode(errors="replace"))
+    raise AdbError(f"unexpected adb server reply {status!r}")
+
+
+def _read_all(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+class AdbClient:
+    """
+    Client for the adb host protocol spoken by the adb server (localhost:5037).
+
+    Each device service consumes one socket, so the client keeps a small pool
+    per serial of sockets that have already been switched to the device with
+    host:transport:<serial>; a command then costs a single request/response.
+    For back-to-back commands, session() opens a persistent `exec:sh` stream.
+    """
+
+    def __init__(self, host: str = ADB_HOST, port: int = ADB_PORT, pool_size: int = 2,
+                 timeout: Optional[float] = 30.0):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pools: Dict[str, List[socket.socket]] = {}
+        self._sessions: Dict[str, "SocketShellSession"] = {}
+        self._lock = threading.Lock()
+
+        # Counters
+        self.connections_opened = 0
+        self.pool_hits = 0
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connections_opened += 1
+        return sock
+
+    def _host_query(self, request: str) -> bytes:
+        with self._connect() as sock:
+            _send_request(sock, request)
+            length = int(_recv_exact(sock, 4), 16)
+            return _recv_exact(sock, length)
+
+    def version(self) -> int:
+        return int(self._host_query("host:version"), 16)
+
+    def devices(self) -> List[Tuple[str, str]]:
+        """Return [(serial, status), ...] like `adb devices`."""
+        out = self._host_query("host:devices").decode()
+        return [tuple(ln.split("\t", 1)) for ln in out.splitlines() if "\t" in ln]
+
+    def _transport(self, serial: str) -> socket.socket:
+        sock = self._connect()
+        try:
+            _send_request(sock, f"host:transport:{serial}")
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    def _checkout(self, serial: str) -> socket.socket:
+        with self._lock:
+            pool = self._pools.get(serial)
+            if pool:
+                self.pool_hits += 1
+                return pool.pop()
+        return self._transport(serial)
+
+    def _schedule_replenish(self, serial: str) -> None:
+        # Refill the pool off the caller's critical path
+        threading.Thread(target=self._replenish, args=(serial,), daemon=True).start()
+
+    def _replenish(self, serial: str) -> None:
+        with self._lock:
+            missing = self.pool_size - len(self._pools.setdefault(serial, []))
+        for _ in range(max(0, missing)):
+            try:
+                sock = self._transport(serial)
+            except (OSError, AdbError):
+                return
+            with self._lock:
+                self._pools[serial].append(sock)
+
+    def open_service(self, serial: str, service: str) -> socket.socket:
+        """Open a device service (e.g. "shell:ls", "exec:screencap") and return its stream socket."""
+        sock = self._checkout(serial)
+        try:
+            _send_request(sock, service)
+        except Exception:
+            sock.close()
+            # A pooled socket may have gone stale; retry once on a fresh one
+            sock = self._transport(serial)
+            _send_request(sock, service)
+        return sock
+
+    def shell(self, serial: str, command: str) -> str:
+        """Run `shell:<command>` and return its output."""
+        with self.open_service(serial, f"shell:{command}") as sock:
+            data = _read_all(sock)
+        self._schedule_replenish(serial)
+        return data.decode(errors="replace")
+
+    def exec_out(self, serial: str, command: str) -> bytes:
+        """Run `exec:<command>` (no pty, binary safe) and return raw stdout."""
+        with self.open_service(serial, f"exec:{command}") as sock:
+            data = _read_all(sock)
+        self._schedule_replenish(serial)
+        return data
+
+    def stream(self, serial: str, command: str, chunk_size: int = 65536) -> Iterator[bytes]:
+        """Yield raw output of `exec:<command>` as it arrives (e.g. getevent, screenrecord)."""
+        sock = self.open_service(serial, f"exec:{command}")
+        try:
+            while True:
+                chunk = sock.recv(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            sock.close()
+
+    def session(self, serial: str) -> "SocketShellSession":
+        """Persistent shell for serial, shared by every caller using this client."""
+        with self._lock:
+            session = self._sessions.get(serial)
+            if session is None:
+                session = SocketShellSession(self, serial)
+                self._sessions[serial] = session
+            return session
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._pools = self._pools, {}
+            sessions, self._sessions = self._sessions, {}
+        for pool in pools.values():
+            for sock in pool:
+                sock.close()
+        for session in sessions.values():
+            session.close()
+
+
+class _SocketWriter:
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+
+    def write(self, data: bytes) -> None:
+        self._sock.sendall(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        try:
+            self._sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+class SocketShellSession(ShellSession):
+    """ShellSession carried over an `exec:sh` stream on the adb server socket instead of an adb process."""
+
+    def __init__(self, client: AdbClient, serial: str):
+        super().__init__(serial)
+        self.client = client
+
+    def _open(self) -> None:
+        sock = self.client.open_service(self.serial, "exec:sh")
+        sock.settimeout(None)
+        self._proc = sock
+        self._stdin = _SocketWriter(sock)
+        self._stdout = sock.makefile("rb")
+
+    def _is_open(self) -> bool:
+        return self._proc is not None
+
+    def submit(self, command: str) -> int:
+        # exec: streams carry stdout only, so fold stderr in like `adb shell` does
+        return super().submit(f"{{ {command}\n}} 2>&1")
+
+    def _shutdown(self) -> None:
+        try:
+            self._stdout.close()
+        finally:
+            self._proc.close()
+
+
+_default_client: Optional[AdbClient] = None
+
+
+def get_client() -> AdbClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = AdbClient()
+    return _default_client
+
+
+def set_client(client: Optional[AdbClient]) -> None:
+    """Replace the shared client (e.g. one pointed at a FakeAdbServer's port)."""
+    global _default_client
+    if _default_client is not None and _default_client is not client:
+        _default_client.close()
+    _default_client = client
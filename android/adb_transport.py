@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+import atexit
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+ADB = os.environ.get("ADB", "adb")
+
+# "process" drives the adb binary; "socket" talks to the adb server directly (adb_client)
+ADB_BACKEND = os.environ.get("ADB_BACKEND", "process")
+
+# Serial picked by ensure_device(); sessions opened without a serial target it
+_default_serial: Optional[str] = None
+
+
+def adb(*args: str, serial: Optional[str] = None, check: bool = True) -> subprocess.CompletedProcess:
+    """One-shot adb invocation, for host commands such as `devices`."""
+    cmd = [ADB]
+    if serial:
+        cmd += ["-s", serial]
+    return subprocess.run([*cmd, *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=check)
+
+
+def list_devices() -> List[Tuple[str, str]]:
+    """Return [(serial, status), ...] as reported by `adb devices`."""
+    if ADB_BACKEND == "socket":
+        from adb_client import get_client
+        return get_client().devices()
+    out = adb("devices").stdout.strip().splitlines()
+    return [tuple(ln.split("\t", 1)) for ln in out if "\t" in ln]
+
+
+def ensure_device() -> str:
+    """Exit unless an authorised device is attached; return its serial."""
+    lines = list_devices()
+    if not lines:
+        print("No devices attached. Connect your Android and run again.")
+        sys.exit(1)
+    serial, status = lines[0]
+    if status != "device":
+        print(f"Device status is '{status}'. Authorize device and retry.")
+        sys.exit(1)
+    global _default_serial
+    _default_serial = serial
+    return serial
+
+
+def stream_lines(*args: str, serial: Optional[str] = None) -> Iterator[str]:
+    """Yield output lines of a long-running device command (e.g. getevent) as they arrive."""
+    if serial is None:
+        serial = _default_serial
+    if ADB_BACKEND == "socket":
+        from adb_client import get_client
+        pending = b""
+        for chunk in get_client().stream(serial or ensure_device(), shlex.join(args)):
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield line.decode(errors="replace") + "\n"
+        if pending:
+            yield pending.decode(errors="replace")
+        return
+
+    cmd = [ADB]
+    if serial:
+        cmd += ["-s", serial]
+    proc = subprocess.Popen([*cmd, "shell", *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, bufsize=1)
+    try:
+        yield from proc.stdout
+    finally:
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+
+
+class ShellSession:
+    """
+    One long-lived `adb shell` process for a device.
+
+    Commands are written to the shell's stdin and each is followed by a
+    sentinel line carrying its exit status, so the reader knows where one
+    command's output ends. submit() returns immediately, which lets callers
+    pipeline several commands and collect() the results afterwards.
+    """
+
+    def __init__(self, serial: Optional[str] = None):
+        self.serial = serial
+        self._proc = None
+        self._stdin = None
+        self._stdout = None
+        self._token = uuid.uuid4().hex[:12]
+        self._next_seq = 0
+        self._collected_seq = 0
+        self._results: Dict[int, Tuple[str, int, str]] = {}
+        self._pending: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+        # Counters
+        self.commands = 0
+        self.restarts = 0
+
+    def _open(self) -> None:
+        """Start the shell and set self._stdin / self._stdout."""
+        cmd = [ADB]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        cmd.append("shell")
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT, bufsize=0)
+        self._stdin = self._proc.stdin
+        self._stdout = self._proc.stdout
+
+    def _is_open(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _shutdown(self) -> None:
+        try:
+            self._proc.wait(timeout=2)
+        except Exception:
+            self._proc.kill()
+
+    def start(self) -> None:
+        if self._is_open():
+            return
+        self._open()
+        if self.commands:
+            self.restarts += 1
+        self._pending.clear()
+        self._collected_seq = self._next_seq
+
+    def _marker(self, seq: int) -> str:
+        return f"__adbt_{self._token}_{seq}__"
+
+    def submit(self, command: str) -> int:
+        """Queue a shell command without waiting for it; returns a ticket for collect()."""
+        with self._lock:
+            self.start()
+            self._next_seq += 1
+            seq = self._next_seq
+            # stdin is redirected so a command can never swallow the rest of the stream
+            line = f"{{ {command}\n}} </dev/null\nprintf '\\n%s:%d\\n' {self._marker(seq)} $?\n"
+            try:
+                self._stdin.write(line.encode())
+                self._stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                self._proc = None
+                raise ConnectionError(f"adb shell session closed: {e}")
+            self._pending[seq] = command
+            self.commands += 1
+            return seq
+
+    def _read_result(self, seq: int) -> Tuple[str, int, str]:
+        marker = self._marker(seq).encode()
+        chunks: List[bytes] = []
+        while True:
+            line = self._stdout.readline()
+            if not line:
+                self._proc = None
+                raise ConnectionError("adb shell session ended unexpectedly")
+            if line.startswith(marker + b":"):
+                status = int(line[len(marker) + 1:].strip() or b"0")
+                output = b"".join(chunks)
+                # Drop the newline printed ahead of the sentinel
+                if output.endswith(b"\n"):
+                    output = output[:-1]
+                if output.endswith(b"\r"):
+                    output = output[:-1]
+                return output.decode(errors="replace"), status, self._pending.pop(seq, "")
+            chunks.append(line)
+
+    def collect(self, seq: int, check: bool = True) -> str:
+        """Wait for a submitted command and return its combined output."""
+        with self._lock:
+            if self._proc is None:
+                raise ConnectionError("adb shell session ended before the command completed")
+            # Results arrive in submission order; read through to the requested one
+            while self._collected_seq < seq:
+                self._collected_seq += 1
+                self._results[self._collected_seq] = self._read_result(self._collected_seq)
+            output, status, command = self._results.pop(seq)
+        if check and status != 0:
+            raise subprocess.CalledProcessError(status, command, output)
+        return output
+
+    def run(self, command: str, check: bool = True) -> str:
+        """Run one command and wait for it (a single round trip)."""
+        return self.collect(self.submit(command), check=check)
+
+    def call(self, *args: str, check: bool = True) -> str:
+        """Like run(), but takes argv-style arguments and quotes them."""
+        return self.run(shlex.join(args), check=check)
+
+    def pipeline(self, commands: List[str], check: bool = True) -> List[str]:
+        """Send every command up front, then collect all of their outputs."""
+        seqs = [self.submit(c) for c in commands]
+        return [self.collect(s, check=check) for s in seqs]
+
+    def drain(self, check: bool = True) -> None:
+        """Wait for every submitted command to finish."""
+        if self._next_seq > self._collected_seq:
+            self.collect(self._next_seq, check=check)
+        for seq in sorted(self._results):
+            self.collect(seq, check=check)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._proc is None:
+                return
+            try:
+                self._stdin.write(b"exit\n")
+                self._stdin.close()
+            except Exception:
+                pass
+            self._shutdown()
+            self._proc = None
+
+    def __enter__(self) -> "ShellSession":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_sessions: Dict[Optional[str], ShellSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(serial: Optional[str] = None) -> ShellSession:
+    """Shared shell session for a device (None means the one chosen by ensure_device)."""
+    if serial is None:
+        serial = _default_serial
+    if ADB_BACKEND == "socket":
+        from adb_client import get_client
+        return get_client().session(serial or ensure_device())
+    with _sessions_lock:
+        session = _sessions.get(serial)
+        if session is None:
+            session = ShellSession(serial)
+            _sessions[serial] = session
+        return session
+
+
+def close_sessions() -> None:
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+    if "adb_client" in sys.modules:
+        sys.modules["adb_client"].get_client().close()
+
+
+atexit.register(close_sessions)
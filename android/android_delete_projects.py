@@ -1,30 +1,18 @@
 #!/usr/bin/env python3
 
-import subprocess
-import sys
 import time
 from typing import List, Tuple
 
+from adb_transport import ensure_device, get_session
 
-def adb(*args: str) -> subprocess.CompletedProcess:
-    return subprocess.run(["adb", *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=True)
 
-
-def ensure_device() -> None:
-    out = adb("devices").stdout.strip().splitlines()
-    lines = [ln for ln in out if "\t" in ln]
-    if not lines:
-        print("No devices attached. Connect your Android and run again.")
-        sys.exit(1)
-    status = lines[0].split("\t", 1)[1]
-    if status != "device":
-        print(f"Device status is '{status}'. Authorize device and retry.")
-        sys.exit(1)
+def shell(*args: str) -> str:
+    return get_session().call(*args)
 
 
 def tap(x: int, y: int) -> None:
     print(f"tap: ({x}, {y})")
-    adb("shell", "input", "tap", str(x), str(y))
+    shell("input", "tap", str(x), str(y))
 
 
 def main() -> None:
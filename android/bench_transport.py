@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import shlex
+import stat
+import tempfile
+import time
+
+import adb_transport
+from adb_client import AdbClient
+from adb_transport import ShellSession
+from fake_adb_server import FakeAdbServer
+
+
+FAKE_ADB = """#!/bin/sh
+# Stand-in for adb: runs shell commands on the host so transports can be benchmarked without a phone
+if [ "$1" = "-s" ]; then shift 2; fi
+case "$1" in
+  devices) printf 'List of devices attached\\nFAKE0001\\tdevice\\n\\n' ;;
+  shell|exec-out)
+    shift
+    if [ $# -eq 0 ]; then exec sh; else exec sh -c "$*"; fi ;;
+  *) echo "fake adb: unsupported command $1" >&2; exit 1 ;;
+esac
+"""
+
+FAKE_INPUT = """#!/bin/sh
+exit 0
+"""
+
+
+def install_fake_adb() -> str:
+    """Write fake `adb` and `input` executables to a temp dir and put it first on PATH."""
+    bin_dir = tempfile.mkdtemp(prefix="fake_adb_")
+    for name, body in (("adb", FAKE_ADB), ("input", FAKE_INPUT)):
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write(body)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+    adb_transport.ADB = "adb"
+    return bin_dir
+
+
+def bench_subprocess(command: str, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        adb_transport.adb("shell", *shlex.split(command))
+    return n / (time.perf_counter() - start)
+
+
+def bench_session(command: str, n: int) -> float:
+    with ShellSession() as session:
+        session.run(command)  # warm up
+        start = time.perf_counter()
+        for _ in range(n):
+            session.run(command)
+        return n / (time.perf_counter() - start)
+
+
+def bench_pipeline(command: str, n: int) -> float:
+    with ShellSession() as session:
+        session.run(command)
+        start = time.perf_counter()
+        session.pipeline([command] * n)
+        return n / (time.perf_counter() - start)
+
+
+def bench_socket_shell(client: AdbClient, serial: str, command: str, n: int) -> float:
+    client.shell(serial, command)
+    start = time.perf_counter()
+    for _ in range(n):
+        client.shell(serial, command)
+    return n / (time.perf_counter() - start)
+
+
+def bench_socket_session(client: AdbClient, serial: str, command: str, n: int) -> float:
+    session = client.session(serial)
+    session.run(command)
+    start = time.perf_counter()
+    for _ in range(n):
+        session.run(command)
+    return n / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Commands per second: one adb process per command vs persistent shells and the socket client")
+    parser.add_argument("-n", type=int, default=200, help="Commands per measurement (default: 200)")
+    parser.add_argument("--command", default="input tap 5 5", help="Shell command to send")
+    parser.add_argument("--fake", action="store_true", help="Use a fake adb on PATH and a stand-in adb server instead of a real device")
+    args = parser.parse_args()
+
+    server = None
+    if args.fake:
+        print(f"Using fake adb in {install_fake_adb()}")
+        # No prelude: the server's shells use the same fake `input` on PATH as the adb script
+        server = FakeAdbServer(["FAKE0001"], prelude="").start()
+        client = AdbClient(port=server.port)
+    else:
+        client = AdbClient()
+    serial = adb_transport.ensure_device()
+
+    results = [
+        ("subprocess per command", bench_subprocess(args.command, args.n)),
+        ("persistent shell", bench_session(args.command, args.n)),
+        ("persistent shell, pipelined", bench_pipeline(args.command, args.n)),
+        ("socket client, shell: each", bench_socket_shell(client, serial, args.command, args.n)),
+        ("socket client, exec:sh session", bench_socket_session(client, serial, args.command, args.n)),
+    ]
+    client.close()
+    if server:
+        server.stop()
+    baseline = results[0][1]
+    print(f"\n{args.n} x '{args.command}'")
+    for name, rate in results:
+        print(f"  {name:30s} {rate:9.1f} cmd/s  ({rate / baseline:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
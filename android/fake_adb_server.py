@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import socketserver
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+# Stubs for device-only binaries so workflows run unchanged against the host shell
+DEFAULT_PRELUDE = """input() { :; }
+sendevent() { :; }
+wm() { echo "Physical size: 1080x2400"; }
+getprop() { echo "arm64-v8a"; }
+getevent() { cat <<'GETEVENT'
+add device 1: /dev/input/event0
+  name:     "gpio-keys"
+  events:
+    KEY (0001): KEY_VOLUMEDOWN        KEY_VOLUMEUP          KEY_POWER
+  input props:
+    <none>
+add device 2: /dev/input/event2
+  name:     "fts_ts"
+  events:
+    KEY (0001): BTN_TOUCH
+    ABS (0003): ABS_MT_SLOT           : value 0, min 0, max 9, fuzz 0, flat 0, resolution 0
+                ABS_MT_TOUCH_MAJOR    : value 0, min 0, max 255, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_X     : value 0, min 0, max 4095, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_Y     : value 0, min 0, max 4095, fuzz 0, flat 0, resolution 0
+                ABS_MT_TRACKING_ID    : value 0, min 0, max 65535, fuzz 0, flat 0, resolution 0
+  input props:
+    INPUT_PROP_DIRECT
+GETEVENT
+}
+screencap() { printf '\\070\\004\\000\\000\\140\\011\\000\\000\\001\\000\\000\\000'; head -c 10368000 /dev/zero; }
+"""
+
+
+class _AdbRequestHandler(socketserver.BaseRequestHandler):
+    server: "FakeAdbServer"
+
+    def _read_request(self) -> Optional[str]:
+        header = self._recv_exact(4)
+        if not header:
+            return None
+        return self._recv_exact(int(header, 16)).decode()
+
+    def _recv_exact(self, n: int) -> bytes:
+        buf = b""
+        while len(buf) < n:
+            chunk = self.request.recv(n - len(buf))
+            if not chunk:
+                return b""
+            buf += chunk
+        return buf
+
+    def _okay(self, payload: Optional[bytes] = None) -> None:
+        msg = b"OKAY"
+        if payload is not None:
+            msg += b"%04x" % len(payload) + payload
+        self.request.sendall(msg)
+
+    def _fail(self, message: str) -> None:
+        data = message.encode()
+        self.request.sendall(b"FAIL" + b"%04x" % len(data) + data)
+
+    def handle(self) -> None:
+        server = self.server
+        request = self._read_request()
+        if request is None:
+            return
+        if server.latency:
+            time.sleep(server.latency)
+
+        if request == "host:version":
+            self._okay(b"%04x" % 41)
+        elif request in ("host:devices", "host:devices-l"):
+            listing = "".join(f"{s}\t{server.status.get(s, 'device')}\n" for s in server.serials)
+            self._okay(listing.encode())
+        elif request.startswith("host:transport"):
+            if request == "host:transport-any" and server.serials:
+                serial = server.serials[0]
+            else:
+                serial = request.split(":", 2)[2] if request.count(":") >= 2 else ""
+            if serial not in server.serials:
+                self._fail(f"device '{serial}' not found")
+                return
+            self._okay()
+            service = self._read_request()
+            if service is None:
+                return
+            if server.latency:
+                time.sleep(server.latency)
+            self._device_service(serial, service)
+        else:
+            self._fail(f"unsupported request {request}")
+
+    def _device_service(self, serial: str, service: str) -> None:
+        kind, _, command = service.partition(":")
+        if kind not in ("shell", "exec"):
+            self._fail(f"unsupported service {kind}")
+            return
+        server = self.server
+        server.log(serial, command)
+        self._okay()
+
+        env = dict(os.environ, ANDROID_SERIAL=serial)
+        if command in ("", "sh"):
+            self._interactive(env)
+            return
+
+        result = subprocess.run(["sh", "-c", server.prelude + command], env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.request.sendall(result.stdout)
+
+    def _interactive(self, env: Dict[str, str]) -> None:
+        proc = subprocess.Popen(["sh"], env=env, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+        proc.stdin.write(self.server.prelude.encode())
+
+        def pump_stdin() -> None:
+            try:
+                while True:
+                    data = self.request.recv(65536)
+                    if not data:
+                        break
+                    proc.stdin.write(data)
+            except OSError:
+                pass
+            finally:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+
+        threading.Thread(target=pump_stdin, daemon=True).start()
+        try:
+            while True:
+                data = os.read(proc.stdout.fileno(), 65536)
+                if not data:
+                    break
+                self.request.sendall(data)
+        except OSError:
+            pass
+        finally:
+            proc.kill()
+            proc.wait()
+
+
+class FakeAdbServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    Stand-in adb server that speaks the host protocol for a set of fake serials.
+
+    Device services run in the host's `sh` (with stubs for `input`,
+    `sendevent`, `wm`, `getprop`, a touchscreen in `getevent -pl` and a blank
+    raw `screencap`), which is enough to exercise the adb client,
+    transports and fleet runner without hardware. latency adds a delay per request to mimic a USB hop.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, serials: List[str], port: int = 0, latency: float = 0.0,
+                 prelude: str = DEFAULT_PRELUDE):
+        super().__init__(("127.0.0.1", port), _AdbRequestHandler)
+        self.serials = list(serials)
+        self.status: Dict[str, str] = {}
+        self.latency = latency
+        self.prelude = prelude
+        self.requests: Dict[str, List[str]] = {s: [] for s in serials}
+        self._log_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def log(self, serial: str, command: str) -> None:
+        with self._log_lock:
+            self.requests.setdefault(serial, []).append(command)
+
+    def start(self) -> "FakeAdbServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a stand-in adb server for testing without devices")
+    parser.add_argument("--port", type=int, default=5037)
+    parser.add_argument("--serials", nargs="+", default=["FAKE0001"])
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay per request")
+    args = parser.parse_args()
+
+    server = FakeAdbServer(args.serials, port=args.port, latency=args.latency)
+    print(f"Fake adb server on 127.0.0.1:{server.port} serving {', '.join(args.serials)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+import argparse
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import adb_transport
+from adb_transport import ShellSession, get_session, list_devices
+from gallery_loop import POSITIONS, process_position
+from gestures import MotionEventCompiler
+
+
+# (1-based gallery index, x, y, attempts so far)
+WorkItem = Tuple[int, int, int, int]
+
+
+def authorised_devices() -> List[str]:
+    """Serials of every attached device in the 'device' state; others are reported and skipped."""
+    serials = []
+    for serial, status in list_devices():
+        if status == "device":
+            serials.append(serial)
+        else:
+            print(f"⚠️ Skipping {serial}: status '{status}'")
+    return serials
+
+
+class WorkQueue:
+    """
+    Gallery indices sharded across devices, with work stealing.
+
+    Each device starts with a contiguous share and takes from the front of
+    its own deque. A device whose deque is empty steals from the back of
+    the fullest other deque, so a fast phone drains a slow one's backlog.
+    Failed items go to a shared retry list and are preferably picked up by
+    a different device.
+    """
+
+    def __init__(self, items: List[Tuple[int, int, int]], serials: List[str], max_attempts: int = 2):
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._deques: Dict[str, Deque[WorkItem]] = {s: deque() for s in serials}
+        self._retry: List[Tuple[WorkItem, str]] = []  # (item, serial it failed on)
+        self._in_flight = 0
+        self.abandoned: List[WorkItem] = []
+        share = -(-len(items) // max(1, len(serials)))
+        for n, serial in enumerate(serials):
+            for idx, x, y in items[n * share:(n + 1) * share]:
+                self._deques[serial].append((idx, x, y, 0))
+
+    def _next(self, serial: str) -> Tuple[Optional[WorkItem], bool]:
+        for n, (item, failed_on) in enumerate(self._retry):
+            if failed_on != serial:
+                del self._retry[n]
+                return item, False
+        own = self._deques.get(serial)
+        if own:
+            return own.popleft(), False
+        victim = max((s for s in self._deques if s != serial),
+                     key=lambda s: len(self._deques[s]), default=None)
+        if victim is not None and self._deques[victim]:
+            return self._deques[victim].pop(), True
+        if self._retry and self._in_flight == 0:
+            # Only retries this device failed itself are left; better than dropping them
+            return self._retry.pop(0)[0], False
+        return None, False
+
+    def take(self, serial: str) -> Tuple[Optional[WorkItem], bool]:
+        """
+        Next item for a device; waits while other devices still have items in
+        flight (a failure there may hand work back).
+
+        Returns:
+            (item, stolen); item is None once the whole run is finished
+        """
+        with self._cond:
+            while True:
+                item, stolen = self._next(serial)
+                if item is not None:
+                    self._in_flight += 1
+                    return item, stolen
+                if self._in_flight == 0:
+                    return None, False
+                self._cond.wait()
+
+    def done(self, item: WorkItem) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def fail(self, item: WorkItem, serial: str) -> bool:
+        """Return a failed item for another attempt; False if it has used up its attempts."""
+        idx, x, y, attempts = item
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+            if attempts + 1 >= self.max_attempts:
+                self.abandoned.append(item)
+                return False
+            self._retry.append(((idx, x, y, attempts + 1), serial))
+            return True
+
+    def orphan(self, serial: str) -> int:
+        """Release a quarantined device's remaining share to the rest of the fleet."""
+        with self._cond:
+            own = self._deques.pop(serial, deque())
+            if own:
+                # Hand the backlog to the least-loaded remaining device
+                target = min(self._deques, key=lambda s: len(self._deques[s]), default=None)
+                if target is None:
+                    self.abandoned.extend(own)
+                else:
+                    self._deques[target].extend(own)
+            if not self._deques:
+                # Nobody left to run retries either
+                self.abandoned.extend(item for item, _ in self._retry)
+                self._retry.clear()
+            self._cond.notify_all()
+            return len(own)
+
+    def remaining(self) -> int:
+        with self._cond:
+            return sum(len(d) for d in self._deques.values()) + len(self._retry)
+
+
+class DeviceStats:
+    """Per-device counters for the fleet report."""
+
+    def __init__(self, serial: str):
+        self.serial = serial
+        self.completed: List[int] = []
+        self.failed: List[int] = []
+        self.stolen = 0
+        self.busy = 0.0
+        self.quarantined: Optional[str] = None
+
+    @property
+    def throughput(self) -> float:
+        """Images per minute of busy time."""
+        return len(self.completed) / self.busy * 60.0 if self.busy else 0.0
+
+
+class DeviceWorker(threading.Thread):
+    """
+    One thread per phone with its own shell session and gesture compiler.
+
+    Exceptions from an item stay with this device: the item is retried
+    elsewhere, and after `max_consecutive_failures` in a row the device is
+    quarantined and its backlog handed to the rest of the fleet.
+    """
+
+    def __init__(self, serial: str, queue: WorkQueue, session: ShellSession,
+                 run_item: Callable[..., None], max_consecutive_failures: int = 2):
+        super().__init__(name=f"fleet-{serial}", daemon=True)
+        self.serial = serial
+        self.queue = queue
+        self.session = session
+        self.compiler = MotionEventCompiler()
+        self.run_item = run_item
+        self.max_consecutive_failures = max_consecutive_failures
+        self.stats = DeviceStats(serial)
+
+    def run(self) -> None:
+        consecutive = 0
+        while True:
+            item, stolen = self.queue.take(self.serial)
+            if item is None:
+                return
+            idx, gx, gy, attempts = item
+            if stolen:
+                self.stats.stolen += 1
+            print(f"\n=== [{self.serial}] Loop {idx}{' (stolen)' if stolen else ''}"
+                  f"{f' retry {attempts}' if attempts else ''} ===")
+            start = time.perf_counter()
+            try:
+                self.run_item(idx, gx, gy, session=self.session, compiler=self.compiler)
+                self.queue.done(item)
+                self.stats.completed.append(idx)
+                consecutive = 0
+            except Exception as e:
+                print(f"❌ [{self.serial}] Loop {idx} failed: {e}")
+                self.stats.failed.append(idx)
+                self.queue.fail(item, self.serial)
+                consecutive += 1
+                if consecutive >= self.max_consecutive_failures:
+                    self.stats.quarantined = f"{consecutive} consecutive failures ({e})"
+                    moved = self.queue.orphan(self.serial)
+                    print(f"🚫 [{self.serial}] Quarantined; {moved} queued image(s) moved to other devices")
+                    return
+            finally:
+                self.stats.busy += time.perf_counter() - start
+
+
+class FleetRunner:
+    """Runs gallery positions across every authorised device and reports throughput."""
+
+    def __init__(self, serials: List[str], positions: List[Tuple[int, int, int]],
+                 run_item: Callable[..., None] = process_position, max_attempts: int = 2,
+                 max_consecutive_failures: int = 2):
+        self.queue = WorkQueue(positions, serials, max_attempts=max_attempts)
+        self.workers = [DeviceWorker(serial, self.queue, get_session(serial), run_item,
+                                     max_consecutive_failures) for serial in serials]
+        self.total = len(positions)
+        self.wall = 0.0
+
+    def run(self) -> List[DeviceStats]:
+        start = time.perf_counter()
+        for worker in self.workers:
+            worker.start()
+        for worker in self.workers:
+            worker.join()
+        self.wall = time.perf_counter() - start
+        return [w.stats for w in self.workers]
+
+    def report(self) -> str:
+        done = sum(len(w.stats.completed) for w in self.workers)
+        lines = [f"📊 Fleet: {done}/{self.total} images on {len(self.workers)} device(s) in {self.wall:.1f}s "
+                 f"→ {done / self.wall * 60 if self.wall else 0:.1f} images/min"]
+        for w in self.workers:
+            s = w.stats
+            status = f" 🚫 quarantined: {s.quarantined}" if s.quarantined else ""
+            lines.append(f"   {s.serial:16s} done={len(s.completed):<3d} failed={len(s.failed):<3d} "
+                         f"stolen={s.stolen:<3d} busy={s.busy:6.1f}s {s.throughput:6.1f} images/min{status}")
+        if self.queue.abandoned:
+            lines.append(f"   ❌ Not processed: {sorted(item[0] for item in self.queue.abandoned)}")
+        return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process gallery positions across every attached Android device")
+    parser.add_argument("start", nargs="?", type=int, default=1, help="First gallery index (1-based)")
+    parser.add_argument("count", nargs="?", type=int, default=None, help="Number of positions (default: all)")
+    parser.add_argument("--attempts", type=int, default=2, help="Attempts per image across the fleet")
+    parser.add_argument("--fake", type=int, default=0, metavar="N",
+                        help="Run against a stand-in adb server with N fake serials")
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="Multiply every pause (e.g. 0.01 for a quick fake run)")
+    args = parser.parse_args()
+
+    server = None
+    if args.fake:
+        from adb_client import AdbClient, set_client
+        from fake_adb_server import FakeAdbServer
+        server = FakeAdbServer([f"FAKE{n:04d}" for n in range(1, args.fake + 1)], latency=0.002).start()
+        adb_transport.ADB_BACKEND = "socket"
+        set_client(AdbClient(port=server.port))
+
+    serials = authorised_devices()
+    if not serials:
+        print("No authorised devices attached. Connect your Android devices and run again.")
+        return
+
+    start = max(1, args.start)
+    end = len(POSITIONS) if args.count is None else min(len(POSITIONS), start - 1 + args.count)
+    positions = [(idx, x, y) for idx, (x, y) in enumerate(POSITIONS, start=1) if start <= idx <= end]
+
+    scale = args.time_scale
+
+    def run_item(idx: int, gx: int, gy: int, **kwargs) -> None:
+        process_position(idx, gx, gy, sleep=lambda s: time.sleep(s * scale), **kwargs)
+
+    print(f"🚀 Fleet run: {len(positions)} image(s) across {len(serials)} device(s): {', '.join(serials)}")
+    fleet = FleetRunner(serials, positions, run_item=run_item, max_attempts=args.attempts)
+    fleet.run()
+    print("\n" + fleet.report())
+
+    if server:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
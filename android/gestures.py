@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import math
+import time
+import weakref
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from adb_transport import ShellSession, get_session
+
+
+Point = Tuple[int, int]
+Sample = Tuple[float, int, int]  # (t_ms, x, y)
+
+
+def _ease_in_out(t: float) -> float:
+    return 0.5 - 0.5 * math.cos(math.pi * t)
+
+
+def _ease_out(t: float) -> float:
+    return 1.0 - (1.0 - t) ** 3
+
+
+def _ease_in(t: float) -> float:
+    return t ** 3
+
+
+EASINGS: Dict[str, Callable[[float], float]] = {
+    "linear": lambda t: t,
+    "ease_in": _ease_in,
+    "ease_out": _ease_out,
+    "ease_in_out": _ease_in_out,
+}
+
+
+class Gesture:
+    """
+    A single-finger path through one or more waypoints.
+
+    Positions are interpolated on the host by arc length, so multi-waypoint
+    paths move at a constant speed (before easing) across segments.
+    """
+
+    def __init__(self, waypoints: Sequence[Point], duration_ms: int = 800,
+                 easing: str = "linear", hold_ms: int = 30):
+        if len(waypoints) < 2:
+            raise ValueError("a gesture needs at least two waypoints")
+        if easing not in EASINGS:
+            raise ValueError(f"unknown easing '{easing}' (choose from {', '.join(EASINGS)})")
+        self.waypoints = [(int(x), int(y)) for x, y in waypoints]
+        self.duration_ms = max(1, int(duration_ms))
+        self.easing = easing
+        self.hold_ms = hold_ms
+
+        self._lengths = [math.dist(a, b) for a, b in zip(self.waypoints, self.waypoints[1:])]
+        self._total = sum(self._lengths)
+
+    def point_at(self, fraction: float) -> Point:
+        """Position after `fraction` (0..1) of the path's length."""
+        if self._total == 0:
+            return self.waypoints[-1]
+        remaining = max(0.0, min(1.0, fraction)) * self._total
+        for (a, b), length in zip(zip(self.waypoints, self.waypoints[1:]), self._lengths):
+            if remaining <= length and length > 0:
+                f = remaining / length
+                return round(a[0] + (b[0] - a[0]) * f), round(a[1] + (b[1] - a[1]) * f)
+            remaining -= length
+        return self.waypoints[-1]
+
+    def samples(self, steps: int = 24) -> List[Sample]:
+        """DOWN sample at t=0, steps-1 MOVE samples, UP sample at t=duration."""
+        steps = max(1, steps)
+        ease = EASINGS[self.easing]
+        out: List[Sample] = []
+        for i in range(steps + 1):
+            t = i / steps
+            x, y = self.point_at(ease(t))
+            out.append((t * self.duration_ms, x, y))
+        return out
+
+
+def drag_gesture(x1: int, y1: int, x2: int, y2: int, duration_ms: int = 800,
+                 easing: str = "linear") -> Gesture:
+    return Gesture([(x1, y1), (x2, y2)], duration_ms=duration_ms, easing=easing)
+
+
+class MotionEventCompiler:
+    """
+    Compiles a Gesture into one shell script of `input motionevent` calls with
+    on-device `sleep` timing, so a whole drag is a single round trip.
+
+    Every `input` call costs some on-device time; the compiler learns that cost
+    from the runs it times and subtracts it from the sleeps (dropping MOVE
+    steps if they cannot fit), so the gesture lasts roughly duration_ms.
+    The session's bare round trip and the script's own sleeps are taken out
+    of each timing first, so only the `input` calls are charged.
+    """
+
+    def __init__(self, command_cost_ms: float = 0.0, min_interval_ms: float = 8.0,
+                 learning_rate: float = 0.3):
+        self.command_cost_ms = command_cost_ms
+        self.min_interval_ms = min_interval_ms
+        self.learning_rate = learning_rate
+
+        # Stats of the last run
+        self.last_planned_ms = 0.0
+        self.last_elapsed_ms = 0.0
+        self.last_sleep_ms = 0.0  # Sum of the sleeps in the last compiled script
+
+        # Round trip of an empty command, per session
+        self._round_trip_ms: "weakref.WeakKeyDictionary[ShellSession, float]" = weakref.WeakKeyDictionary()
+
+    def steps_for(self, gesture: Gesture, requested_steps: int) -> int:
+        interval = max(self.command_cost_ms, self.min_interval_ms)
+        fit = int(gesture.duration_ms // interval) if interval > 0 else requested_steps
+        return max(1, min(requested_steps, fit))
+
+    def compile(self, gesture: Gesture, steps: int = 24) -> Tuple[str, int]:
+        """Return (script, command_count)."""
+        samples = gesture.samples(self.steps_for(gesture, steps))
+        lines: List[str] = []
+        commands = 0
+        sleep_ms = 0.0
+        last_t = 0.0
+        for i, (t, x, y) in enumerate(samples):
+            if i == 0:
+                action = "DOWN"
+            elif i == len(samples) - 1:
+                action = "UP"
+            else:
+                action = "MOVE"
+            pause = t - last_t - (self.command_cost_ms if i > 0 else 0.0)
+            if i == 1:
+                pause = max(pause, gesture.hold_ms)
+            if pause >= 1:
+                lines.append(f"sleep {pause / 1000.0:.3f}")
+                sleep_ms += round(pause / 1000.0, 3) * 1000.0
+
+            lines.append(f"input motionevent {action} {x} {y}")
+            commands += 1
+            last_t = t
+        self.last_sleep_ms = sleep_ms
+        return "\n".join(lines), commands
+
+    def round_trip_ms(self, session: ShellSession, samples: int = 3) -> float:
+        """Best-of-`samples` time for a no-op command on this session (measured once per session)."""
+        cached = self._round_trip_ms.get(session)
+        if cached is None:
+            timings = []
+            for _ in range(samples):
+                start = time.perf_counter()
+                session.run(":")
+                timings.append((time.perf_counter() - start) * 1000.0)
+            cached = self._round_trip_ms[session] = min(timings)
+        return cached
+
+    def run(self, gesture: Gesture, steps: int = 24, session: Optional[ShellSession] = None) -> float:
+        """Execute the gesture in one round trip and return its elapsed milliseconds."""
+        session = session or get_session()
+        baseline_ms = self.round_trip_ms(session)
+        script, commands = self.compile(gesture, steps)
+        start = time.perf_counter()
+        session.run(script)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        self.last_planned_ms = float(gesture.duration_ms)
+        self.last_elapsed_ms = elapsed_ms
+        # Time not spent in the round trip or the script's sleeps went to the input commands
+        observed = (elapsed_ms - baseline_ms - self.last_sleep_ms) / max(1, commands)
+        self.command_cost_ms = max(0.0, (1 - self.learning_rate) * self.command_cost_ms
+                                   + self.learning_rate * observed)
+        return elapsed_ms
+
+
+_compiler = MotionEventCompiler()
+
+
+def run_gesture(gesture: Gesture, steps: int = 24, session: Optional[ShellSession] = None) -> float:
+    """Run a gesture with the shared compiler, which keeps its learned command cost."""
+    return _compiler.run(gesture, steps, session=session)
@@ -8,25 +8,15 @@ import sys
 import time
 from typing import List, Optional
 
+from adb_transport import ensure_device, get_session
 
-def adb(*args: str, check: bool = True) -> subprocess.CompletedProcess:
-    return subprocess.run(["adb", *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=check)
 
-
-def ensure_device() -> None:
-    out = adb("devices").stdout.strip().splitlines()
-    lines = [ln for ln in out if "\t" in ln]
-    if not lines:
-        print("No devices attached. Connect your Android and run again.")
-        sys.exit(1)
-    status = lines[0].split("\t", 1)[1]
-    if status != "device":
-        print(f"Device status is '{status}'. Authorize device and retry.")
-        sys.exit(1)
+def shell(*args: str, check: bool = True) -> str:
+    return get_session().call(*args, check=check)
 
 
 def list_installed_packages() -> List[str]:
-    out = adb("shell", "cmd", "package", "list", "packages").stdout
+    out = shell("cmd", "package", "list", "packages")
     pkgs: List[str] = []
     for line in out.splitlines():
         line = line.strip()
@@ -74,18 +64,18 @@ def find_drivesync_package() -> Optional[str]:
 def launch_package(package: str) -> None:
     # Use monkey with LAUNCHER intent for reliability
     print(f"Launching '{package}' via monkey…")
-    adb("shell", "monkey", "-p", package, "-c", "android.intent.category.LAUNCHER", "1")
+    shell("monkey", "-p", package, "-c", "android.intent.category.LAUNCHER", "1")
     time.sleep(1.5)
 
 
 def tap(x: int, y: int) -> None:
     print(f"tap: ({x}, {y})")
-    adb("shell", "input", "tap", str(x), str(y))
+    shell("input", "tap", str(x), str(y))
 
 
 def stop_package(package: str) -> None:
     print(f"Stopping '{package}'…")
-    adb("shell", "am", "force-stop", package)
+    shell("am", "force-stop", package)
 
 
 def main() -> None:
@@ -3,18 +3,15 @@
 import argparse
 import json
 import os
-import subprocess
 import sys
 import time
 from typing import List, Tuple, Optional
 
+from adb_transport import ensure_device, get_session
 
-def adb(*args: str, check: bool = True) -> subprocess.CompletedProcess:
-    return subprocess.run(["adb", *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=check)
 
-
-def adb_shell(*args: str, check: bool = True) -> subprocess.CompletedProcess:
-    return adb("shell", *args, check=check)
+def adb_shell(*args: str, check: bool = True) -> str:
+    return get_session().call(*args, check=check)
 
 
 def tap(x: int, y: int) -> None:
@@ -39,18 +36,6 @@ def keyevent(code: int) -> None:
     adb_shell("input", "keyevent", str(code))
 
 
-def ensure_device() -> None:
-    out = adb("devices").stdout.strip()
-    lines = [ln for ln in out.splitlines() if "\t" in ln]
-    if not lines:
-        print("No devices attached. Run 'adb devices' and connect your Pixel.")
-        sys.exit(1)
-    serial, status = lines[0].split("\t", 1)
-    if status != "device":
-        print(f"Device status is '{status}'. Authorize device and retry.")
-        sys.exit(1)
-
-
 def load_positions(path: str, expected: int) -> List[Tuple[int, int]]:
     try:
         with open(path, "r") as f:
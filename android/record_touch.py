@@ -1,37 +1,24 @@
 #!/usr/bin/env python3
 
-import subprocess
-import sys
 import time
 import re
 import json
 import os
+import sys
 from typing import Optional, Tuple, List, Dict, Any
 
+from adb_transport import ensure_device, get_session, stream_lines
 
-def run(cmd: list[str]) -> str:
-    out = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=True)
-    return out.stdout
-
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from action_log import ActionLogWriter
 
-def adb(*args: str) -> str:
-    return run(["adb", *args])
 
-
-def ensure_device() -> None:
-    out = adb("devices").strip().splitlines()
-    lines = [ln for ln in out if "\t" in ln]
-    if not lines:
-        print("No devices attached. Connect your Android and run again.")
-        sys.exit(1)
-    status = lines[0].split("\t", 1)[1]
-    if status != "device":
-        print(f"Device status is '{status}'. Authorize device and retry.")
-        sys.exit(1)
+def adb_shell(*args: str) -> str:
+    return get_session().call(*args)
 
 
 def get_screen_size() -> Tuple[int, int]:
-    out = adb("shell", "wm", "size")
+    out = adb_shell("wm", "size")
     # e.g., Physical size: 1080x2400
     m = re.search(r"Physical size:\s*(\d+)x(\d+)", out)
     if not m:
@@ -46,7 +33,7 @@ def find_touch_device() -> Tuple[Optional[str], int, int]:
     """Return (device_path, max_x, max_y) for touchscreen input device.
     If not found, returns (None, 0, 0) to allow fallback parsing across all devices.
     """
-    out = adb("shell", "getevent", "-pl")
+    out = adb_shell("getevent", "-pl")
     blocks = out.split("add device")
     chosen = None
     max_x = max_y = None
@@ -57,9 +44,11 @@ def find_touch_device() -> Tuple[Optional[str], int, int]:
         if not devm:
             continue
         dev = devm.group(1)
-        # Heuristic: must expose ABS_MT_POSITION_X and ABS_MT_POSITION_Y
-        has_x = re.search(r"0035\s+VALUE\s+0,\s*min\s*\d+,\s*max\s*(\d+)", b)
-        has_y = re.search(r"0036\s+VALUE\s+0,\s*min\s*\d+,\s*max\s*(\d+)", b)
+        # Heuristic: must expose ABS_MT_POSITION_X and ABS_MT_POSITION_Y, e.g.
+        #   ABS_MT_POSITION_X     : value 0, min 0, max 1079, fuzz 0, flat 0, resolution 0
+        # (`getevent -p` prints the codes instead: "0035  : value 0, min 0, max 1079, ...")
+        has_x = re.search(r"(?:ABS_MT_POSITION_X|\b0035)\s*:\s*value\s+-?\d+,\s*min\s+-?\d+,\s*max\s+(\d+)", b)
+        has_y = re.search(r"(?:ABS_MT_POSITION_Y|\b0036)\s*:\s*value\s+-?\d+,\s*min\s+-?\d+,\s*max\s+(\d+)", b)
         if has_x and has_y:
             mx = int(has_x.group(1))
             my = int(has_y.group(1))
@@ -82,13 +71,29 @@ def scale(raw_x: int, raw_y: int, max_x: int, max_y: int, w: int, h: int) -> Tup
     return x, y
 
 
-def record_events(dev: Optional[str], max_x: int, max_y: int, w: int, h: int) -> Dict[str, Any]:
+def unscale(x: int, y: int, max_x: int, max_y: int, w: int, h: int) -> Tuple[int, int]:
+    # Inverse of scale(): screen pixels back to raw ABS_MT units
+    sx = max_x / w if max_x else 1.0
+    sy = max_y / h if max_y else 1.0
+    raw_x = max(0, min(max_x or (w - 1), int(round(x * sx))))
+    raw_y = max(0, min(max_y or (h - 1), int(round(y * sy))))
+    return raw_x, raw_y
+
+
+def record_events(dev: Optional[str], max_x: int, max_y: int, w: int, h: int,
+                  log: Optional[ActionLogWriter] = None) -> Dict[str, Any]:
+    """Record taps/swipes until Ctrl+C; each action is also appended to `log` as it happens."""
     print("\n🔴 Recording started on Android. Perform your workflow on the device.")
     print("   Press Ctrl+C here to stop.")
     start = time.time()
     last_action_time = start
     actions: List[Dict[str, Any]] = []
 
+    def emit(action: Dict[str, Any]) -> None:
+        actions.append(action)
+        if log:
+            log.append(action)
+
     # Touch state
     current_x = current_y = None
     start_x = start_y = None
@@ -98,12 +103,12 @@ def record_events(dev: Optional[str], max_x: int, max_y: int, w: int, h: int) ->
     last_xy = None
 
     # Start getevent reader
-    cmd = ["adb", "shell", "getevent", "-lt"]
+    cmd = ["getevent", "-lt"]
     if dev:
         cmd.append(dev)
-    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    lines = stream_lines(*cmd)
     try:
-        for line in proc.stdout:
+        for line in lines:
             # Example: [  3532.123456] /dev/input/event2: 0003 0035 00000567
             m = re.search(r"\[\s*(\d+\.\d+)\]\s+([^:]+):\s+([0-9a-f]{4})\s+([0-9a-f]{4})\s+([0-9a-f]{8})", line, re.IGNORECASE)
             if not m:
@@ -135,14 +140,15 @@ def record_events(dev: Optional[str], max_x: int, max_y: int, w: int, h: int) ->
                             ex, ey = scale(current_x, current_y, max_x, max_y, w, h)
                             duration_ms = int(max(1, (up_time - (down_time or up_time)) * 1000))
                             if (sx - ex) ** 2 + (sy - ey) ** 2 < 20 * 20:
-                                actions.append({
+                                emit({
                                     "type": "tap",
                                     "x": ex,
                                     "y": ey,
+                                    "duration_ms": duration_ms,
                                     "delay": round((t_s - last_action_time), 3)
                                 })
                             else:
-                                actions.append({
+                                emit({
                                     "type": "swipe",
                                     "x1": sx,
                                     "y1": sy,
@@ -172,14 +178,15 @@ def record_events(dev: Optional[str], max_x: int, max_y: int, w: int, h: int) ->
                         # Decide tap vs swipe by movement threshold
                         if (sx - ex) ** 2 + (sy - ey) ** 2 < 20 * 20:
                             # tap
-                            actions.append({
+                            emit({
                                 "type": "tap",
                                 "x": ex,
                                 "y": ey,
+                                "duration_ms": duration_ms,
                                 "delay": round((t_s - last_action_time), 3)
                             })
                         else:
-                            actions.append({
+                            emit({
                                 "type": "swipe",
                                 "x1": sx,
                                 "y1": sy,
@@ -202,10 +209,7 @@ def record_events(dev: Optional[str], max_x: int, max_y: int, w: int, h: int) ->
     except KeyboardInterrupt:
         pass
     finally:
-        try:
-            proc.terminate()
-        except Exception:
-            pass
+        lines.close()
 
     return {
         "started_at": start,
@@ -230,28 +234,26 @@ def save_recording(data: Dict[str, Any]) -> str:
 
 
 def generate_playback(path: str, data: Dict[str, Any]) -> None:
+    # Playback injects raw touch events (sendevent_backend) so the recorded timing is kept
     lines = [
         "#!/usr/bin/env python3",
-        "import subprocess, time, sys",
-        "def adb(*args): subprocess.run(['adb', *args], check=True)",
-        "def tap(x,y): adb('shell','input','tap',str(x),str(y))",
-        "def swipe(x1,y1,x2,y2,ms): adb('shell','input','swipe',str(x1),str(y1),str(x2),str(y2),str(ms))",
+        "import os, sys, time",
+        "sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))",
+        "from adb_transport import ensure_device",
+        "from sendevent_backend import TouchInjector",
         "def main():",
+        "    ensure_device()",
+        "    inj = TouchInjector.discover()",
     ]
-    added = False
     for a in data.get("actions", []):
-        d = a.get("delay", 0)
-        if d and d > 0:
+        ms = a.get("duration_ms", 50)
+        d = round(a.get("delay", 0) - ms / 1000.0, 3)
+        if d > 0:
             lines.append(f"    time.sleep({d})")
-            added = True
         if a["type"] == "tap":
-            lines.append(f"    tap({a['x']}, {a['y']})")
-            added = True
+            lines.append(f"    inj.tap({a['x']}, {a['y']}, hold_ms={ms})")
         elif a["type"] == "swipe":
-            lines.append(f"    swipe({a['x1']}, {a['y1']}, {a['x2']}, {a['y2']}, {a['duration_ms']})")
-            added = True
-    if not added:
-        lines.append("    pass")
+            lines.append(f"    inj.swipe({a['x1']}, {a['y1']}, {a['x2']}, {a['y2']}, duration_ms={ms})")
     lines += [
         "if __name__ == '__main__':",
         "    main()",
@@ -265,7 +267,12 @@ def main():
     w, h = get_screen_size()
     dev, max_x, max_y = find_touch_device()
     print(f"Using touch device: {dev} (maxX={max_x}, maxY={max_y}), screen={w}x{h}")
-    rec = record_events(dev, max_x, max_y, w, h)
+    # Stream actions to disk as they happen so a crash keeps the session
+    log_path = os.path.join(os.path.dirname(__file__), "recordings",
+                            f"android_session_{time.strftime('%Y%m%d_%H%M%S')}.alog")
+    with ActionLogWriter(log_path, {"screen": {"width": w, "height": h}}) as log:
+        rec = record_events(dev, max_x, max_y, w, h, log)
+    print(f"📼 Action log: {log_path} ({log.count} actions)")
     save_recording(rec)
 
 
@@ -2,48 +2,31 @@
 
 import json
 import os
-import subprocess
 import sys
 import time
 from typing import List, Tuple
 
+from adb_transport import ensure_device, get_session
+from gestures import drag_gesture, run_gesture
 
-def adb(*args: str) -> subprocess.CompletedProcess:
-    return subprocess.run(["adb", *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=True)
 
-
-def ensure_device() -> None:
-    out = adb("devices").stdout.strip().splitlines()
-    lines = [ln for ln in out if "\t" in ln]
-    if not lines:
-        print("No devices attached. Connect your Android and run again.")
-        sys.exit(1)
-    status = lines[0].split("\t", 1)[1]
-    if status != "device":
-        print(f"Device status is '{status}'. Authorize device and retry.")
-        sys.exit(1)
+def shell(*args: str) -> str:
+    return get_session().call(*args)
 
 
 def tap(x: int, y: int) -> None:
     print(f"tap: ({x}, {y})")
-    adb("shell", "input", "tap", str(x), str(y))
+    shell("input", "tap", str(x), str(y))
 
 
 def motionevent(action: str, x: int, y: int) -> None:
-    adb("shell", "input", "motionevent", action.upper(), str(x), str(y))
+    shell("input", "motionevent", action.upper(), str(x), str(y))
 
 
 def drag(x1: int, y1: int, x2: int, y2: int, duration_ms: int = 800, steps: int = 24) -> None:
     print(f"drag (motionevent): ({x1},{y1}) -> ({x2},{y2}) in ~{duration_ms}ms, steps={steps}")
-    dt = max(1, duration_ms // max(1, steps)) / 1000.0
-    motionevent("DOWN", x1, y1)
-    time.sleep(0.03)
-    for i in range(1, steps):
-        x = x1 + (x2 - x1) * i // steps
-        y = y1 + (y2 - y1) * i // steps
-        motionevent("MOVE", int(x), int(y))
-        time.sleep(dt)
-    motionevent("UP", x2, y2)
+    # Compiled into one on-device script so timing is set by duration_ms, not adb latency
+    run_gesture(drag_gesture(x1, y1, x2, y2, duration_ms=duration_ms), steps=steps)
 
 
 def tap_retry(x: int, y: int, attempts: int = 4, gap_s: float = 0.25) -> None:
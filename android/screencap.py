@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+import adb_transport
+from adb_transport import ensure_device
+
+
+# android.graphics.PixelFormat values screencap can emit, with bytes per pixel
+_FORMATS = {1: ("RGBA", 4), 2: ("RGBX", 4), 5: ("BGRA", 4)}
+
+
+class ScreencapSource:
+    """
+    Pulls raw `screencap` frames (no PNG encoding, no temp files) into
+    preallocated NumPy buffers.
+
+    grab() reads one frame synchronously. start() runs a capture thread that
+    rotates through three buffers so latest() always has a complete frame
+    while the next one is being filled. screenshot() mirrors
+    iPhoneAutomation.screenshot() and returns a BGR array, so the vision code
+    works on both platforms.
+    """
+
+    def __init__(self, serial: Optional[str] = None, buffers: int = 3):
+        self.serial = serial
+        self.width = 0
+        self.height = 0
+        self.pixel_format = "RGBA"
+        self._header_size = 12
+        self._buffers: List[bytearray] = []
+        self._buffer_count = max(2, buffers)
+        self._next_buffer = 0
+
+        self._latest: Optional[Tuple[float, np.ndarray]] = None
+        self._latest_lock = threading.Lock()
+        self._new_frame = threading.Condition(self._latest_lock)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._bgr: Optional[np.ndarray] = None
+
+        # Stats
+        self.frames_captured = 0
+        self.last_latency_ms = 0.0
+        self._latency_total_ms = 0.0
+        self._first_frame_time = None
+        self._last_frame_time = None
+
+    def _open_stream(self):
+        """Readable binary stream carrying one raw screencap."""
+        if adb_transport.ADB_BACKEND == "socket":
+            from adb_client import get_client
+            sock = get_client().open_service(self.serial or ensure_device(), "exec:screencap")
+            return sock.makefile("rb", buffering=0), sock.close
+        cmd = [adb_transport.ADB]
+        if self.serial:
+            cmd += ["-s", self.serial]
+        proc = subprocess.Popen([*cmd, "exec-out", "screencap"], stdout=subprocess.PIPE, bufsize=0)
+        return proc.stdout, proc.wait
+
+    @staticmethod
+    def _read_into(stream, view: memoryview) -> int:
+        got = 0
+        while got < len(view):
+            n = stream.readinto(view[got:])
+            if not n:
+                break
+            got += n
+        return got
+
+    def _allocate(self, width: int, height: int, fmt: int) -> None:
+        if fmt not in _FORMATS:
+            raise RuntimeError(f"Unsupported screencap pixel format {fmt}")
+        self.pixel_format, bpp = _FORMATS[fmt]
+        self.width, self.height = width, height
+        # Newer Android versions append a 4-byte colour space to the header;
+        # leave room for it so the pixel data can be read straight in.
+        size = width * height * bpp + 4
+        self._buffers = [bytearray(size) for _ in range(self._buffer_count)]
+
+    def grab(self) -> Tuple[float, np.ndarray]:
+        """Capture one frame; returns (timestamp, HxWx4 array viewing an internal buffer)."""
+        start = time.perf_counter()
+        stream, finish = self._open_stream()
+        try:
+            header = bytearray(12)
+            if self._read_into(stream, memoryview(header)) < 12:
+                raise RuntimeError("screencap returned no data")
+            width, height, fmt = struct.unpack("<III", header)
+            if (width, height) != (self.width, self.height) or not self._buffers:
+                self._allocate(width, height, fmt)
+
+            buf = self._buffers[self._next_buffer]
+            self._next_buffer = (self._next_buffer + 1) % len(self._buffers)
+            got = self._read_into(stream, memoryview(buf))
+        finally:
+            stream.close()
+            finish()
+
+        pixels = width * height * 4
+        if got == pixels + 4:
+            offset = 4  # colour-space word
+        elif got == pixels:
+            offset = 0
+        else:
+            raise RuntimeError(f"Short screencap frame: {got} of {pixels} bytes")
+        frame = np.frombuffer(buf, dtype=np.uint8, count=pixels, offset=offset).reshape(height, width, 4)
+
+        now = time.time()
+        self._record(start, now)
+        return now, frame
+
+    def _record(self, start: float, now: float) -> None:
+        self.last_latency_ms = (time.perf_counter() - start) * 1000.0
+        self._latency_total_ms += self.last_latency_ms
+        self.frames_captured += 1
+        if self._first_frame_time is None:
+            self._first_frame_time = now
+        self._last_frame_time = now
+
+    def frames(self, max_fps: Optional[float] = None) -> Iterator[Tuple[float, np.ndarray]]:
+        """Yield (timestamp, frame) continuously; each frame stays valid for buffers-1 more frames."""
+        interval = 1.0 / max_fps if max_fps else 0.0
+        while True:
+            t0 = time.perf_counter()
+            yield self.grab()
+            if interval:
+                remaining = interval - (time.perf_counter() - t0)
+                if remaining > 0:
+                    time.sleep(remaining)
+
+    def _run(self, max_fps: Optional[float]) -> None:
+        for ts, frame in self.frames(max_fps):
+            with self._new_frame:
+                self._latest = (ts, frame)
+                self._new_frame.notify_all()
+            if not self._running:
+                break
+
+    def start(self, max_fps: Optional[float] = None) -> "ScreencapSource":
+        """Capture continuously in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(max_fps,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def latest(self, wait: float = 0.0, copy: bool = False) -> Optional[Tuple[float, np.ndarray]]:
+        """Most recent (timestamp, frame) from the capture thread, waiting up to `wait` seconds for one."""
+        with self._new_frame:
+            if self._latest is None and wait > 0:
+                self._new_frame.wait(wait)
+            if self._latest is None:
+                return None
+            ts, frame = self._latest
+            return (ts, frame.copy()) if copy else (ts, frame)
+
+    def screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """BGR screenshot, like iPhoneAutomation.screenshot()."""
+        latest = self.latest() if self._running else None
+        _, frame = latest if latest else self.grab()
+        if region is not None:
+            x, y, w, h = region
+            frame = frame[y:y + h, x:x + w]
+        code = cv2.COLOR_BGRA2BGR if self.pixel_format == "BGRA" else cv2.COLOR_RGBA2BGR
+        if region is None:
+            if self._bgr is None or self._bgr.shape[:2] != frame.shape[:2]:
+                self._bgr = np.empty((frame.shape[0], frame.shape[1], 3), dtype=np.uint8)
+            # Reused output buffer; callers that keep frames around should copy
+            return cv2.cvtColor(frame, code, dst=self._bgr)
+        return cv2.cvtColor(frame, code)
+
+    @property
+    def fps(self) -> float:
+        if self.frames_captured < 2 or self._first_frame_time == self._last_frame_time:
+            return 0.0
+        return (self.frames_captured - 1) / (self._last_frame_time - self._first_frame_time)
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self._latency_total_ms / self.frames_captured if self.frames_captured else 0.0
+
+    def report(self) -> str:
+        return (f"📷 {self.frames_captured} frames {self.width}x{self.height}, {self.fps:.1f} fps, "
+                f"latency {self.avg_latency_ms:.0f}ms avg / {self.last_latency_ms:.0f}ms last")
+
+
+def main() -> None:
+    # Usage: python3 screencap.py [seconds=5]
+    seconds = float(sys.argv[1]) if len(sys.argv) >= 2 else 5.0
+    serial = ensure_device()
+    source = ScreencapSource(serial)
+    end = time.time() + seconds
+    for ts, frame in source.frames():
+        if ts >= end:
+            break
+    print(source.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+import json
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from adb_transport import ShellSession, ensure_device, get_session
+from gestures import Gesture, Sample
+from record_touch import find_touch_device, get_screen_size, unscale
+
+
+# Linux input event types and codes (linux/input-event-codes.h)
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0x00
+BTN_TOUCH = 0x14a
+ABS_MT_SLOT = 0x2f
+ABS_MT_TOUCH_MAJOR = 0x30
+ABS_MT_POSITION_X = 0x35
+ABS_MT_POSITION_Y = 0x36
+ABS_MT_TRACKING_ID = 0x39
+ABS_MT_PRESSURE = 0x3a
+
+Event = Tuple[int, int, int]  # (type, code, value)
+Frame = Tuple[float, List[Event]]  # (t_ms, events ending in SYN_REPORT)
+
+
+class TouchInjector:
+    """
+    Playback backend that writes multitouch events straight to the
+    touchscreen's /dev/input/eventN, the device record_touch reads from.
+
+    Screen coordinates are converted back to raw ABS_MT units with unscale().
+    A gesture is compiled into frames (tracking id, position, BTN_TOUCH and
+    SYN_REPORT) and sent as one shell script, either as `sendevent` calls or,
+    in raw mode, as packed input_event structs written with one printf per
+    frame. Neither path starts the Java `input` tool.
+    """
+
+    def __init__(self, dev: str, max_x: int, max_y: int, width: int, height: int,
+                 session: Optional[ShellSession] = None, raw: bool = False, event_size: int = 24):
+        self.dev = dev
+        self.max_x = max_x
+        self.max_y = max_y
+        self.width = width
+        self.height = height
+        self.session = session
+        self.raw = raw
+        # struct input_event is 24 bytes on 64-bit kernels, 16 bytes on 32-bit
+        self.event_size = event_size
+        self._tracking_id = 0
+
+    @classmethod
+    def discover(cls, session: Optional[ShellSession] = None, raw: bool = False) -> "TouchInjector":
+        """Find the touchscreen and screen size on the connected device."""
+        w, h = get_screen_size()
+        dev, max_x, max_y = find_touch_device()
+        if not dev:
+            raise RuntimeError("No touchscreen exposing ABS_MT_POSITION_X/Y was found")
+        session = session or get_session()
+        abi = session.run("getprop ro.product.cpu.abi").strip()
+        event_size = 24 if "64" in abi else 16
+        return cls(dev, max_x, max_y, w, h, session=session, raw=raw, event_size=event_size)
+
+    def _raw_xy(self, x: int, y: int) -> Tuple[int, int]:
+        return unscale(x, y, self.max_x, self.max_y, self.width, self.height)
+
+    def _next_tracking_id(self) -> int:
+        self._tracking_id = (self._tracking_id + 1) % 0xffff
+        return self._tracking_id
+
+    def frames(self, samples: Sequence[Sample]) -> List[Frame]:
+        """Build down / move / up frames for one contact from (t_ms, x, y) samples."""
+        frames: List[Frame] = []
+        last_xy = None
+        for i, (t, x, y) in enumerate(samples):
+            rx, ry = self._raw_xy(x, y)
+            if i == 0:
+                events = [
+                    (EV_ABS, ABS_MT_SLOT, 0),
+                    (EV_ABS, ABS_MT_TRACKING_ID, self._next_tracking_id()),
+                    (EV_ABS, ABS_MT_POSITION_X, rx),
+                    (EV_ABS, ABS_MT_POSITION_Y, ry),
+                    (EV_ABS, ABS_MT_TOUCH_MAJOR, 5),
+                    (EV_ABS, ABS_MT_PRESSURE, 50),
+                    (EV_KEY, BTN_TOUCH, 1),
+                ]
+            else:
+                events = []
+                if last_xy is None or rx != last_xy[0]:
+                    events.append((EV_ABS, ABS_MT_POSITION_X, rx))
+                if last_xy is None or ry != last_xy[1]:
+                    events.append((EV_ABS, ABS_MT_POSITION_Y, ry))
+            if i == len(samples) - 1 and i > 0:
+                events += [
+                    (EV_ABS, ABS_MT_TRACKING_ID, -1),
+                    (EV_KEY, BTN_TOUCH, 0),
+                ]
+            if not events:
+                continue
+            events.append((EV_SYN, SYN_REPORT, 0))
+            frames.append((t, events))
+            last_xy = (rx, ry)
+        return frames
+
+    def _pack(self, events: List[Event]) -> bytes:
+        fmt = "<qqHHi" if self.event_size == 24 else "<iiHHi"
+        return b"".join(struct.pack(fmt, 0, 0, etype, code, value) for etype, code, value in events)
+
+    def _frame_commands(self, events: List[Event]) -> List[str]:
+        if self.raw:
+            escaped = "".join(f"\\{b:03o}" for b in self._pack(events))
+            return [f"printf '{escaped}' > {self.dev}"]
+        return [f"sendevent {self.dev} {etype} {code} {value}" for etype, code, value in events]
+
+    def compile(self, samples: Sequence[Sample]) -> str:
+        """One shell script that replays every frame with on-device sleeps."""
+        lines: List[str] = []
+        last_t = None
+        for t, events in self.frames(samples):
+            if last_t is not None and t - last_t >= 1:
+                lines.append(f"sleep {(t - last_t) / 1000.0:.3f}")
+            lines.extend(self._frame_commands(events))
+            last_t = t
+        return "\n".join(lines)
+
+    def play(self, samples: Sequence[Sample]) -> float:
+        """Send the compiled batch in one round trip; returns elapsed milliseconds."""
+        session = self.session or get_session()
+        start = time.perf_counter()
+        session.run(self.compile(samples))
+        return (time.perf_counter() - start) * 1000.0
+
+    def tap(self, x: int, y: int, hold_ms: int = 50) -> float:
+        return self.play([(0.0, x, y), (float(hold_ms), x, y)])
+
+    def gesture(self, gesture: Gesture, steps: Optional[int] = None) -> float:
+        # Direct events are cheap, so default to roughly one frame per 16 ms
+        steps = steps or max(2, gesture.duration_ms // 16)
+        return self.play(gesture.samples(steps))
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration_ms: int = 300) -> float:
+        return self.gesture(Gesture([(x1, y1), (x2, y2)], duration_ms=duration_ms))
+
+
+def replay_recording(data: Dict[str, Any], injector: TouchInjector) -> None:
+    """Replay a record_touch session at its recorded speed."""
+    actions = data.get("actions", [])
+    print(f"▶️ Replaying {len(actions)} actions via {injector.dev}")
+    for i, a in enumerate(actions, 1):
+        # "delay" runs from the previous release to this release, so the
+        # contact itself has to start duration_ms earlier than that
+        duration_ms = a.get("duration_ms", 50)
+        wait = a.get("delay", 0) - duration_ms / 1000.0
+        if wait > 0:
+            time.sleep(wait)
+        if a["type"] == "tap":
+            injector.tap(a["x"], a["y"], hold_ms=duration_ms)
+            print(f"  {i}/{len(actions)}: tap ({a['x']}, {a['y']})")
+        elif a["type"] == "swipe":
+            injector.swipe(a["x1"], a["y1"], a["x2"], a["y2"], duration_ms=duration_ms)
+            print(f"  {i}/{len(actions)}: swipe ({a['x1']}, {a['y1']}) -> ({a['x2']}, {a['y2']}) {duration_ms}ms")
+    print("✅ Replay completed")
+
+
+def main() -> None:
+    # Usage: python3 sendevent_backend.py recordings/android_session_<ts>.json [--raw]
+    if len(sys.argv) < 2:
+        print("Usage: python3 sendevent_backend.py <recording.json> [--raw]")
+        sys.exit(1)
+    with open(sys.argv[1], "r") as f:
+        data = json.load(f)
+
+    ensure_device()
+    injector = TouchInjector.discover(raw="--raw" in sys.argv[2:])
+    print(f"Using touch device: {injector.dev} (maxX={injector.max_x}, maxY={injector.max_y}), "
+          f"screen={injector.width}x{injector.height}, {'raw writes' if injector.raw else 'sendevent'}")
+    replay_recording(data, injector)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,19 @@
 #!/usr/bin/env python3
 
-import subprocess
 import sys
 import re
-import time
 from typing import Tuple
 
+from adb_transport import ensure_device, get_session
+from gestures import Gesture, run_gesture
 
-def adb(*args: str) -> subprocess.CompletedProcess:
-    return subprocess.run(["adb", *args], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=True)
 
-
-def ensure_device() -> None:
-    out = adb("devices").stdout.strip().splitlines()
-    lines = [ln for ln in out if "\t" in ln]
-    if not lines:
-        print("No devices attached. Connect your Android and run again.")
-        sys.exit(1)
-    status = lines[0].split("\t", 1)[1]
-    if status != "device":
-        print(f"Device status is '{status}'. Authorize device and retry.")
-        sys.exit(1)
+def shell(*args: str) -> str:
+    return get_session().call(*args)
 
 
 def screen_size() -> Tuple[int, int]:
-    out = adb("shell", "wm", "size").stdout
+    out = shell("wm", "size")
     m = re.search(r"(\d+)x(\d+)", out)
     if not m:
         print("Could not determine screen size")
@@ -34,7 +23,7 @@ def screen_size() -> Tuple[int, int]:
 
 def motionevent(action: str, x: int, y: int) -> None:
     # Actions: DOWN, MOVE, UP
-    adb("shell", "input", "motionevent", action.upper(), str(x), str(y))
+    shell("input", "motionevent", action.upper(), str(x), str(y))
 
 
 def swipe_motionevent(y: int, duration_ms: int = 450, start_ratio: float = 0.9, end_ratio: float = 0.1, steps: int = 16) -> None:
@@ -42,18 +31,13 @@ def swipe_motionevent(y: int, duration_ms: int = 450, start_ratio: float = 0.9,
     y = max(1, min(h - 2, y))
     x1 = int(w * start_ratio)
     x2 = int(w * end_ratio)
-    dt = max(1, duration_ms // max(1, steps)) / 1000.0
 
     print(f"motionevent swipe: ({x1},{y}) -> ({x2},{y}) in ~{duration_ms}ms, steps={steps}")
 
-    # Press, move in steps, release
-    motionevent("DOWN", x1, y)
-    time.sleep(0.04)
-    for i in range(1, steps):
-        x = x1 + (x2 - x1) * i // steps
-        motionevent("MOVE", int(x), y)
-        time.sleep(dt)
-    motionevent("UP", x2, y)
+    # Press, move in steps, release - sent as one compiled on-device script
+    gesture = Gesture([(x1, y), (x2, y)], duration_ms=duration_ms, hold_ms=40)
+    elapsed_ms = run_gesture(gesture, steps=steps)
+    print(f"swipe took {elapsed_ms:.0f}ms (target {duration_ms}ms)")
 
 
 def main() -> None:
@@ -3,27 +3,22 @@
 import sys
 import os
 import json
-import time
-import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+import asyncio
+import hashlib
 import subprocess
+from collections import deque
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from batch_processor import BatchProcessor
+from job_scheduler import JobScheduler, JobCancelled, QueueFull, DuplicateJob
+from progress_journal import IMAGE_STEPS, RESUME_ANY, get_journal
 
-class AutomationHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        if self.path == '/':
-            # Serve the HTML page
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
-            with open('automation_launcher.html', 'r') as f:
-                content = f.read()
-                # Add JavaScript to communicate with server
-                content = content.replace('</head>', '''
+# Exclusive lease names: every iPhone action drives the same mirrored window
+IPHONE = 'iphone'
+ANDROID = 'android'
+
+# Added to automation_launcher.html so its buttons call the server
+LAUNCHER_SCRIPT = '''
                 <script>
                     async function executeAutomation(action, params = {}) {
                         try {
@@ -33,7 +28,7 @@ class AutomationHandler(BaseHTTPRequestHandler):
                                 body: JSON.stringify({action: action, params: params})
                             });
                             const result = await response.json();
-                            log(`🔥 ${result.message}`);
+                            log(`${result.success ? '🔥' : '⚠️'} ${result.message}`);
                             return result;
                         } catch (error) {
                             log(`❌ Error: ${error.message}`);
@@ -72,173 +67,400 @@ class AutomationHandler(BaseHTTPRequestHandler):
                         log(`⏹️ Stopping automation`);
                         executeAutomation('stop');
                     }
+                    
+                    // Live progress from the server (Server-Sent Events)
+                    const progress = new EventSource('/events');
+                    progress.addEventListener('step', (e) => {
+                        const d = JSON.parse(e.data);
+                        const image = d.image ? ` Image #${d.image}` : '';
+                        log(`${d.success ? '✅' : '❌'}${image} ${d.step} (${d.duration.toFixed(1)}s)`);
+                    });
+                    progress.addEventListener('progress', (e) => {
+                        const d = JSON.parse(e.data);
+                        log(`📊 ${d.job}: ${d.message}`);
+                    });
+                    progress.addEventListener('job', (e) => {
+                        const d = JSON.parse(e.data);
+                        log(`📋 ${d.job} ${d.kind}: ${d.state}`);
+                    });
                 </script>
-                </head>''')
-                
-            self.wfile.write(content.encode())
-            
-        elif self.path == '/status':
-            # Return current status
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            status = {'running': hasattr(self.server, 'current_task') and self.server.current_task is not None}
-            self.wfile.write(json.dumps(status).encode())
-            
-    def do_POST(self):
-        if self.path == '/execute':
-            content_length = int(self.headers['Content-Length'])
-            post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode())
-            
-            action = data['action']
-            params = data.get('params', {})
-            
-            # Execute automation in background thread
-            thread = threading.Thread(target=self.execute_automation, args=(action, params))
-            thread.daemon = True
-            thread.start()
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            response = {'success': True, 'message': f'Started {action} automation'}
-            self.wfile.write(json.dumps(response).encode())
+                '''
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+               409: 'Conflict', 429: 'Too Many Requests'}
+
+
+class PageCache:
+    """The launcher page with its script injected, rendered once and re-rendered only when the file changes."""
+    
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        self.body = b''
+        self.etag = ''
+        self.renders = 0
+    
+    def get(self):
+        mtime = os.path.getmtime(self.path)
+        if mtime != self.mtime:
+            with open(self.path, 'r') as f:
+                content = f.read()
+            self.body = content.replace('</head>', LAUNCHER_SCRIPT + '</head>', 1).encode()
+            self.etag = '"%s"' % hashlib.sha1(self.body).hexdigest()[:16]
+            self.mtime = mtime
+            self.renders += 1
+        return self.body, self.etag
+
+
+class EventHub:
+    """
+    Fans job events out to any number of SSE clients.
     
-    def execute_automation(self, action, params):
-        """Execute the automation in a background thread."""
+    publish() is called on scheduler worker threads and only schedules the
+    broadcast onto the event loop, so the automation never waits on a
+    browser. Each client has a bounded queue; a client that falls behind
+    loses its oldest events instead of holding up the others. Recent events
+    are kept so a reconnecting browser (Last-Event-ID) catches up.
+    """
+    
+    def __init__(self, loop, history=200, client_queue=100):
+        self.loop = loop
+        self.history = deque(maxlen=history)
+        self.client_queue = client_queue
+        self.clients = set()
+        self.next_id = 1
+        self.published = 0
+        self.dropped = 0
+    
+    def publish(self, job, event):
+        """Scheduler listener; safe to call from any thread."""
+        self.loop.call_soon_threadsafe(self._broadcast, event)
+    
+    def _broadcast(self, event):
+        item = (self.next_id, event['type'], json.dumps(event))
+        self.next_id += 1
+        self.published += 1
+        self.history.append(item)
+        for queue in self.clients:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(item)
+    
+    def subscribe(self, last_id=0):
+        queue = asyncio.Queue(self.client_queue)
+        for item in self.history:
+            if item[0] > last_id and not queue.full():
+                queue.put_nowait(item)
+        self.clients.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue):
+        self.clients.discard(queue)
+
+
+class AutomationServer:
+    def __init__(self, port=8080, resume=False):
+        self.port = port
+        # resume: image jobs pick up where a previous (crashed) server left them
+        if resume:
+            get_journal(resume_window=RESUME_ANY)
+        self.server = None
+        # One worker per device lease plus one for lease-free jobs (stop), so
+        # stop never waits; a second click for a busy device queues behind it
+        self.scheduler = JobScheduler(workers=3, max_queue=8, dedupe='merge')
+        self.processor = None
+        self.page = PageCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'automation_launcher.html'))
+        self.hub = None
+        
+        self.actions = {
+            'start_from_image': (IPHONE, self.job_start_from_image),
+            'start_custom': (IPHONE, self.job_start_from_image),
+            'process_all_16': (IPHONE, self.job_process_all_16),
+            'test_single': (IPHONE, self.job_test_single),
+            'reset_state': (IPHONE, self.job_reset_state),
+            'run_gallery_loop': (ANDROID, self.job_run_gallery_loop),
+            'stop': (None, self.job_stop),
+        }
+    
+    def submit(self, action, params):
+        """Queue an action as a job. Returns (HTTP status, response body)."""
+        if action not in self.actions:
+            return 400, {'success': False, 'message': f'Unknown action: {action}'}
+        device, fn = self.actions[action]
+        # Identical requests while one is queued or running collapse into it
+        key = None if action == 'stop' else f"{action}:{json.dumps(params, sort_keys=True)}"
         try:
-            processor = BatchProcessor()
-            
-            if action == 'start_from_image':
-                start_img = params['start']
-                count = params['count']
-                print(f"🚀 Starting automation from Image #{start_img}, processing {count} images")
-                
-                for i in range(start_img, min(start_img + count, 17)):
-                    self.process_single_image(processor, i)
-                    
-            elif action == 'start_custom':
-                start_img = params['start']
-                count = params['count']
-                print(f"🎯 Custom automation: {count} images starting from #{start_img}")
-                
-                for i in range(start_img, min(start_img + count, 17)):
-                    self.process_single_image(processor, i)
-                    
-            elif action == 'process_all_16':
-                print("🌟 Starting full 16-image automation")
-                for i in range(1, 17):
-                    self.process_single_image(processor, i)
-                    
-            elif action == 'test_single':
-                print("🧪 Testing single image automation")
-                processor.navigator.reset_state()
-                processor.navigator.navigate_to_gallery()
-                time.sleep(1.5)
-                processor.navigator.select_next_image()
-                time.sleep(1.5)
-                processor.run_core_workflow()
-                
-            elif action == 'reset_state':
-                print("🔄 Resetting to Image #1")
-                processor.navigator.reset_state()
-                
-            elif action == 'stop':
-                print("⏹️ Stopping automation")
-                # Set stop flag if needed
-            elif action == 'run_gallery_loop':
-                # Run android/gallery_loop.py starting at provided index, only 1 loop
-                start_img = int(params.get('start', 1))
-                # Enable optional end path by setting environment var for this subprocess
-                cmd = [
-                    sys.executable,
-                    os.path.join(os.path.dirname(__file__), 'android', 'gallery_loop.py'),
-                    str(start_img),
-                    '1',  # count=1
-                ]
-                print(f"📸 Running gallery_loop.py start={start_img} count=1 (optional ending TRUE)")
-                # Launch subprocess detached so server stays responsive
-                subprocess.Popen(cmd)
-                
-        except Exception as e:
-            print(f"❌ Automation error: {e}")
+            job = self.scheduler.submit(action, lambda ctx: fn(ctx, params), params, device=device, key=key)
+        except QueueFull as e:
+            return 429, {'success': False, 'message': f'Queue full: {e}'}
+        except DuplicateJob as e:
+            return 409, {'success': False, 'message': str(e), 'job': e.job.to_dict()}
+        
+        if job.merged:
+            message = f'{action} is already {job.state} as {job.id}'
+        else:
+            message = f'Queued {action} automation as {job.id}'
+        return 200, {'success': True, 'message': message, 'job': job.to_dict()}
     
-    def process_single_image(self, processor, image_num):
-        """Process a single image with robust error handling."""
+    def get_processor(self, ctx):
+        """The shared BatchProcessor (created once); its automation stops when the job is cancelled."""
+        if self.processor is None:
+            self.processor = BatchProcessor()
+        self.processor.navigator.automation.cancel_event.clear()
+        ctx.link(self.processor.navigator.automation.cancel_event)
+        return self.processor
+    
+    # Jobs: run on scheduler workers, checking for cancellation between steps
+    def job_start_from_image(self, ctx, params):
+        start_img = int(params['start'])
+        count = int(params['count'])
+        print(f"🚀 Starting automation from Image #{start_img}, processing {count} images")
+        return self.process_images(ctx, range(start_img, min(start_img + count, 17)))
+    
+    def job_process_all_16(self, ctx, params):
+        print("🌟 Starting full 16-image automation")
+        return self.process_images(ctx, range(1, 17))
+    
+    def process_images(self, ctx, image_nums):
+        processor = self.get_processor(ctx)
+        image_nums = list(image_nums)
+        failures = 0
+        for done, i in enumerate(image_nums):
+            ctx.check()
+            ctx.report(f"Image #{i} ({done + 1}/{len(image_nums)})", done / len(image_nums))
+            if not self.process_single_image(ctx, processor, i):
+                failures += 1
+        ctx.report(f"Processed {len(image_nums) - failures}/{len(image_nums)} images", 1.0)
+        return failures == 0
+    
+    def job_test_single(self, ctx, params):
+        print("🧪 Testing single image automation")
+        processor = self.get_processor(ctx)
+        processor.navigator.reset_state()
+        ctx.run_step('navigate_to_gallery', processor.navigator.navigate_to_gallery, image=1)
+        ctx.sleep(1.5)
+        ctx.run_step('select_image', processor.navigator.select_next_image, image=1)
+        ctx.sleep(1.5)
+        return ctx.run_step('core_workflow', processor.run_core_workflow, image=1)
+    
+    def job_reset_state(self, ctx, params):
+        print("🔄 Resetting to Image #1")
+        self.get_processor(ctx).navigator.reset_state()
+        return True
+    
+    def job_stop(self, ctx, params):
+        print("⏹️ Stopping automation")
+        cancelled = self.scheduler.cancel_all(exclude=ctx.job.id)
+        ctx.report(f"Cancelled {len(cancelled)} job(s)")
+        return True
+    
+    def job_run_gallery_loop(self, ctx, params):
+        # Run android/gallery_loop.py starting at provided index, only 1 loop
+        start_img = int(params.get('start', 1))
+        cmd = [
+            sys.executable,
+            os.path.join(os.path.dirname(__file__), 'android', 'gallery_loop.py'),
+            str(start_img),
+            '1',  # count=1
+        ]
+        print(f"📸 Running gallery_loop.py start={start_img} count=1 (optional ending TRUE)")
+        # The job holds the android lease until the subprocess exits (or is cancelled)
+        proc = subprocess.Popen(cmd)
+        try:
+            while proc.poll() is None:
+                ctx.sleep(0.5)
+        except JobCancelled:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            raise
+        return proc.returncode == 0
+    
+    def process_single_image(self, ctx, processor, image_num):
+        """Process a single image, resuming at the step where its last attempt stopped."""
         print(f"\n🎯 Processing Image #{image_num}")
+        navigator = processor.navigator
+        journal = navigator.journal
+        steps = {
+            'navigate_to_gallery': ("📂 Navigating to gallery...", navigator.navigate_to_gallery),
+            'select_image': (f"🖱️  Selecting Image #{image_num}...", navigator.select_next_image),
+            'core_workflow': (f"⚙️  Running workflow for Image #{image_num}...", processor.run_core_workflow),
+        }
         
         try:
-            # Calculate position
-            row = (image_num - 1) // 4
-            col = (image_num - 1) % 4
-            
             # Set position
-            processor.navigator.save_state(row, col)
+            row, col = navigator.set_image(image_num)
             print(f"📍 Set position: Row {row + 1}, Column {col + 1}")
             
-            # Navigate to gallery
-            print("📂 Navigating to gallery...")
-            if not processor.navigator.navigate_to_gallery():
-                print(f"❌ Failed to navigate to gallery for Image #{image_num}")
-                return False
-            time.sleep(1.5)
-            
-            # Select image
-            print(f"🖱️  Selecting Image #{image_num}...")
-            if not processor.navigator.select_next_image():
-                print(f"❌ Failed to select Image #{image_num}")
-                return False
-            time.sleep(1.5)
-            
-            # Run workflow
-            print(f"⚙️  Running workflow for Image #{image_num}...")
-            if not processor.run_core_workflow():
-                print(f"❌ Workflow failed for Image #{image_num}")
-                return False
+            start = journal.resume_step(image_num)
+            if start:
+                print(f"↩️  Resuming Image #{image_num} at {IMAGE_STEPS[start]} (where its last attempt stopped)")
+            for step in IMAGE_STEPS[start:]:
+                message, fn = steps[step]
+                print(message)
+                if not ctx.run_step(step, journal.run, image_num, step, fn, image=image_num):
+                    print(f"❌ {step} failed for Image #{image_num}")
+                    return False
+                if step != IMAGE_STEPS[-1]:
+                    ctx.sleep(1.5)
             
             print(f"✅ Image #{image_num} completed successfully!")
-            time.sleep(2)  # Brief pause between images
+            ctx.sleep(2)  # Brief pause between images
             return True
             
+        except JobCancelled:
+            raise
         except Exception as e:
+            ctx.check()
             print(f"❌ Error processing Image #{image_num}: {e}")
             return False
+        
+    # HTTP (asyncio): every connection is a coroutine, so SSE streams and
+    # status polls never wait on each other or on a running job
+    async def handle_connection(self, reader, writer):
+        try:
+            request = await self.read_request(reader)
+            if request is not None:
+                await self.route(writer, *request)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"❌ Request error: {e}")
+        finally:
+            writer.close()
     
-    def log_message(self, format, *args):
-        # Suppress default HTTP server logs
-        pass
-
-class AutomationServer:
-    def __init__(self, port=8080):
-        self.port = port
-        self.server = None
+    async def read_request(self, reader):
+        """(method, path, headers, body) for one HTTP/1.1 request, or None if the client went away."""
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split()
+        if len(parts) < 2:
+            return None
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0) or 0)
+        body = await reader.readexactly(length) if length else b''
+        return parts[0].upper(), parts[1], headers, body
+    
+    async def send(self, writer, code, body, content_type='application/json', extra_headers=None):
+        headers = [f"HTTP/1.1 {code} {STATUS_TEXT.get(code, '')}",
+                   f"Content-Type: {content_type}",
+                   f"Content-Length: {len(body)}",
+                   "Connection: close"]
+        headers += [f"{k}: {v}" for k, v in (extra_headers or {}).items()]
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+    
+    async def send_json(self, writer, code, payload):
+        await self.send(writer, code, json.dumps(payload).encode())
+    
+    async def route(self, writer, method, path, headers, body):
+        if method == 'GET' and path == '/':
+            page, etag = self.page.get()
+            if headers.get('if-none-match') == etag:
+                await self.send(writer, 304, b'', 'text/html', {'ETag': etag})
+            else:
+                await self.send(writer, 200, page, 'text/html', {'ETag': etag})
+        
+        elif method == 'GET' and path == '/events':
+            await self.stream_events(writer, headers)
+        
+        elif method == 'GET' and path == '/status':
+            status = self.scheduler.status()
+            status['running_jobs'] = status['running']
+            status['running'] = bool(status['running'])
+            status['jobs'] = [job.to_dict() for job in self.scheduler.jobs()]
+            status['viewers'] = len(self.hub.clients)
+            await self.send_json(writer, 200, status)
+        
+        elif method == 'GET' and path.startswith('/jobs/'):
+            job = self.scheduler.get(path[len('/jobs/'):])
+            if job is None:
+                await self.send_json(writer, 404, {'success': False, 'message': 'Unknown job'})
+            else:
+                await self.send_json(writer, 200, job.to_dict())
+        
+        elif method == 'POST' and path == '/execute':
+            try:
+                data = json.loads(body.decode())
+                action = data['action']
+                params = data.get('params', {})
+            except (ValueError, KeyError, TypeError):
+                await self.send_json(writer, 400, {'success': False, 'message': 'Expected {"action": ..., "params": {...}}'})
+                return
+            # Submitting only takes the scheduler's lock briefly, never waits on a job
+            code, response = self.submit(action, params)
+            await self.send_json(writer, code, response)
         
+        elif method == 'POST' and path.startswith('/jobs/') and path.endswith('/cancel'):
+            job = self.scheduler.cancel(path[len('/jobs/'):-len('/cancel')])
+            if job is None:
+                await self.send_json(writer, 404, {'success': False, 'message': 'Unknown job'})
+            else:
+                await self.send_json(writer, 200, {'success': True, 'message': f'{job.id}: {job.message}',
+                                                   'job': job.to_dict()})
+        
+        else:
+            await self.send_json(writer, 404, {'success': False, 'message': f'Not found: {method} {path}'})
+    
+    async def stream_events(self, writer, headers):
+        """Server-Sent Events: one 'job' / 'progress' / 'step' event per scheduler event."""
+        try:
+            last_id = int(headers.get('last-event-id', 0))
+        except ValueError:
+            last_id = 0
+        queue = self.hub.subscribe(last_id)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\nretry: 2000\n\n")
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    event_id, kind, data = await asyncio.wait_for(queue.get(), timeout=15)
+                    writer.write(f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n".encode())
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                await writer.drain()
+        finally:
+            self.hub.unsubscribe(queue)
+    
+    async def serve(self):
+        self.hub = EventHub(asyncio.get_running_loop())
+        self.scheduler.add_listener(self.hub.publish)
+        self.server = await asyncio.start_server(self.handle_connection, 'localhost', self.port)
+        print(f"🚀 Automation Server Started!")
+        print(f"📱 Open your browser to: http://localhost:{self.port}")
+        print(f"🎯 Click buttons on the webpage to run automation!")
+        print(f"⏹️  Press Ctrl+C to stop the server")
+        async with self.server:
+            await self.server.serve_forever()
+    
     def start(self):
         """Start the automation server."""
         try:
-            self.server = HTTPServer(('localhost', self.port), AutomationHandler)
-            print(f"🚀 Automation Server Started!")
-            print(f"📱 Open your browser to: http://localhost:{self.port}")
-            print(f"🎯 Click buttons on the webpage to run automation!")
-            print(f"⏹️  Press Ctrl+C to stop the server")
-            
-            self.server.serve_forever()
-            
+            asyncio.run(self.serve())
         except KeyboardInterrupt:
             print("\n⏹️  Server stopped by user")
         except Exception as e:
             print(f"❌ Server error: {e}")
         finally:
-            if self.server:
-                self.server.server_close()
+            self.scheduler.shutdown(cancel=True, wait=False)
 
 def main():
     print("🤖 Liene Photo HD Automation Server")
     print("=" * 40)
     
-    server = AutomationServer()
+    # --resume: continue images from the steps a crashed run's journal recorded
+    resume = "--resume" in sys.argv[1:]
+    if resume:
+        print("↩️  Resuming images from the previous run's journal")
+    server = AutomationServer(resume=resume)
     server.start()
 
 if __name__ == "__main__":
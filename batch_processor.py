@@ -8,6 +8,7 @@ import json
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from gallery_navigator import GalleryNavigator
+from workflow_loader import load_workflow, measure_subprocess_overhead
 
 class BatchProcessor:
     def __init__(self):
@@ -15,9 +16,20 @@ class BatchProcessor:
         self.core_script = "recordings/liene_workflow_20250808_044610.py"
         self.max_images = 20  # Default maximum images to process
         self.delay_between_cycles = 1.2  # Seconds to wait between cycles (slowed 20% for stability)
+        self.workflow_timeout = 120
+        
+        # Run the core workflow inside this process, on the navigator's focused
+        # automation, instead of starting a new interpreter for every image
+        self.in_process = True
+        self.workflow = None
+        self.subprocess_overhead = None  # Measured once, for the time-saved report
+        self.overheads = []
         
     def run_core_workflow(self):
-        """Run the core workflow script."""
+        """Run the core workflow (in-process by default, as a subprocess otherwise)."""
+        if self.in_process:
+            return self.run_core_workflow_in_process()
+        
         print("🔄 Running core workflow...")
         try:
             result = subprocess.run([
@@ -38,6 +50,38 @@ class BatchProcessor:
             print(f"❌ Error running core workflow: {e}")
             return False
     
+    def run_core_workflow_in_process(self):
+        """Run the core workflow against the already-focused automation instance."""
+        print("🔄 Running core workflow (in-process)...")
+        try:
+            if self.workflow is None or self.workflow.path != self.core_script:
+                self.workflow = load_workflow(self.core_script)
+            success = self.workflow.run(self.navigator.automation, timeout=self.workflow_timeout)
+            self.overheads.append(self.workflow.last_overhead)
+            
+            if success:
+                print("✅ Core workflow completed successfully")
+            else:
+                print("❌ Core workflow failed")
+            return success
+            
+        except Exception as e:
+            print(f"❌ Error running core workflow: {e}")
+            return False
+    
+    def report_time_saved(self):
+        """Per-cycle startup time saved by running the workflow in-process."""
+        if not self.overheads:
+            return
+        if self.subprocess_overhead is None:
+            print("⏱️  Measuring subprocess startup cost for comparison...")
+            self.subprocess_overhead = measure_subprocess_overhead()
+        in_process = sum(self.overheads) / len(self.overheads)
+        saved = self.subprocess_overhead - in_process
+        print(f"⚡ In-process workflow: {in_process:.2f}s setup per cycle vs {self.subprocess_overhead:.2f}s "
+              f"for a subprocess → ~{saved:.2f}s saved per cycle, ~{saved * len(self.overheads):.1f}s "
+              f"over {len(self.overheads)} cycles")
+    
     def setup_initial_state(self, reset_position=True):
         """Setup the initial state for batch processing."""
         print("🚀 Setting up batch processing...")
@@ -66,22 +110,24 @@ class BatchProcessor:
         # Step 0: Ensure we're at the gallery (except for first cycle)
         if cycle_num > 1:
             print(f"🔄 Step 0: Ensuring we're back at gallery for cycle {cycle_num}...")
+            before = self.navigator.waiter.snapshot()
             if not self.navigator.navigate_to_gallery():
                 print("❌ Failed to navigate back to gallery")
                 return False
             print("✅ Back at gallery - ready for next image selection")
-            time.sleep(1.0)  # Extra wait to ensure gallery is loaded
+            self.navigator.waiter.settle("GALLERY_LOADED", 1.0, before)  # Extra wait to ensure gallery is loaded
         
         # Step 1: Select next image from gallery
         print(f"📸 Step 1: Selecting next image from gallery...")
         print(f"🔍 Looking for next image in sequence...")
+        before = self.navigator.waiter.snapshot()
         if not self.navigator.select_next_image():
             print("❌ Failed to select image")
             return False
         
         # Wait for UI to respond
-        print(f"⏳ Waiting {self.delay_between_cycles}s for UI response between steps...")
-        time.sleep(self.delay_between_cycles)
+        print(f"⏳ Waiting up to {self.delay_between_cycles}s for UI response between steps...")
+        self.navigator.waiter.settle("AFTER_IMAGE_SELECT", self.delay_between_cycles, before)
         
         # Step 2: Run core workflow
         print(f"⚙️  Step 2: Running core workflow on selected image...")
@@ -95,7 +141,9 @@ class BatchProcessor:
         
         # Step 3: Verify we're ready for next cycle
         print(f"🔍 Step 3: Preparing for next cycle...")
-        time.sleep(self.delay_between_cycles)
+        # The workflow's own last transition may not have started yet: keep half the old delay
+        self.navigator.waiter.hold("BEFORE_NEXT_CYCLE", self.delay_between_cycles,
+                                   minimum=self.delay_between_cycles / 2)
         
         print(f"✅ Cycle {cycle_num} completed successfully!")
         print(f"⏰ Cycle end time: {time.strftime('%H:%M:%S')}")
@@ -151,6 +199,8 @@ class BatchProcessor:
             print(f"📈 Success rate: {successful_cycles/total_cycles*100:.1f}%")
         else:
             print("📈 Success rate: N/A (no cycles completed)")
+        print(self.navigator.waiter.report())
+        self.report_time_saved()
         
         return successful_cycles > 0
     
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from template_cache import TemplateRegistry
+
+
+MARKS = {'same': '✅', 'tie': '🟰', 'miss': '❌'}
+
+
+def original_find(frame: np.ndarray, template_path: str, confidence: float) -> Optional[Tuple[int, int]]:
+    """find_element as it was: decode the template and scan the whole frame every call."""
+    template = cv2.imread(template_path)
+    result = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    if max_val >= confidence:
+        return max_loc[0] + template.shape[1] // 2, max_loc[1] + template.shape[0] // 2
+    return None
+
+
+def full_scores(frame: np.ndarray, template_path: str) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """Full-resolution score map of a template and the template's (width, height)."""
+    template = cv2.imread(template_path)
+    return cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED), (template.shape[1], template.shape[0])
+
+
+def compare(frame: np.ndarray, template_path: str, base: Optional[Tuple[int, int]],
+            found: Optional[Tuple[int, int, float]], tie: float = 0.01) -> str:
+    """
+    'same' if a fast path found what the full scan did, 'tie' if it found a
+    different spot that the full scan scores within `tie` of its best (a
+    repeated element), otherwise 'miss'.
+    """
+    if (found[:2] if found else None) == base:
+        return 'same'
+    if base is None or found is None:
+        return 'miss'
+    scores, (w, h) = full_scores(frame, template_path)
+    x, y = found[0] - w // 2, found[1] - h // 2
+    return 'tie' if scores[y, x] >= float(scores.max()) - tie else 'miss'
+
+
+def variants(patch: np.ndarray, seed: int) -> List[Tuple[str, np.ndarray]]:
+    """
+    The patch as another capture might show it: rescaled by a few percent,
+    or brighter with sensor-like noise. Unlike the exact patch these do not
+    match at 1.0, so they show whether the fast paths still find a real,
+    slightly different element where the full scan does.
+    """
+    h, w = patch.shape[:2]
+    rescaled = cv2.resize(patch, (round(w * 0.95), round(h * 0.95)), interpolation=cv2.INTER_AREA)
+    noise = np.random.default_rng(seed).normal(12.0, 8.0, patch.shape)
+    noisy = np.clip(patch.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    return [("rescaled", rescaled), ("noisy", noisy)]
+
+
+def cut_templates(frame: np.ndarray, count: int, size: Tuple[int, int],
+                  out_dir: str) -> List[Tuple[str, str]]:
+    """
+    Cut `count` well-textured patches out of a screenshot to use as templates.
+
+    Returns:
+        [(kind, path), ...]: each exact patch followed by its variants()
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    w, h = size
+    candidates = []
+    for y in range(0, gray.shape[0] - h, h):
+        for x in range(0, gray.shape[1] - w, w):
+            candidates.append((float(gray[y:y + h, x:x + w].std()), x, y))
+    candidates.sort(reverse=True)
+
+    paths = []
+    step = max(1, len(candidates) // (count * 2))
+    for _, x, y in candidates[::step][:count]:
+        patch = frame[y:y + h, x:x + w]
+        for kind, image in [("exact", patch)] + variants(patch, seed=x * 10007 + y):
+            path = os.path.join(out_dir, f"patch_{x}_{y}{'' if kind == 'exact' else '_' + kind}.png")
+            cv2.imwrite(path, image)
+            paths.append((kind, path))
+    return paths
+
+
+def timed(fn: Callable, runs: int) -> Tuple[float, object]:
+    result = None
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(samples), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="find_element: full-frame matching vs cached coarse-to-fine search")
+    parser.add_argument("screenshots", nargs="*", default=["images/1-home.png"], help="Saved screenshots (BGR PNGs)")
+    parser.add_argument("--template", action="append", default=[], help="Template PNG (default: patches cut from each screenshot)")
+    parser.add_argument("--patches", type=int, default=6, help="Patches to cut per screenshot when no --template is given")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per case (median is reported)")
+    parser.add_argument("--confidence", type=float, default=0.8)
+    args = parser.parse_args()
+
+    registry = TemplateRegistry()
+    tmp_dir = tempfile.mkdtemp(prefix="find_element_")
+    rows = []
+    for shot in args.screenshots:
+        frame = cv2.imread(shot)
+        if frame is None:
+            print(f"❌ Could not read {shot}")
+            continue
+        templates = [("given", t) for t in args.template] or cut_templates(frame, args.patches, (96, 64), tmp_dir)
+        for kind, path in templates:
+            base_ms, base = timed(lambda: original_find(frame, path, args.confidence), args.runs)
+            pyr_ms, pyr = timed(lambda: registry.locate(frame, path, args.confidence), args.runs)
+            hint = (base[0] + 12, base[1] - 8) if base else None
+            roi_ms, roi = timed(lambda: registry.locate(frame, path, args.confidence, expected=hint), args.runs)
+            outcomes = [compare(frame, path, base, r) for r in (pyr, roi)]
+            same = 'miss' if 'miss' in outcomes else 'tie' if 'tie' in outcomes else 'same'
+            rows.append((os.path.basename(shot), os.path.basename(path), kind, base_ms, pyr_ms, roi_ms,
+                         base is not None, same))
+
+    print(f"\n{'screenshot':16s} {'template':32s} {'full':>8s} {'pyramid':>8s} {'hinted':>8s}  same")
+    for shot, name, kind, base_ms, pyr_ms, roi_ms, found, same in rows:
+        print(f"{shot:16s} {name:32s} {base_ms:7.1f}ms {pyr_ms:7.1f}ms {roi_ms:7.1f}ms  "
+              f"{MARKS[same]}{'' if found else ' (not found by the full scan)'}")
+    if rows:
+        base_total = sum(r[3] for r in rows)
+        print(f"\nSpeedup: pyramid {base_total / sum(r[4] for r in rows):.1f}x, "
+              f"hinted {base_total / sum(r[5] for r in rows):.1f}x")
+        for kind in dict.fromkeys(r[2] for r in rows):
+            group = [r for r in rows if r[2] == kind]
+            print(f"   {kind:9s} {sum(r[7] == 'same' for r in group)}/{len(group)} locations unchanged, "
+                  f"{sum(r[7] == 'tie' for r in group)} equally good repeats, "
+                  f"{sum(r[7] == 'miss' for r in group)} misses "
+                  f"({sum(r[6] for r in group)} found by the full scan)")
+        print(f"Registry: {registry.stats()}")
+
+
+if __name__ == "__main__":
+    main()
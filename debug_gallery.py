@@ -2,14 +2,18 @@
 
 import sys
 import os
+import tempfile
 import time
-import json
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from gallery_navigator import GalleryNavigator
+from progress_journal import ProgressJournal, set_journal
 
 def debug_sequence():
     """Debug the gallery navigation sequence."""
+    # Scratch journal, so the reset below leaves the real gallery progress alone
+    scratch = os.path.join(tempfile.mkdtemp(prefix="debug_gallery_"), "gallery_progress.journal")
+    set_journal(ProgressJournal(scratch, legacy_state=None))
     navigator = GalleryNavigator()
     
     print("🔍 Debug Gallery Navigation Sequence")
@@ -36,14 +40,8 @@ def debug_sequence():
         # Make the selection (without actually clicking)
         print(f"🎯 Would click at ({x}, {y})")
         
-        # Simulate the state update that should happen
-        next_col = col + 1
-        next_row = row
-        if next_col >= 4:  # 4 images per row
-            next_col = 0
-            next_row += 1
-        
-        navigator.save_state(next_row, next_col)
+        # Simulate the state update that should happen: on to the next image
+        navigator.set_image(i + 1)
         
         # Load state after selection
         new_row, new_col = navigator.load_state()
@@ -58,6 +56,7 @@ def debug_sequence():
     print("3. Row 1, Col 3 → (570, 179)")
     print("4. Row 1, Col 4 → (642, 179)")
     print("5. Row 2, Col 1 → (426, 259)")
+    print(navigator.journal.stats())
 
 if __name__ == "__main__":
     debug_sequence()
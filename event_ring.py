@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class EventRing:
+    """
+    Bounded buffer between input-listener callbacks and a consumer thread.
+
+    push() only stamps and appends a tuple (deque appends are atomic under
+    the GIL), so a callback never waits on a lock, print() or disk. When the
+    ring is full the event is dropped and counted rather than blocking the
+    listener. The time each push() took is tracked as callback latency.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._events: deque = deque()
+        self.pushed = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.max_callback_latency = 0.0
+
+    def push(self, event: Tuple[Any, ...], entered: float) -> None:
+        """
+        Queue a raw event from a listener callback.
+
+        Args:
+            event: Raw tuple (kind, timestamp, ...); converted by the consumer
+            entered: time.perf_counter() taken when the callback was entered
+        """
+        if len(self._events) >= self.capacity:
+            self.dropped += 1
+        else:
+            self._events.append(event)
+            self.pushed += 1
+        latency = time.perf_counter() - entered
+        if latency > self.max_callback_latency:
+            self.max_callback_latency = latency
+
+    def drain(self) -> List[Tuple[Any, ...]]:
+        """Pop everything queued so far (consumer side)."""
+        events = []
+        size = len(self._events)
+        if size > self.high_water:
+            self.high_water = size
+        popleft = self._events.popleft
+        try:
+            while True:
+                events.append(popleft())
+        except IndexError:
+            pass
+        return events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def stats(self) -> str:
+        return (f"📥 Event queue: {self.pushed} events, {self.dropped} dropped, "
+                f"peak depth {self.high_water}/{self.capacity}, "
+                f"max callback latency {self.max_callback_latency * 1e6:.0f}µs")
+
+
+class EventConsumer:
+    """
+    Thread that drains an EventRing and hands each event to `handle`.
+
+    `idle` is called after every drain (with the current time) so the owner
+    can close out time-based groupings, e.g. a scroll burst that went quiet.
+    """
+
+    def __init__(self, ring: EventRing, handle: Callable[[Tuple[Any, ...]], None],
+                 idle: Optional[Callable[[float], None]] = None, interval: float = 0.01):
+        self.ring = ring
+        self.handle = handle
+        self.idle = idle
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="recording-consumer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.drain()
+            self._stop.wait(self.interval)
+        # Whatever the listeners queued before stop()
+        self.drain()
+
+    def drain(self) -> None:
+        for event in self.ring.drain():
+            try:
+                self.handle(event)
+            except Exception as e:
+                print(f"⚠️ Could not record event {event[0]}: {e}")
+        if self.idle:
+            self.idle(time.time())
+
+    def stop(self) -> None:
+        """Stop the thread after it has processed every queued event."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,103 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Any
+from utils import activate_window, get_frontmost_app
+
+
+class FocusManager:
+    """
+    Tracks which application is frontmost so the target window is only
+    re-activated when focus was actually lost.
+
+    Activating through AppleScript costs an osascript spawn plus a settle
+    delay, while asking Quartz for the frontmost window owner is a single
+    in-process call. Inside a batch() block the frontmost app is queried
+    once and trusted for the remaining actions of the batch.
+    """
+
+    def __init__(self, activate: Callable[[str], None] = activate_window,
+                 frontmost: Callable[[], Optional[str]] = get_frontmost_app):
+        self._activate = activate
+        self._frontmost = frontmost
+
+        self.focused_app = None
+        self._batch_depth = 0
+        self._batch_verified = False
+
+        # Counters
+        self.checks = 0
+        self.activations = 0
+        self.skipped = 0
+        self.time_in_activation = 0.0
+
+    def is_frontmost(self, app_name: str) -> bool:
+        """Query Quartz for the frontmost app and compare it with app_name."""
+        self.checks += 1
+        frontmost = self._frontmost()
+        if frontmost is None:
+            return False
+        return frontmost == app_name or app_name in frontmost
+
+    def ensure(self, app_name: Optional[str], force: bool = False) -> bool:
+        """
+        Make sure app_name is frontmost.
+
+        Args:
+            app_name: Application owning the target window
+            force: Activate even if the app already appears to have focus
+
+        Returns:
+            True if an activation was performed, False if it was skipped
+        """
+        if not app_name:
+            return False
+
+        if not force:
+            if self._batch_depth and self._batch_verified and self.focused_app == app_name:
+                self.skipped += 1
+                return False
+
+            if self.is_frontmost(app_name):
+                self.focused_app = app_name
+                self._batch_verified = self._batch_depth > 0
+                self.skipped += 1
+                return False
+
+        start = time.perf_counter()
+        self._activate(app_name)
+        self.time_in_activation += time.perf_counter() - start
+
+        self.activations += 1
+        self.focused_app = app_name
+        self._batch_verified = self._batch_depth > 0
+        return True
+
+    def invalidate(self) -> None:
+        """Forget the cached focus state, e.g. after user interaction."""
+        self.focused_app = None
+        self._batch_verified = False
+
+    @contextmanager
+    def batch(self):
+        """Check focus once for a group of actions instead of before each one."""
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self._batch_verified = False
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._batch_verified = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'checks': self.checks,
+            'activations': self.activations,
+            'skipped': self.skipped,
+            'time_in_activation': round(self.time_in_activation, 3)
+        }
+
+    def report(self) -> str:
+        return (f"🎯 Focus: {self.activations} activations, {self.skipped} skipped "
+                f"({self.checks} frontmost checks, {self.time_in_activation:.2f}s activating)")
@@ -2,16 +2,17 @@
 
 import sys
 import os
-import time
-import json
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from iphone_automation import iPhoneAutomation
+from progress_journal import get_journal
+from screen_wait import ScreenWaiter
 
 class GalleryNavigator:
     def __init__(self):
         self.automation = iPhoneAutomation()
         self.automation.window_title = "Liene Photo HD"
+        self.waiter = ScreenWaiter.for_automation(self.automation)
         
         # Grid layout configuration - 4 images per row
         self.images_per_row = 4
@@ -23,35 +24,28 @@ class GalleryNavigator:
         self.spacing_x = 72  # Horizontal spacing between images
         self.spacing_y = 80  # Vertical spacing between rows
         
-        # State file to track current position
-        self.state_file = "gallery_state.json"
+        # Current position and per-image progress (replaces gallery_state.json rewrites)
+        self.journal = get_journal()
         
     def load_state(self):
-        """Load current gallery position state."""
-        if os.path.exists(self.state_file):
-            try:
-                with open(self.state_file, 'r') as f:
-                    state = json.load(f)
-                return state.get('current_row', 0), state.get('current_col', 0)
-            except:
-                return 0, 0
-        return 0, 0
+        """Load current gallery position state (from memory; the journal is only read once)."""
+        return self.journal.cursor
     
     def save_state(self, row, col):
         """Save current gallery position state."""
-        state = {
-            'current_row': row,
-            'current_col': col,
-            'last_updated': time.time()
-        }
-        with open(self.state_file, 'w') as f:
-            json.dump(state, f, indent=2)
+        self.journal.set_cursor(row, col)
     
     def reset_state(self):
-        """Reset to first image (0,0)."""
-        self.save_state(0, 0)
+        """Reset to first image (0,0) and forget per-image progress."""
+        self.journal.reset()
         print("🔄 Gallery state reset to first image")
     
+    def set_image(self, image_num):
+        """Point the next selection at a 1-based image number; returns its (row, col)."""
+        row, col = divmod(image_num - 1, self.images_per_row)
+        self.save_state(row, col)
+        return row, col
+    
     def calculate_image_position(self, row, col):
         """Calculate x,y coordinates for given row/column."""
         x = self.base_x + (col * self.spacing_x)
@@ -77,9 +71,10 @@ class GalleryNavigator:
         try:
             # Click the image
             print(f"🖱️  Executing click at coordinates ({x}, {y})")
+            before = self.waiter.snapshot()
             self.automation.click(x, y)
             print("✅ Image click executed - waiting for selection response...")
-            time.sleep(1.2)  # Slowed 20% for stability
+            self.waiter.settle("SELECT_IMAGE", 1.2, before)  # At most the old (20% slowed) delay
             
             # Move to next position
             next_col = current_col + 1
@@ -113,8 +108,9 @@ class GalleryNavigator:
         x, y = self.calculate_image_position(row, col)
         
         try:
+            before = self.waiter.snapshot()
             self.automation.click(x, y)
-            time.sleep(1.2)  # Slowed 20% for stability
+            self.waiter.settle("SELECT_IMAGE", 1.2, before)
             
             # Update state to this position + 1 for next sequential call
             next_col = col + 1
@@ -143,13 +139,15 @@ class GalleryNavigator:
         try:
             # Click Canvas button (from your recording)
             canvas_x, canvas_y = 517, 130
+            before = self.waiter.snapshot()
             self.automation.click(canvas_x, canvas_y)
-            time.sleep(1.2)  # Slowed 20% for stability
+            self.waiter.settle("CLICK_CANVAS", 1.2, before)
             
             # Click Upload button (from your recording)
             upload_x, upload_y = 32, 210
+            before = self.waiter.snapshot()
             self.automation.click(upload_x, upload_y)
-            time.sleep(1.8)  # Slowed 20% for stability
+            self.waiter.settle("CLICK_UPLOAD", 1.8, before)
             
             print("✅ Successfully navigated to gallery")
             return True
@@ -1,26 +1,54 @@
 import pyautogui
 import time
-import cv2
 import numpy as np
 import json
-from typing import Optional, Tuple, List, Dict, Any
-from utils import find_iphone_window, get_window_bounds, wait_for_element, activate_window
-from Quartz import CGEventCreateScrollWheelEvent, CGEventPost, kCGHIDEventTap, CGPointMake
+import threading
+from typing import Optional, Tuple, List, Dict, Any, Sequence
+from utils import find_iphone_window, get_window_bounds, wait_for_element
+from focus_manager import FocusManager
+from window_capture import WindowCapture, ScreenRegionCapture
+from template_cache import get_template_registry, get_batch_matcher
+from replay_plan import ReplayPlan
+from action_log import ActionLogWriter, load_recording_data
+from event_ring import EventRing, EventConsumer
+from scroll_engine import LINE_PIXELS, ScrollEngine
+from scroll_series import build_series, batch_series, verify_shift, ScrollCheck
+from Quartz import CGEventCreateScrollWheelEvent, CGEventPost, kCGHIDEventTap, CGPointMake, kCGScrollEventUnitLine
+from Quartz import (CGEventGetLocation, CGEventGetIntegerValueField, kCGEventScrollWheel,
+                    kCGScrollWheelEventPointDeltaAxis1, kCGScrollWheelEventPointDeltaAxis2)
 from pynput import mouse, keyboard
 from datetime import datetime
 
+class ActionCancelled(Exception):
+    """Raised by an action once the automation's cancel_event is set (e.g. by a workflow watchdog)."""
+
+
 class iPhoneAutomation:
     def __init__(self, failsafe: bool = True):
         pyautogui.FAILSAFE = failsafe
         pyautogui.PAUSE = 0.1
         
         self.window_bounds = None
+        self.window_id = None
         self.window_title = "iPhone Mirroring"
         self.app_name = None
+        self.focus_manager = FocusManager()
+        # Set by a watchdog to stop an in-process workflow at its next action
+        self.cancel_event = threading.Event()
+        
+        # Screen capture: the mirroring window's own image when possible, pyautogui otherwise
+        self.window_capture = WindowCapture()
+        self.region_capture = ScreenRegionCapture()
+        self.templates = get_template_registry()
         
         # Recording system
         self.recording = False
         self.recorded_actions = []
+        self.action_log: Optional[ActionLogWriter] = None
+        self.event_ring: Optional[EventRing] = None
+        self.event_consumer: Optional[EventConsumer] = None
+        self._scroll_waiter = None
+        self.scroll_engine = ScrollEngine()
         self.start_time = None
         self.mouse_listener = None
         self.keyboard_listener = None
@@ -34,15 +62,24 @@ class iPhoneAutomation:
         window = find_iphone_window(self.window_title)
         if window:
             self.window_bounds = get_window_bounds(window)
+            self.window_id = window.get('window_id')
             self.app_name = window['app']
-            activate_window(window['app'])
+            self.focus_manager.ensure(window['app'])
             return True
         return False
     
     def _ensure_focus(self) -> None:
         """Ensure the iPhone Mirroring window is focused before performing actions"""
-        if self.app_name:
-            activate_window(self.app_name)
+        self._check_cancelled()
+        self.focus_manager.ensure(self.app_name)
+    
+    def _check_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise ActionCancelled("Automation cancelled")
+    
+    def action_batch(self):
+        """Context manager that checks window focus once for a group of actions."""
+        return self.focus_manager.batch()
     
     def _to_absolute_coords(self, x: int, y: int) -> Tuple[int, int]:
         if not self.window_bounds:
@@ -163,8 +200,8 @@ class iPhoneAutomation:
         # Repeat scroll events for more noticeable effect
         for _ in range(repeat):
             # Create and post scroll event
-            # Note: For continuous scrolling, we need to use pixel delta (1) not line delta (0)
-            event = CGEventCreateScrollWheelEvent(None, 1, 2, delta_y, delta_x)
+            # Deltas are in lines (kCGScrollEventUnitLine); scroll_series posts pixels
+            event = CGEventCreateScrollWheelEvent(None, kCGScrollEventUnitLine, 2, delta_y, delta_x)
             CGEventPost(kCGHIDEventTap, event)
             if repeat > 1:
                 time.sleep(0.05)  # Small delay between repeated events
@@ -174,6 +211,9 @@ class iPhoneAutomation:
         """
         Perform continuous scrolling for a duration.
         
+        The distance depends only on speed and duration, not on how promptly
+        the thread wakes; scroll_engine.last has the gesture's stats.
+        
         Args:
             x, y: Position to scroll at
             direction: 'up', 'down', 'left', or 'right'
@@ -184,25 +224,64 @@ class iPhoneAutomation:
         abs_x, abs_y = self._to_absolute_coords(x, y)
         pyautogui.moveTo(abs_x, abs_y)
         
-        # Set scroll deltas based on direction with enhanced horizontal values
+        # Same nominal distance the old fixed-sleep loop aimed for: `speed` lines per
+        # 10ms tick vertically, 2x speed per 5ms tick horizontally, posted as pixels
         delta_x, delta_y = 0, 0
         if direction == 'down':
-            delta_y = -speed
+            delta_y = -round(speed * duration / 0.01 * LINE_PIXELS)
         elif direction == 'up':
-            delta_y = speed
+            delta_y = round(speed * duration / 0.01 * LINE_PIXELS)
         elif direction == 'right':
-            delta_x = -speed * 2  # Enhanced horizontal scrolling
+            delta_x = -round(speed * 2 * duration / 0.005 * LINE_PIXELS)  # Enhanced horizontal scrolling
         elif direction == 'left':
-            delta_x = speed * 2   # Enhanced horizontal scrolling
+            delta_x = round(speed * 2 * duration / 0.005 * LINE_PIXELS)   # Enhanced horizontal scrolling
         
-        # Perform continuous scrolling with variable delay for horizontal
-        start_time = time.time()
-        delay = 0.005 if direction in ['left', 'right'] else 0.01
+        self.scroll_engine.scroll(delta_x, delta_y, duration, cancel_event=self.cancel_event)
+    
+    def scroll_series(self, x: int, y: int, t: Sequence[float] = (), dx: Sequence[int] = (),
+                      dy: Sequence[int] = (), batch_interval: float = 1 / 120,
+                      batches: Optional[List[Tuple[float, int, int]]] = None,
+                      verify: bool = False, scale: float = 1.0,
+                      tolerance: float = 0.25) -> Optional[ScrollCheck]:
+        """
+        Replay a recorded scroll_series with its original pixel deltas and pacing.
         
-        while time.time() - start_time < duration:
-            event = CGEventCreateScrollWheelEvent(None, 1, 2, delta_y, delta_x)
-            CGEventPost(kCGHIDEventTap, event)
-            time.sleep(delay)  # Faster events for horizontal scrolling
+        Args:
+            x, y: Position to scroll at (relative to window)
+            t, dx, dy: The series arrays (offsets in seconds, pixel deltas)
+            batch_interval: Events closer together than this are posted as one
+            batches: Pre-batched [(offset, dx, dy), ...]; overrides t/dx/dy
+            verify: Compare frames before and after to confirm the content moved
+                    by the recorded pixel totals
+            scale: Image pixels per scroll pixel, for verification
+            tolerance: Allowed verification error as a fraction of the distance
+        
+        Returns:
+            ScrollCheck when verify is set, otherwise None
+        """
+        self._ensure_focus()
+        if batches is None:
+            batches = batch_series(t, dx, dy, batch_interval)
+        abs_x, abs_y = self._to_absolute_coords(x, y)
+        pyautogui.moveTo(abs_x, abs_y)
+        before = self.screenshot() if verify else None
+        
+        self.scroll_engine.play([(offset, bx, by, 0, 0) for offset, bx, by in batches],
+                                cancel_event=self.cancel_event)
+        self._check_cancelled()
+        
+        if not verify:
+            return None
+        if self._scroll_waiter is None:
+            from screen_wait import ScreenWaiter
+            self._scroll_waiter = ScreenWaiter.for_automation(self)
+        self._scroll_waiter.wait_until_stable(timeout=2.0)
+        check = verify_shift(before, self.screenshot(),
+                             (sum(b[1] for b in batches), sum(b[2] for b in batches)),
+                             scale=scale, tolerance=tolerance)
+        if not check.ok:
+            print(f"⚠️ Scroll landed off target: {check}")
+        return check
     
     def enhanced_horizontal_scroll(self, x: int, y: int, direction: str = 'left', 
                                   distance: int = 20, smoothness: int = 10) -> None:
@@ -212,22 +291,17 @@ class iPhoneAutomation:
         Args:
             x, y: Position to scroll at
             direction: 'left' or 'right'
-            distance: Total scroll distance
+            distance: Total scroll distance in lines (posted as exactly distance * LINE_PIXELS pixels)
             smoothness: Number of scroll events to break the distance into
         """
         self._ensure_focus()
         abs_x, abs_y = self._to_absolute_coords(x, y)
         pyautogui.moveTo(abs_x, abs_y)
         
-        # Calculate delta per event
-        delta_per_event = distance // smoothness
-        delta_x = delta_per_event if direction == 'left' else -delta_per_event
-        
-        # Perform smooth horizontal scrolling
-        for _ in range(smoothness):
-            event = CGEventCreateScrollWheelEvent(None, 1, 2, 0, delta_x)
-            CGEventPost(kCGHIDEventTap, event)
-            time.sleep(0.02)  # Small delay for smoothness
+        # The full distance over `smoothness` events, 20ms apart
+        delta_x = distance * LINE_PIXELS if direction == 'left' else -distance * LINE_PIXELS
+        self.scroll_engine.scroll(delta_x, 0, (smoothness - 1) * 0.02, events=smoothness,
+                                  phases=False, cancel_event=self.cancel_event)
     
     def keyboard_scroll(self, direction: str = 'down', method: str = 'arrow') -> None:
         """
@@ -254,8 +328,14 @@ class iPhoneAutomation:
                 pyautogui.hotkey('shift', 'space')
     
     # Recording and Playback Methods
-    def start_recording(self) -> None:
-        """Start recording manual interactions."""
+    def start_recording(self, log_path: Optional[str] = None) -> None:
+        """
+        Start recording manual interactions.
+
+        Actions are also streamed to an append-only action log as they arrive
+        (recordings/session_<timestamp>.alog unless log_path is given), so a
+        crash mid-session keeps everything recorded up to that point.
+        """
         if self.recording:
             print("Already recording!")
             return
@@ -266,16 +346,31 @@ class iPhoneAutomation:
             
         self.recording = True
         self.recorded_actions = []
+        self.scroll_buffer = []
+        self.last_scroll_time = 0
         self.start_time = time.time()
         
+        log_path = log_path or f"recordings/session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.alog"
+        self.action_log = ActionLogWriter(log_path, {
+            'timestamp': datetime.now().isoformat(),
+            'window_bounds': self.window_bounds,
+        })
+        
+        # Listener callbacks only queue raw events; this thread turns them into actions
+        self.event_ring = EventRing()
+        self.event_consumer = EventConsumer(self.event_ring, self._handle_event, idle=self._on_idle)
+        self.event_consumer.start()
+        
         print(f"🔴 Recording started at {datetime.now().strftime('%H:%M:%S')}")
+        print(f"📼 Streaming actions to {log_path}")
         print("Perform your manual interactions in the iPhone Mirroring window...")
         print("Press Ctrl+C to stop recording")
         
-        # Start listening for mouse events
+        # Start listening for mouse events; scrolls are read from the raw CGEvent
+        # so the pixel deltas are kept (pynput's on_scroll only reports lines)
         self.mouse_listener = mouse.Listener(
             on_click=self._on_click,
-            on_scroll=self._on_scroll
+            darwin_intercept=self._intercept_scroll
         )
         self.mouse_listener.start()
         
@@ -291,9 +386,6 @@ class iPhoneAutomation:
             print("Not currently recording!")
             return []
         
-        # Finalize any pending scroll actions
-        self._finalize_continuous_scroll()
-        
         self.recording = False
         
         if self.mouse_listener:
@@ -301,7 +393,20 @@ class iPhoneAutomation:
         if self.keyboard_listener:
             self.keyboard_listener.stop()
         
+        # Process everything still queued, then finalize any pending scroll actions
+        if self.event_consumer:
+            self.event_consumer.stop()
+            self.event_consumer = None
+        self._finalize_scroll_series()
+        
+        if self.action_log:
+            self.action_log.close()
+            print(f"📼 Action log: {self.action_log.path} ({self.action_log.bytes_written} bytes)")
+            self.action_log = None
+        
         print(f"🛑 Recording stopped. Captured {len(self.recorded_actions)} actions")
+        if self.event_ring is not None:
+            print(self.event_ring.stats())
         return self.recorded_actions
     
     def _is_within_window(self, x: int, y: int) -> bool:
@@ -317,38 +422,82 @@ class iPhoneAutomation:
             return x, y
         return x - self.window_bounds['x'], y - self.window_bounds['y']
     
+    def _record_action(self, action: Dict[str, Any]) -> None:
+        """Keep an action in memory and append it to the session's action log."""
+        self.recorded_actions.append(action)
+        if self.action_log:
+            self.action_log.append(action)
+    
+    # Listener callbacks (pynput threads): stamp and queue, nothing else
     def _on_click(self, x: int, y: int, button, pressed: bool) -> None:
+        entered = time.perf_counter()
+        if self.recording and pressed:  # Only record mouse down events
+            self.event_ring.push(('click', time.time(), x, y, button), entered)
+    
+    def _intercept_scroll(self, event_type, event):
+        entered = time.perf_counter()
+        if self.recording and event_type == kCGEventScrollWheel:
+            location = CGEventGetLocation(event)
+            self.event_ring.push(('scroll', time.time(), location.x, location.y,
+                                  CGEventGetIntegerValueField(event, kCGScrollWheelEventPointDeltaAxis2),
+                                  CGEventGetIntegerValueField(event, kCGScrollWheelEventPointDeltaAxis1)),
+                                 entered)
+        return event
+    
+    def _on_key_press(self, key) -> None:
+        entered = time.perf_counter()
+        if self.recording:
+            self.event_ring.push(('key', time.time(), key), entered)
+    
+    # Consumer thread
+    def _handle_event(self, event: Tuple[Any, ...]) -> None:
+        """Turn one queued raw event into a recorded action."""
+        kind, t = event[0], event[1]
+        if kind == 'scroll':
+            self._handle_scroll(t, *event[2:])
+            return
+        
+        # Any other input ends a scroll sequence, keeping actions in time order
+        self._finalize_scroll_series()
+        if kind == 'click':
+            self._handle_click(t, *event[2:])
+        elif kind == 'key':
+            self._handle_key(t, event[2])
+    
+    def _on_idle(self, now: float) -> None:
+        """Close a scroll sequence once no scroll event arrived for scroll_timeout."""
+        if self.scroll_buffer and now - self.last_scroll_time > self.scroll_timeout:
+            self._finalize_scroll_series()
+    
+    def _handle_click(self, t: float, x: int, y: int, button) -> None:
         """Handle mouse click events during recording."""
-        if not self.recording or not self._is_within_window(x, y):
+        if not self._is_within_window(x, y):
             return
         
         rel_x, rel_y = self._to_relative_coords(x, y)
-        
-        if pressed:  # Only record mouse down events
-            action = {
-                'type': 'click',
-                'x': rel_x,
-                'y': rel_y,
-                'button': button.name,
-                'timestamp': time.time() - self.start_time
-            }
-            self.recorded_actions.append(action)
-            print(f"📍 Click recorded at ({rel_x}, {rel_y}) with {button.name} button")
+        action = {
+            'type': 'click',
+            'x': rel_x,
+            'y': rel_y,
+            'button': button.name,
+            'timestamp': t - self.start_time
+        }
+        self._record_action(action)
+        print(f"📍 Click recorded at ({rel_x}, {rel_y}) with {button.name} button")
     
-    def _on_scroll(self, x: int, y: int, dx: int, dy: int) -> None:
-        """Handle scroll events during recording - aggregates into continuous scrolls."""
-        if not self.recording or not self._is_within_window(x, y):
+    def _handle_scroll(self, t: float, x: int, y: int, dx: int, dy: int) -> None:
+        """Handle scroll events during recording - buffers each burst into a scroll series."""
+        if not self._is_within_window(x, y):
             return
         
         rel_x, rel_y = self._to_relative_coords(x, y)
-        current_time = time.time()
         
         # Check if this is part of a continuous scroll sequence
-        if (current_time - self.last_scroll_time) > self.scroll_timeout:
+        if (t - self.last_scroll_time) > self.scroll_timeout:
             # New scroll sequence - finalize any previous scroll
-            self._finalize_continuous_scroll()
-            # Start new scroll buffer
-            self.scroll_buffer = []
+            self._finalize_scroll_series()
+            direction = "horizontal" if abs(dx) > abs(dy) else "vertical"
+            print(f"🖱️ {direction.capitalize()} scroll detected at ({rel_x}, {rel_y})")
         
         # Add scroll event to buffer
         scroll_event = {
@@ -356,65 +505,27 @@ class iPhoneAutomation:
             'y': rel_y,
             'dx': dx,
             'dy': dy,
-            'timestamp': current_time - self.start_time
+            'timestamp': t - self.start_time
         }
         self.scroll_buffer.append(scroll_event)
-        self.last_scroll_time = current_time
-        
-        direction = "horizontal" if abs(dx) > abs(dy) else "vertical"
-        print(f"🖱️ {direction.capitalize()} scroll detected at ({rel_x}, {rel_y})")
+        self.last_scroll_time = t
     
-    def _finalize_continuous_scroll(self) -> None:
-        """Convert buffered scroll events into a continuous scroll action."""
+    def _finalize_scroll_series(self) -> None:
+        """Convert buffered scroll events into a scroll_series action (every delta kept)."""
         if not self.scroll_buffer:
             return
         
-        # Calculate total scroll distance and direction
-        total_dx = sum(event['dx'] for event in self.scroll_buffer)
-        total_dy = sum(event['dy'] for event in self.scroll_buffer)
-        
-        # Use the position from the first scroll event
-        first_event = self.scroll_buffer[0]
-        last_event = self.scroll_buffer[-1]
-        
-        # Calculate duration of the scroll sequence - cap it for gentler scrolling
-        duration = last_event['timestamp'] - first_event['timestamp']
-        if duration < 0.1:  # Minimum duration
-            duration = 0.2
-        elif duration > 1.0:  # Maximum duration to prevent overly long scrolls
-            duration = 1.0
-        
-        # Determine primary direction and create continuous scroll action
-        if abs(total_dx) > abs(total_dy):
-            # Horizontal scroll
-            direction = 'left' if total_dx > 0 else 'right'
-            speed = min(3, max(1, int(abs(total_dx) / 5)))  # Reduced speed calculation
-        else:
-            # Vertical scroll
-            direction = 'up' if total_dy > 0 else 'down'
-            speed = min(3, max(1, int(abs(total_dy) / 5)))  # Reduced speed calculation
-        
-        action = {
-            'type': 'continuous_scroll',
-            'x': first_event['x'],
-            'y': first_event['y'],
-            'direction': direction,
-            'duration': round(duration, 2),
-            'speed': speed,
-            'timestamp': first_event['timestamp']
-        }
-        
-        self.recorded_actions.append(action)
-        print(f"📜 Continuous {direction} scroll recorded: {duration:.2f}s at speed {speed}")
+        action = build_series(self.scroll_buffer)
+        self._record_action(action)
+        duration = action['t'][-1]
+        print(f"📜 Scroll recorded: {len(action['t'])} events over {duration:.2f}s, "
+              f"({sum(action['dx'])}, {sum(action['dy'])}) px")
         
         # Clear the buffer
         self.scroll_buffer = []
     
-    def _on_key_press(self, key) -> None:
+    def _handle_key(self, t: float, key) -> None:
         """Handle keyboard events during recording."""
-        if not self.recording:
-            return
-        
         # Stop recording on Ctrl+C
         if key == keyboard.Key.ctrl_l or key == keyboard.Key.ctrl_r:
             return
@@ -428,16 +539,24 @@ class iPhoneAutomation:
             action = {
                 'type': 'key',
                 'key': key_name,
-                'timestamp': time.time() - self.start_time
+                'timestamp': t - self.start_time
             }
-            self.recorded_actions.append(action)
+            self._record_action(action)
             print(f"⌨️ Key press recorded: {key_name}")
     
     def save_recording(self, filename: str, actions: List[Dict[str, Any]] = None) -> None:
-        """Save recorded actions to a JSON file."""
+        """Save recorded actions to a JSON file, or to an action log if filename ends in .alog."""
         if actions is None:
             actions = self.recorded_actions
         
+        if filename.endswith('.alog'):
+            with ActionLogWriter(filename, {'timestamp': datetime.now().isoformat(),
+                                            'window_bounds': self.window_bounds}) as writer:
+                for action in actions:
+                    writer.append(action)
+            print(f"💾 Recording saved to {filename}")
+            return
+        
         recording_data = {
             'timestamp': datetime.now().isoformat(),
             'window_bounds': self.window_bounds,
@@ -451,10 +570,9 @@ class iPhoneAutomation:
         print(f"💾 Recording saved to {filename}")
     
     def load_recording(self, filename: str) -> List[Dict[str, Any]]:
-        """Load recorded actions from a JSON file."""
+        """Load recorded actions from a JSON file or an action log."""
         try:
-            with open(filename, 'r') as f:
-                recording_data = json.load(f)
+            recording_data = load_recording_data(filename)
             
             actions = recording_data.get('actions', [])
             print(f"📁 Loaded {len(actions)} actions from {filename}")
@@ -465,10 +583,13 @@ class iPhoneAutomation:
         except json.JSONDecodeError:
             print(f"❌ Invalid JSON in {filename}")
             return []
+        except ValueError as e:
+            print(f"❌ Could not read {filename}: {e}")
+            return []
     
     def replay_recording(self, actions: List[Dict[str, Any]] = None, 
-                        speed_multiplier: float = 1.0) -> None:
-        """Replay recorded actions."""
+                        speed_multiplier: float = 1.0, verify_scrolls: bool = False) -> None:
+        """Replay recorded actions (verify_scrolls frame-checks every scroll series)."""
         if actions is None:
             actions = self.recorded_actions
         
@@ -483,42 +604,14 @@ class iPhoneAutomation:
         self._ensure_focus()
         print(f"▶️ Starting playback of {len(actions)} actions...")
         
-        last_timestamp = 0
-        for i, action in enumerate(actions):
-            # Wait for the appropriate time delay
-            delay = (action['timestamp'] - last_timestamp) / speed_multiplier
-            if delay > 0:
-                time.sleep(delay)
-            
-            # Execute the action
-            try:
-                if action['type'] == 'click':
-                    self.click(action['x'], action['y'], button=action.get('button', 'left'))
-                    print(f"  {i+1}/{len(actions)}: Click at ({action['x']}, {action['y']})")
-                
-                elif action['type'] == 'scroll':
-                    self.native_scroll(action['x'], action['y'], 
-                                     delta_x=action['dx'], delta_y=action['dy'])
-                    print(f"  {i+1}/{len(actions)}: Scroll at ({action['x']}, {action['y']})")
-                
-                elif action['type'] == 'continuous_scroll':
-                    self.continuous_scroll(action['x'], action['y'], 
-                                         direction=action['direction'],
-                                         duration=action['duration'],
-                                         speed=action['speed'])
-                    print(f"  {i+1}/{len(actions)}: Continuous {action['direction']} scroll "
-                          f"for {action['duration']}s at speed {action['speed']}")
-                
-                elif action['type'] == 'key':
-                    pyautogui.press(action['key'])
-                    print(f"  {i+1}/{len(actions)}: Key press: {action['key']}")
-                
-            except Exception as e:
-                print(f"❌ Error executing action {i+1}: {e}")
-            
-            last_timestamp = action['timestamp']
+        plan = ReplayPlan.compile(actions)
+        plan.verify_scrolls = verify_scrolls
+        if plan.run(self, speed=speed_multiplier, verbose=True) < 1:
+            return
         
         print("✅ Playback completed!")
+        print(plan.jitter_report())
+        print(self.focus_manager.report())
     
     def generate_script(self, actions: List[Dict[str, Any]] = None, 
                        script_name: str = "generated_automation") -> str:
@@ -572,6 +665,10 @@ class iPhoneAutomation:
                                   f"direction='{action['direction']}', duration={action['duration']}, "
                                   f"speed={action['speed']})")
             
+            elif action['type'] == 'scroll_series':
+                script_lines.append(f"    automation.scroll_series({action['x']}, {action['y']}, "
+                                  f"t={action['t']}, dx={action['dx']}, dy={action['dy']})")
+            
             elif action['type'] == 'key':
                 script_lines.append(f"    automation.press_key('{action['key']}')")
             
@@ -589,15 +686,33 @@ class iPhoneAutomation:
         return "\n".join(script_lines)
         
     def type_text(self, text: str, interval: float = 0.05) -> None:
+        self._check_cancelled()
         pyautogui.typewrite(text, interval=interval)
         
     def press_key(self, key: str) -> None:
+        self._check_cancelled()
         pyautogui.press(key)
         
     def hotkey(self, *keys) -> None:
+        self._check_cancelled()
         pyautogui.hotkey(*keys)
         
-    def screenshot(self, region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+    def screenshot(self, region: Optional[Tuple[int, int, int, int]] = None,
+                   fmt: str = 'bgr', out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Capture the iPhone window (or a screen region).
+        
+        Args:
+            region: Optional (x, y, width, height) in screen coordinates
+            fmt: 'bgr' or 'bgra'
+            out: Optional reusable output array; the result may be written into it
+        """
+        if region is None and self.window_id is not None:
+            try:
+                return self.window_capture.capture(self.window_id, fmt=fmt, out=out)
+            except RuntimeError as e:
+                print(f"⚠️ Window capture failed ({e}), falling back to pyautogui")
+        
         if region is None and self.window_bounds:
             region = (
                 self.window_bounds['x'],
@@ -606,26 +721,55 @@ class iPhoneAutomation:
                 self.window_bounds['height']
             )
         
-        screenshot = pyautogui.screenshot(region=region)
-        return cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+        return self.region_capture.capture(region, fmt=fmt, out=out)
     
-    def find_element(self, template_path: str, confidence: float = 0.8) -> Optional[Tuple[int, int]]:
-        screenshot = self.screenshot()
-        template = cv2.imread(template_path)
-        
-        result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+    def capture_report(self) -> str:
+        """FPS and bytes-copied counters for both capture paths."""
+        return "\n".join(c.stats.report() for c in (self.window_capture, self.region_capture) if c.stats.frames)
+    
+    def find_element(self, template_path: str, confidence: float = 0.8,
+                     roi: Optional[Tuple[int, int, int, int]] = None,
+                     expected: Optional[Tuple[int, int]] = None) -> Optional[Tuple[int, int]]:
+        """
+        Locate a template on screen.
         
-        if max_val >= confidence:
-            center_x = max_loc[0] + template.shape[1] // 2
-            center_y = max_loc[1] + template.shape[0] // 2
-            return center_x, center_y
+        Args:
+            template_path: Path to the template image
+            confidence: Minimum match score
+            roi: Optional (x, y, width, height) area to search first, in window coordinates
+            expected: Optional (x, y) where the element's center usually is
+            
+        Returns:
+            Center of the match in window coordinates, or None
+        """
+        screenshot = self.screenshot()
+        match = self.templates.locate(screenshot, template_path, confidence, roi=roi, expected=expected)
+        if match:
+            return match[0], match[1]
         
         return None
     
+    def find_elements(self, template_paths: List[str], confidence: float = 0.8,
+                      hints: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Tuple[int, int, float]]:
+        """
+        Locate several templates in one screenshot.
+        
+        Args:
+            template_paths: Template image paths
+            confidence: Minimum match score
+            hints: Optional per-template find_element hints, e.g. {path: {'roi': (x, y, w, h)}}
+            
+        Returns:
+            {path: (x, y, confidence)} in window coordinates for every template found
+        """
+        screenshot = self.screenshot()
+        results = get_batch_matcher().match_all(screenshot, template_paths, confidence, hints)
+        return {path: match for path, match in results.items() if match}
+    
     def click_element(self, template_path: str, confidence: float = 0.8, 
-                     timeout: float = 10.0) -> bool:
-        element = wait_for_element(self, template_path, confidence, timeout)
+                     timeout: float = 10.0, roi: Optional[Tuple[int, int, int, int]] = None,
+                     expected: Optional[Tuple[int, int]] = None) -> bool:
+        element = wait_for_element(self, template_path, confidence, timeout, roi=roi, expected=expected)
         if element:
             self.click(element[0], element[1])
             return True
@@ -0,0 +1,371 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+_TRANSITIONS = {
+    QUEUED: {RUNNING, CANCELLED},
+    RUNNING: {SUCCEEDED, FAILED, CANCELLED},
+    SUCCEEDED: set(),
+    FAILED: set(),
+    CANCELLED: set(),
+}
+ACTIVE_STATES = frozenset({QUEUED, RUNNING})
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it notices it was cancelled."""
+
+
+class QueueFull(Exception):
+    """The scheduler already holds max_queue waiting jobs."""
+
+
+class DuplicateJob(Exception):
+    """An equivalent job is already queued or running (dedupe='reject')."""
+
+    def __init__(self, job: "Job"):
+        super().__init__(f"Duplicate of job {job.id} ({job.state})")
+        self.job = job
+
+
+class Job:
+    """One unit of work: its state machine, lease and cancellation flag."""
+
+    def __init__(self, job_id: str, kind: str, fn: Callable[["JobContext"], Any],
+                 params: Dict[str, Any], device: Optional[str], key: Optional[str]):
+        self.id = job_id
+        self.kind = kind
+        self.fn = fn
+        self.params = params
+        self.device = device
+        self.key = key
+        self.state = QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.message = "Queued"
+        self.progress: Optional[float] = None
+        self.merged = 0  # Duplicate submissions folded into this job
+        self.cancel_event = threading.Event()
+        self._linked: List[threading.Event] = []
+
+    def _transition(self, state: str) -> None:
+        if state not in _TRANSITIONS[self.state]:
+            raise ValueError(f"Job {self.id}: illegal transition {self.state} → {state}")
+        self.state = state
+        if state == RUNNING:
+            self.started = time.time()
+        elif state not in ACTIVE_STATES:
+            self.finished = time.time()
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'device': self.device,
+            'state': self.state,
+            'message': self.message,
+            'progress': self.progress,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'error': self.error,
+            'merged': self.merged,
+        }
+
+
+class JobContext:
+    """Handed to a job function for cooperative cancellation and progress reporting."""
+
+    def __init__(self, job: Job, scheduler: "JobScheduler"):
+        self.job = job
+        self._scheduler = scheduler
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job.cancel_event.is_set()
+
+    def check(self) -> None:
+        """Call between steps; raises JobCancelled once the job has been cancelled."""
+        if self.job.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job.id} cancelled")
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep that ends early (raising JobCancelled) when the job is cancelled."""
+        if self.job.cancel_event.wait(max(0.0, seconds)):
+            raise JobCancelled(f"Job {self.job.id} cancelled")
+
+    def link(self, event: threading.Event) -> None:
+        """Also set `event` on cancel (e.g. an iPhoneAutomation.cancel_event) so in-flight actions stop."""
+        self.job._linked.append(event)
+        if self.cancelled:
+            event.set()
+
+    def report(self, message: str, progress: Optional[float] = None) -> None:
+        self._scheduler._update(self.job, message, progress)
+
+    def run_step(self, name: str, fn: Callable[..., Any], *args, image: Optional[int] = None, **kwargs) -> Any:
+        """
+        Run one named step of the job and publish a 'step' event with its duration and outcome.
+
+        A step succeeds unless it raises or returns False. Checks for
+        cancellation before starting.
+        """
+        self.check()
+        start = time.perf_counter()
+        success = False
+        try:
+            result = fn(*args, **kwargs)
+            success = result is not False
+            return result
+        finally:
+            self._scheduler._emit(self.job, {
+                'type': 'step',
+                'step': name,
+                'image': image,
+                'duration': round(time.perf_counter() - start, 3),
+                'success': success,
+            })
+
+
+class JobScheduler:
+    """
+    Runs jobs on worker threads with a bounded queue and per-device leases.
+
+    A job that names a device only starts when no other job holds that
+    device, so two requests never drive the same window at once; jobs for
+    other devices (or with device=None) run alongside. Jobs with the same
+    dedupe key as an active job are merged into it or rejected.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 16, dedupe: str = 'merge',
+                 history: int = 100):
+        """
+        Args:
+            workers: Worker threads (upper bound on jobs running at once)
+            max_queue: Queued (not yet running) jobs accepted before QueueFull
+            dedupe: 'merge' returns the existing job, 'reject' raises DuplicateJob
+            history: Finished jobs kept for status queries
+        """
+        if dedupe not in ('merge', 'reject'):
+            raise ValueError(f"Unknown dedupe mode: {dedupe}")
+        self.max_queue = max_queue
+        self.dedupe = dedupe
+        self.history = history
+
+        self._cond = threading.Condition()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: List[Job] = []
+        self._leases: Dict[str, str] = {}  # device → job id
+        self._ids = itertools.count(1)
+        self._listeners: List[Callable[[Job, Dict[str, Any]], None]] = []
+        self._shutdown = False
+
+        self.submitted = 0
+        self.merged = 0
+        self.rejected = 0
+
+        self._workers = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def add_listener(self, listener: Callable[[Job, Dict[str, Any]], None]) -> None:
+        """
+        Call listener(job, event) for every job event, on the thread that caused it.
+
+        Events are dicts with 'type' = 'job' (state change), 'progress' or
+        'step' (see JobContext.run_step). Listeners must not block: they run
+        on worker threads in the middle of a job.
+        """
+        self._listeners.append(listener)
+
+    def _emit(self, job: Job, event: Dict[str, Any]) -> None:
+        event = dict(event, job=job.id, kind=job.kind, time=time.time())
+        for listener in self._listeners:
+            try:
+                listener(job, event)
+            except Exception as e:
+                print(f"⚠️ Job listener failed: {e}")
+
+    def _notify(self, job: Job) -> None:
+        self._emit(job, {'type': 'job', 'state': job.state, 'message': job.message})
+
+    def submit(self, kind: str, fn: Callable[[JobContext], Any], params: Optional[Dict[str, Any]] = None,
+               device: Optional[str] = None, key: Optional[str] = None) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            kind: Short name shown in status output
+            fn: Called as fn(ctx) on a worker thread
+            params: Shown in status output
+            device: Exclusive lease to hold while running (None for no lease)
+            key: Dedupe key; an active job with the same key absorbs or rejects this one
+
+        Returns:
+            The queued job, or the existing job it was merged into
+        """
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler is shut down")
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and job.active:
+                        if self.dedupe == 'reject':
+                            self.rejected += 1
+                            raise DuplicateJob(job)
+                        job.merged += 1
+                        self.merged += 1
+                        return job
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"{len(self._queue)} jobs already queued")
+
+            job = Job(f"job-{next(self._ids):04d}", kind, fn, params or {}, device, key)
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self.submitted += 1
+            self._trim_history()
+            self._cond.notify_all()
+        self._notify(job)
+        return job
+
+    def _trim_history(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _next_runnable(self) -> Optional[Job]:
+        for job in self._queue:
+            if job.device is None or job.device not in self._leases:
+                return job
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next_runnable()
+                while job is None and not self._shutdown:
+                    self._cond.wait()
+                    job = self._next_runnable()
+                if job is None:
+                    return
+                self._queue.remove(job)
+                if job.device is not None:
+                    self._leases[job.device] = job.id
+                job._transition(RUNNING)
+                job.message = "Running"
+            self._notify(job)
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        ctx = JobContext(job, self)
+        state, error = SUCCEEDED, None
+        try:
+            job.result = job.fn(ctx)
+            if job.cancel_event.is_set():
+                state = CANCELLED
+            elif job.result is False:
+                state = FAILED
+        except JobCancelled:
+            state = CANCELLED
+        except Exception as e:
+            if job.cancel_event.is_set():
+                state = CANCELLED
+            else:
+                state, error = FAILED, f"{type(e).__name__}: {e}"
+                print(f"❌ Job {job.id} ({job.kind}) failed: {error}")
+
+        with self._cond:
+            job._transition(state)
+            job.error = error
+            job.message = {SUCCEEDED: "Completed", FAILED: error or "Failed", CANCELLED: "Cancelled"}[state]
+            if job.device is not None and self._leases.get(job.device) == job.id:
+                del self._leases[job.device]
+            self._cond.notify_all()
+        self._notify(job)
+
+    def _update(self, job: Job, message: str, progress: Optional[float]) -> None:
+        job.message = message
+        if progress is not None:
+            job.progress = progress
+        self._emit(job, {'type': 'progress', 'message': message, 'progress': job.progress})
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job: a queued job is dropped at once, a running job is
+        signalled and finishes as cancelled at its next check.
+
+        Returns:
+            The job, or None if unknown
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return job
+            job.cancel_event.set()
+            for event in job._linked:
+                event.set()
+            if job.state == QUEUED:
+                self._queue.remove(job)
+                job._transition(CANCELLED)
+                job.message = "Cancelled before start"
+            else:
+                job.message = "Cancelling..."
+        self._notify(job)
+        return job
+
+    def cancel_all(self, device: Optional[str] = None, exclude: Optional[str] = None) -> List[Job]:
+        """Cancel every active job (on `device`, if given) except `exclude`."""
+        with self._cond:
+            targets = [job.id for job in self._jobs.values()
+                       if job.active and job.id != exclude and (device is None or job.device == device)]
+        return [self.cancel(job_id) for job_id in targets]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def jobs(self, active_only: bool = False) -> List[Job]:
+        with self._cond:
+            return [job for job in self._jobs.values() if job.active or not active_only]
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'running': [job.id for job in self._jobs.values() if job.state == RUNNING],
+                'queued': [job.id for job in self._queue],
+                'leases': dict(self._leases),
+                'submitted': self.submitted,
+                'merged': self.merged,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self, cancel: bool = True, wait: bool = True) -> None:
+        """Stop accepting jobs; optionally cancel active ones and wait for the workers."""
+        if cancel:
+            self.cancel_all()
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
@@ -6,6 +6,8 @@ import time
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from iphone_automation import iPhoneAutomation
+from screen_wait import ScreenWaiter
+from timing_profile import TimingProfile
 
 class ImprovedLienePhotoAutomation:
     def __init__(self):
@@ -33,7 +35,8 @@ class ImprovedLienePhotoAutomation:
             'back_button': (25, 47)           # Back arrow to return to main
         }
         
-        # Timing configuration (adaptive)
+        # Default waits; the per-step waits actually used are learned from past
+        # runs by self.profile and only fall back to these until enough samples exist
         self.timing = {
             'click_delay': 1.5,
             'upload_wait': 2.0,
@@ -41,6 +44,9 @@ class ImprovedLienePhotoAutomation:
             'navigation_wait': 2.0,
             'input_delay': 0.5
         }
+        self.profile = TimingProfile()
+        self.waiter = ScreenWaiter.for_automation(self.automation)
+        self._current_step = None
         
     def calculate_grid_position(self, image_number):
         """Calculate grid position for a given image number (1-based)."""
@@ -62,21 +68,29 @@ class ImprovedLienePhotoAutomation:
         print("✅ Window focused and ready")
         return True
     
-    def click_with_verification(self, x, y, description="", wait_time=None):
+    def adaptive_wait(self, step, default, before=None):
+        """Wait for the UI after a step, using the learned wait for that step."""
+        self._current_step = step
+        wait_time = self.profile.wait_for(step, default)
+        self.waiter.settle(step, wait_time, before)
+        self.profile.learn_from(step, self.waiter)
+    
+    def click_with_verification(self, x, y, description="", wait_time=None, step=None):
         """Click with logging and optional wait time."""
         if wait_time is None:
             wait_time = self.timing['click_delay']
             
         print(f"   Clicking {description} at ({x}, {y})")
+        before = self.waiter.snapshot()
         self.automation.click(x, y)
-        time.sleep(wait_time)
+        self.adaptive_wait(step or description, wait_time, before)
     
     def execute_workflow_step(self, step_name, coord_key, wait_time=None, description=""):
         """Execute a standard workflow step."""
         coords = self.coordinates[coord_key]
         desc = description or coord_key.replace('_', ' ').title()
         print(f"{step_name}: {desc}...")
-        self.click_with_verification(coords[0], coords[1], desc, wait_time)
+        self.click_with_verification(coords[0], coords[1], desc, wait_time, step=coord_key)
     
     def process_single_image(self, image_number):
         """
@@ -106,7 +120,7 @@ class ImprovedLienePhotoAutomation:
             # STEP 3: Select specific image from grid (CRITICAL STEP)
             print(f"Step 3: Selecting image at grid position ({image_x}, {image_y})...")
             self.click_with_verification(image_x, image_y, f"Image {image_number}", 
-                                       self.timing['click_delay'])
+                                       self.timing['click_delay'], step="select_image")
             
             # STEP 4: Click "Use it" button
             self.execute_workflow_step("Step 4", "use_it_button",
@@ -118,15 +132,16 @@ class ImprovedLienePhotoAutomation:
             # Click size input area
             self.click_with_verification(self.coordinates['size_input'][0], 
                                        self.coordinates['size_input'][1],
-                                       "Size input area", self.timing['input_delay'])
+                                       "Size input area", self.timing['input_delay'], step="size_input")
             
             # Clear and enter size value
             print("   Entering size value: 166")
+            before = self.waiter.snapshot()
             self.automation.press_key('backspace')
             self.automation.press_key('backspace') 
             self.automation.type_text('166')
             self.automation.press_key('enter')
-            time.sleep(1.0)
+            self.adaptive_wait("size_entered", 1.0, before)
             
             # Confirmation clicks
             self.execute_workflow_step("Step 5a", "confirm_button_1", 0.5, "First confirmation")
@@ -137,10 +152,14 @@ class ImprovedLienePhotoAutomation:
                                      self.timing['navigation_wait'], "Back to main")
             
             print(f"✅ Image {image_number} completed successfully!")
+            self.profile.save()
             return True
             
         except Exception as e:
             print(f"❌ Error processing image {image_number}: {e}")
+            if self._current_step:
+                self.profile.record_failure(self._current_step)
+            self.profile.save()
             return False
     
     def run_batch_automation(self, total_images=10, start_image=1):
@@ -201,6 +220,8 @@ class ImprovedLienePhotoAutomation:
         print(f"⏱️ Total time: {elapsed_time:.1f} seconds")
         if successful_images > 0:
             print(f"📊 Average time per image: {elapsed_time/successful_images:.1f} seconds")
+        print(self.waiter.report())
+        print(self.profile.report())
         
         return successful_images == total_images
 
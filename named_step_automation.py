@@ -6,54 +6,76 @@ import time
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from iphone_automation import iPhoneAutomation
+from pipeline_scheduler import DEVICE_PROCESSING, UI_BUSY, PipelineScheduler, StepGraph
+from screen_wait import ScreenWaiter
+from template_cache import get_template_registry
+from timing_profile import TimingProfile
+
+# Lane for steps that drive the mirrored iPhone window
+IPHONE = 'iphone'
+# Lane for Android gallery loops (android/gallery_loop.py) run alongside
+ANDROID = 'android'
 
 class NamedStepAutomation:
-    def __init__(self):
+    def __init__(self, event_waits=True):
         self.automation = iPhoneAutomation()
         self.automation.window_title = "Liene Photo HD"
+        # Step delays become upper bounds: continue as soon as the UI settles
+        self.waiter = ScreenWaiter.for_automation(self.automation) if event_waits else None
+        # Learned per-step waits; the step delays below are the defaults
+        self.timing = TimingProfile()
         
+    def perform(self, action_type, x=None, y=None, key=None, delay=1.0):
+        """The input for one step, without its wait."""
+        if action_type == "click":
+            print(f"   🖱️  Clicking at ({x}, {y})")
+            self.automation.click(x, y)
+            print(f"   ✅ Click executed")
+            
+        elif action_type == "key":
+            print(f"   ⌨️  Pressing key: {key}")
+            self.automation.press_key(key)
+            print(f"   ✅ Key pressed")
+            
+        elif action_type == "wait":
+            print(f"   ⏳ Waiting {delay} seconds")
+    
     def execute_step(self, step_name, action_type, x=None, y=None, key=None, delay=1.0):
         """Execute a named step with error handling."""
         print(f"🔄 STEP: {step_name}")
         
         try:
-            if action_type == "click":
-                print(f"   🖱️  Clicking at ({x}, {y})")
-                self.automation.click(x, y)
-                print(f"   ✅ Click executed")
-                
-            elif action_type == "key":
-                print(f"   ⌨️  Pressing key: {key}")
-                self.automation.press_key(key)
-                print(f"   ✅ Key pressed")
-                
-            elif action_type == "wait":
-                print(f"   ⏳ Waiting {delay} seconds")
+            before = None
+            if self.waiter and action_type in ("click", "key"):
+                before = self.waiter.snapshot()
+            
+            self.perform(action_type, x, y, key, delay)
                 
-            time.sleep(delay)
+            wait = delay if action_type == "wait" else self.timing.wait_for(step_name, delay)
+            if before is not None:
+                self.waiter.settle(step_name, wait, before)
+                self.timing.learn_from(step_name, self.waiter)
+            else:
+                time.sleep(wait)
             print(f"   ✅ STEP COMPLETED: {step_name}")
             return True
             
         except Exception as e:
             print(f"   ❌ STEP FAILED: {step_name} - {e}")
+            self.timing.record_failure(step_name)
             return False
     
-    def process_single_image(self, image_num):
-        """Process one image with named steps."""
-        print(f"\n🎯 === PROCESSING IMAGE #{image_num} ===")
-        
-        if not self.automation.focus_window():
-            print("❌ Could not focus window")
-            return False
-        
-        steps = [
+    def workflow_steps(self):
+        """The per-image steps, with each step's default delay and what that delay waits for."""
+        return [
             # Step 1: Click Use It button
             {
                 "name": "CLICK_USE_IT_BUTTON",
                 "type": "click",
                 "x": 567,
                 "y": 648,
-                "delay": 4.0
+                "delay": 4.0,
+                "wait": DEVICE_PROCESSING
             },
             
             # Step 2: Click Next button (AI remove bg dialog)
@@ -62,7 +84,8 @@ class NamedStepAutomation:
                 "type": "click",
                 "x": 567,
                 "y": 702,
-                "delay": 3.0
+                "delay": 3.0,
+                "wait": DEVICE_PROCESSING
             },
             
             # Step 3: Click size input field
@@ -71,7 +94,8 @@ class NamedStepAutomation:
                 "type": "click", 
                 "x": 1024,
                 "y": 443,
-                "delay": 2.0
+                "delay": 2.0,
+                "wait": UI_BUSY
             },
             
             # Step 4: Clear field
@@ -80,7 +104,8 @@ class NamedStepAutomation:
                 "type": "click",
                 "x": 970,
                 "y": 440,
-                "delay": 1.0
+                "delay": 1.0,
+                "wait": UI_BUSY
             },
             
             # Step 5: Delete existing text
@@ -88,14 +113,16 @@ class NamedStepAutomation:
                 "name": "DELETE_TEXT_1",
                 "type": "key",
                 "key": "backspace",
-                "delay": 0.2
+                "delay": 0.2,
+                "wait": UI_BUSY
             },
             
             {
                 "name": "DELETE_TEXT_2", 
                 "type": "key",
                 "key": "backspace",
-                "delay": 0.5
+                "delay": 0.5,
+                "wait": UI_BUSY
             },
             
             # Step 6: Type new size
@@ -103,21 +130,24 @@ class NamedStepAutomation:
                 "name": "TYPE_1",
                 "type": "key", 
                 "key": "1",
-                "delay": 0.1
+                "delay": 0.1,
+                "wait": UI_BUSY
             },
             
             {
                 "name": "TYPE_6_FIRST",
                 "type": "key",
                 "key": "6", 
-                "delay": 0.1
+                "delay": 0.1,
+                "wait": UI_BUSY
             },
             
             {
                 "name": "TYPE_6_SECOND",
                 "type": "key",
                 "key": "6",
-                "delay": 1.0
+                "delay": 1.0,
+                "wait": UI_BUSY
             },
             
             # Step 7: Tab to next field
@@ -125,7 +155,8 @@ class NamedStepAutomation:
                 "name": "TAB_TO_NEXT_FIELD",
                 "type": "key",
                 "key": "tab",
-                "delay": 0.5
+                "delay": 0.5,
+                "wait": UI_BUSY
             },
             
             # Step 8: Click confirmation
@@ -134,7 +165,8 @@ class NamedStepAutomation:
                 "type": "click",
                 "x": 963,
                 "y": 559, 
-                "delay": 3.0
+                "delay": 3.0,
+                "wait": DEVICE_PROCESSING
             },
             
             # Step 9: Navigate back - First click
@@ -143,7 +175,8 @@ class NamedStepAutomation:
                 "type": "click",
                 "x": 903,
                 "y": 129,
-                "delay": 1.0
+                "delay": 1.0,
+                "wait": UI_BUSY
             },
             
             # Step 10: Return to gallery
@@ -152,7 +185,8 @@ class NamedStepAutomation:
                 "type": "click",
                 "x": 1015,
                 "y": 113,
-                "delay": 1.0
+                "delay": 1.0,
+                "wait": UI_BUSY
             },
             
             # Step 14: Click at tracked position (FINAL LOOP POINT)
@@ -161,7 +195,8 @@ class NamedStepAutomation:
                 "type": "click", 
                 "x": 1014,
                 "y": 129,
-                "delay": 2.0
+                "delay": 2.0,
+                "wait": UI_BUSY
             },
             
             # Step 15: Click at new coordinate
@@ -170,9 +205,65 @@ class NamedStepAutomation:
                 "type": "click",
                 "x": 25,
                 "y": 40,
-                "delay": 2.0
+                "delay": 2.0,
+                "wait": UI_BUSY
             }
         ]
+    
+    def add_image_steps(self, graph, image_num, after=None, lane=IPHONE):
+        """
+        Add one image's workflow to a StepGraph as a chain of steps.
+
+        Each step's delay becomes its wait, ended early once the screen
+        settles (like execute_step), and its wait kind tells the scheduler
+        what may overlap it.
+
+        Returns:
+            Name of the last step, for the next image to depend on
+        """
+        previous = graph.add(f"{image_num}:FOCUS_WINDOW", self.automation.focus_window,
+                             lane=lane, after=[after])
+        for step in self.workflow_steps():
+            wait = self.timing.wait_for(step["name"], step["delay"])
+            action, until, finish = self._graph_step(step, wait)
+            previous = graph.add(f"{image_num}:{step['name']}", action, lane=lane, after=[previous],
+                                 wait=wait, kind=step["wait"], until=until, finish=finish, estimate=0.1)
+        return previous
+    
+    def _graph_step(self, step, wait):
+        """(action, until, finish) for a workflow step run by the PipelineScheduler."""
+        probe = {}
+        
+        def action():
+            print(f"🔄 STEP: {step['name']}")
+            before = self.waiter.snapshot() if self.waiter else None
+            self.perform(step["type"], step.get("x"), step.get("y"), step.get("key"), step["delay"])
+            if before is not None:
+                probe['settled'] = self.waiter.probe(before)
+        
+        def until():
+            return 'settled' in probe and probe['settled']()
+        
+        def finish(waited, early):
+            settle = probe.get('settled')
+            if settle is None:
+                return
+            # A wait that overran its deadline was not being watched (another
+            # lane's action held the scheduler), so it says nothing about the step
+            if early or waited <= wait + self.waiter.stable_for:
+                self.timing.learn(step["name"], settle.outcome, settle.latency, self.waiter.settle_tail)
+        
+        return action, (until if self.waiter else None), finish
+    
+    def process_single_image(self, image_num):
+        """Process one image with named steps."""
+        print(f"\n🎯 === PROCESSING IMAGE #{image_num} ===")
+        
+        if not self.automation.focus_window():
+            print("❌ Could not focus window")
+            return False
+        
+        steps = self.workflow_steps()
         
         # Execute each step
         for i, step in enumerate(steps, 1):
@@ -189,8 +280,12 @@ class NamedStepAutomation:
             
             if not success:
                 print(f"❌ AUTOMATION FAILED AT STEP: {step['name']}")
+                self.timing.save()
                 return False
         
+        self.timing.save()
+        if self.waiter:
+            print(self.waiter.report())
         print(f"\n✅ IMAGE #{image_num} COMPLETED SUCCESSFULLY!")
         return True
 
@@ -211,24 +306,128 @@ def run_image(image_num):
     
     # Navigate to gallery
     print("📂 Navigating to gallery...")
+    before = navigator.waiter.snapshot()
     if not navigator.navigate_to_gallery():
         print("❌ Failed to navigate to gallery")
         return False
-    time.sleep(1.5)
+    navigator.waiter.settle("GALLERY_READY", 1.5, before)
     
     # Select image
     print(f"🖱️  Selecting Image #{image_num}...")
+    before = navigator.waiter.snapshot()
     if not navigator.select_next_image():
         print(f"❌ Failed to select Image #{image_num}")
         return False
-    time.sleep(1.5)
+    navigator.waiter.settle("IMAGE_SELECTED", 1.5, before)
     
     # Run workflow
     automation = NamedStepAutomation()
     return automation.process_single_image(image_num)
 
+def prewarm_templates(directory="images"):
+    """Load every template PNG into the shared registry so later matches skip the disk read."""
+    registry = get_template_registry()
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        if name.lower().endswith('.png'):
+            registry.get(os.path.join(directory, name))
+
+def _until_still(waiter, fn):
+    """(action, until) for a graph step whose wait may end once the screen has changed and holds still."""
+    probe = {}
+    
+    def action():
+        before = waiter.snapshot()
+        result = fn()
+        probe['still'] = waiter.probe(before)
+        return result
+    
+    return action, lambda: 'still' in probe and probe['still']()
+
+def add_android_steps(graph, indices, serial=None, estimate=10.0):
+    """
+    Add Android gallery loops (android/gallery_loop.py) to a StepGraph on the ANDROID lane.
+    
+    Add them after the iPhone steps so the iPhone keeps priority: a loop
+    takes far longer than any UI_BUSY wait, so it only starts while the
+    iPhone lane is held by a DEVICE_PROCESSING wait, or once the iPhone
+    steps are done.
+    
+    Args:
+        graph: StepGraph to add to
+        indices: 1-based gallery positions (gallery_loop.POSITIONS) to process
+        serial: Device to use (default: the first attached device)
+        estimate: Expected seconds per loop
+    """
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'android'))
+    from adb_transport import ensure_device, get_session
+    from gallery_loop import POSITIONS, process_position
+    from gestures import MotionEventCompiler
+    
+    session = get_session(serial or ensure_device())
+    compiler = MotionEventCompiler()
+    for idx in indices:
+        gx, gy = POSITIONS[idx - 1]
+        # Loops are independent: a failed one does not skip the rest
+        graph.add(f"android:{idx}:process_position",
+                  lambda i=idx, x=gx, y=gy: process_position(i, x, y, session=session, compiler=compiler),
+                  lane=ANDROID, estimate=estimate)
+
+def run_images_pipelined(image_nums, android_indices=()):
+    """
+    Run several images as one step graph so each wait is filled with other work.
+    
+    Gallery coordinates for every image and the template cache are prepared
+    in the background during the first waits; the iPhone steps themselves
+    stay in order, each image starting once the previous one is back at the
+    gallery, so on its own the iPhone saves little. Its DEVICE_PROCESSING
+    waits (about 10s per image) are filled by Android gallery loops for
+    `android_indices`, if given, run on the first attached phone.
+    """
+    from gallery_navigator import GalleryNavigator
+    
+    navigator = GalleryNavigator()
+    automation = NamedStepAutomation()
+    graph = StepGraph()
+    cells = {}
+    
+    graph.add("prewarm_templates", prewarm_templates, estimate=0.2)
+    previous = None
+    for image_num in image_nums:
+        coordinates = graph.add(
+            f"{image_num}:coordinates",
+            lambda n=image_num: cells.__setitem__(n, divmod(n - 1, navigator.images_per_row)),
+            estimate=0.001)
+        action, until = _until_still(navigator.waiter, navigator.navigate_to_gallery)
+        gallery = graph.add(f"{image_num}:navigate_to_gallery", action, lane=IPHONE, after=[previous],
+                            wait=1.5, kind=UI_BUSY, until=until)
+        action, until = _until_still(navigator.waiter,
+                                     lambda n=image_num: navigator.select_specific_image(*cells[n]))
+        selected = graph.add(f"{image_num}:select_image", action, lane=IPHONE, after=[gallery, coordinates],
+                             wait=1.5, kind=UI_BUSY, until=until)
+        previous = automation.add_image_steps(graph, image_num, after=selected)
+    if android_indices:
+        add_android_steps(graph, android_indices)
+    
+    scheduler = PipelineScheduler()
+    success = scheduler.run(graph)
+    automation.timing.save()
+    print(scheduler.report())
+    return success
+
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 2 and sys.argv[1] == "--pipeline":
+        args = sys.argv[2:]
+        split = args.index("--android") if "--android" in args else len(args)
+        image_nums = [int(arg) for arg in args[:split]]
+        android_indices = [int(arg) for arg in args[split + 1:]]
+        print(f"🚀 Running pipelined Named Step Automation for images {image_nums}"
+              + (f" (Android gallery loops {android_indices} alongside)" if android_indices else ""))
+        print("=" * 60)
+        if run_images_pipelined(image_nums, android_indices):
+            print(f"\n🎉 SUCCESS! Images {image_nums} completed!")
+        else:
+            print("\n❌ FAILED! Not every image completed!")
+    elif len(sys.argv) > 1:
         image_num = int(sys.argv[1])
         print(f"🚀 Running Named Step Automation for Image #{image_num}")
         print("=" * 60)
@@ -242,3 +441,5 @@ if __name__ == "__main__":
     else:
         print("Usage: python3 named_step_automation.py <image_number>")
         print("Example: python3 named_step_automation.py 6")
+        print("         python3 named_step_automation.py --pipeline 1 2 3")
+        print("         python3 named_step_automation.py --pipeline 1 2 3 --android 1 2 3")
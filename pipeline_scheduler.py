@@ -0,0 +1,248 @@
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+# What a step's wait is spent on, which decides what may run during it
+NO_WAIT = 'none'
+UI_BUSY = 'ui_busy'                        # Screen transition: lane locked, only work that fits the wait
+DEVICE_PROCESSING = 'device_processing'    # App computing on-device: lane locked, any other work may run
+IDLE = 'idle'                              # Safety pause only: lane free for independent steps
+
+WAIT_KINDS = (NO_WAIT, UI_BUSY, DEVICE_PROCESSING, IDLE)
+
+# Step states
+PENDING = 'pending'
+RUNNING = 'running'
+WAITING = 'waiting'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class Step:
+    """One node of a StepGraph: an action, the wait that follows it and what it depends on."""
+
+    def __init__(self, name: str, action: Callable[[], Any], lane: Optional[str], after: Sequence[str],
+                 wait: float, kind: str, until: Optional[Callable[[], bool]],
+                 finish: Optional[Callable[[float, bool], None]], estimate: float):
+        self.name = name
+        self.action = action
+        self.lane = lane
+        self.after = tuple(after)
+        self.wait = wait
+        self.kind = kind
+        self.until = until
+        self.finish = finish
+        self.estimate = estimate
+
+        self.state = PENDING
+        self.started: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self.wait_started: Optional[float] = None
+        self.duration = 0.0
+        self.waited = 0.0
+        self.error: Optional[str] = None
+
+
+class StepGraph:
+    """
+    Dependency graph of workflow steps.
+
+    Steps are added in a valid order (dependencies first), so the graph is
+    acyclic by construction. A step on a lane (a device) holds it while its
+    action runs and, for UI_BUSY and DEVICE_PROCESSING waits, until the
+    wait ends; steps without a lane are background work (pre-computing
+    coordinates, loading templates) that can fill those waits.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, Step] = {}
+
+    def add(self, name: str, action: Callable[[], Any], lane: Optional[str] = None,
+            after: Sequence[Optional[str]] = (), wait: float = 0.0, kind: str = NO_WAIT,
+            until: Optional[Callable[[], bool]] = None,
+            finish: Optional[Callable[[float, bool], None]] = None,
+            estimate: float = 0.0) -> str:
+        """
+        Add a step.
+
+        Args:
+            name: Unique step name
+            action: Called with no arguments; the step fails if it raises or returns False
+            lane: Device the step drives (None for background work)
+            after: Names of steps that must finish (including their waits) first; None entries are ignored
+            wait: Seconds to wait after the action (an upper bound when `until` is given)
+            kind: One of WAIT_KINDS
+            until: Polled during the wait; ends it early once it returns True
+            finish: Called as finish(seconds_waited, ended_early) when the wait ends
+            estimate: Expected action duration in seconds until one has been measured
+
+        Returns:
+            The step name, for use in later `after` lists
+        """
+        if name in self.steps:
+            raise ValueError(f"Duplicate step: {name}")
+        if kind not in WAIT_KINDS:
+            raise ValueError(f"Unknown wait kind: {kind}")
+        after = [a for a in after if a is not None]
+        for dep in after:
+            if dep not in self.steps:
+                raise ValueError(f"Step {name} depends on unknown step {dep}")
+        self.steps[name] = Step(name, action, lane, after, wait, kind, until, finish, estimate)
+        return name
+
+
+class PipelineScheduler:
+    """
+    Runs a StepGraph on one thread, filling each step's wait with other ready work.
+
+    Actions run one at a time (they share the mouse, keyboard and screen
+    capture), but a wait no longer idles the whole batch: while a lane
+    waits, the scheduler starts the next ready step that the wait kind
+    allows: device steps in the order they were added, then background
+    work.
+
+    - UI_BUSY: other lanes and background work may run if their estimated
+      duration fits in the time left, so the lane resumes on time.
+    - DEVICE_PROCESSING: the wait is a lower bound on slow on-device work,
+      so any ready step on another lane or in the background may run.
+    - IDLE: the lane is not held; independent steps on the same lane run too.
+
+    Dependents of a step always wait for its wait to end. A failed step
+    skips everything that depends on it; independent steps carry on.
+    """
+
+    def __init__(self, poll: float = 0.05, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            poll: Seconds between `until` checks while nothing can run
+            clock: Monotonic clock
+            sleep: Sleep function (e.g. a cancellable one)
+        """
+        self.poll = poll
+        self.clock = clock
+        self.sleep = sleep
+        # Measured action durations by step name, refined across runs
+        self.durations: Dict[str, float] = {}
+
+        self.wall = 0.0
+        self.sequential = 0.0
+        self.overlapped = 0.0
+        self.waited: Dict[str, float] = {}
+        self.graph: Optional[StepGraph] = None
+
+    def _estimate(self, step: Step) -> float:
+        return self.durations.get(step.name, step.estimate)
+
+    def _blocked(self, step: Step, waiting: List[Step], now: float) -> bool:
+        for other in waiting:
+            if step.lane is not None and other.lane == step.lane and other.kind != IDLE:
+                return True
+            if other.kind == UI_BUSY and now + self._estimate(step) > other.deadline:
+                return True
+        return False
+
+    def _end_wait(self, step: Step, now: float, early: bool) -> None:
+        step.state = DONE
+        step.waited = now - step.wait_started
+        self.waited[step.kind] = self.waited.get(step.kind, 0.0) + step.waited
+        if step.finish:
+            try:
+                step.finish(step.waited, early)
+            except Exception as e:
+                print(f"⚠️ {step.name}: finish callback failed: {e}")
+
+    def _fail(self, steps: Dict[str, Step], step: Step, error: str) -> None:
+        step.state = FAILED
+        step.error = error
+        print(f"❌ {step.name} failed: {error}")
+        # Skip everything downstream
+        doomed = {step.name}
+        for other in steps.values():
+            if other.state == PENDING and doomed.intersection(other.after):
+                other.state = SKIPPED
+                doomed.add(other.name)
+
+    def run(self, graph: StepGraph) -> bool:
+        """
+        Run every step.
+
+        Returns:
+            True if all steps succeeded
+        """
+        self.graph = graph
+        steps = graph.steps
+        start = self.clock()
+        waiting: List[Step] = []
+
+        while True:
+            now = self.clock()
+            for step in list(waiting):
+                if now >= step.deadline:
+                    waiting.remove(step)
+                    self._end_wait(step, now, early=False)
+                elif step.until is not None and step.until():
+                    waiting.remove(step)
+                    self._end_wait(step, self.clock(), early=True)
+
+            now = self.clock()
+            candidates = [s for s in steps.values()
+                          if s.state == PENDING and all(steps[d].state == DONE for d in s.after)
+                          and not self._blocked(s, waiting, now)]
+            # Device steps first; background work fills the gaps
+            ready = next((s for s in candidates if s.lane is not None), None) or \
+                next(iter(candidates), None)
+            if ready is None:
+                if not waiting:
+                    break
+                nearest = min(s.deadline for s in waiting)
+                self.sleep(max(0.0, min(self.poll, nearest - now)))
+                continue
+
+            ready.state = RUNNING
+            ready.started = self.clock()
+            try:
+                result = ready.action()
+                error = "returned False" if result is False else None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            finished = self.clock()
+            ready.duration = finished - ready.started
+            self.durations[ready.name] = ready.duration
+            if waiting:
+                self.overlapped += ready.duration
+            if error:
+                self._fail(steps, ready, error)
+                continue
+
+            ready.wait_started = finished
+            if ready.wait > 0:
+                ready.state = WAITING
+                ready.deadline = finished + ready.wait
+                waiting.append(ready)
+            else:
+                self._end_wait(ready, finished, early=False)
+
+        self.wall = self.clock() - start
+        # A wait that overran its bound while another action ran would have
+        # ended on time back-to-back
+        self.sequential = sum(s.duration + min(s.waited, s.wait) for s in steps.values())
+        return all(s.state == DONE for s in steps.values())
+
+    def report(self) -> str:
+        steps = self.graph.steps.values() if self.graph else []
+        counts: Dict[str, int] = {}
+        for step in steps:
+            counts[step.state] = counts.get(step.state, 0) + 1
+        saved = self.sequential - self.wall
+        lines = [f"🧵 Pipeline: {len(steps)} steps ({', '.join(f'{n} {s}' for s, n in sorted(counts.items()))}) "
+                 f"in {self.wall:.1f}s vs {self.sequential:.1f}s back-to-back (saved {saved:+.1f}s), "
+                 f"{self.overlapped:.1f}s of work done during waits"]
+        for kind, seconds in sorted(self.waited.items(), key=lambda kv: -kv[1]):
+            if kind != NO_WAIT:
+                lines.append(f"   {kind:18s} {seconds:6.1f}s waiting")
+        for step in steps:
+            if step.state == FAILED:
+                lines.append(f"   ❌ {step.name}: {step.error}")
+        return "\n".join(lines)
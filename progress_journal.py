@@ -0,0 +1,283 @@
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+
+# Per-image pipeline, in order (the step names JobContext.run_step reports)
+IMAGE_STEPS = ('navigate_to_gallery', 'select_image', 'core_workflow')
+
+# Step outcomes
+STARTED = 'started'
+OK = 'ok'
+FAILED = 'failed'
+
+# Record kinds, one tab-separated line each
+_CURSOR = 'C'  # C <time> <row> <col>
+_STEP = 'S'    # S <time> <image> <step> <outcome>
+_RESET = 'R'   # R <time>
+
+_HEADER = '# progress journal v1\n'
+
+# resume_window that trusts every earlier record (restarting a crashed batch)
+RESUME_ANY = float('inf')
+
+
+class ProgressJournal:
+    """
+    Append-only record of gallery progress: the next grid position and,
+    per image, the last step reached and how it went.
+
+    The file is replayed once when the journal is opened; after that every
+    read is served from memory. Each record is one line written and flushed
+    straight away, so a crashed process loses nothing; fsync (which costs a
+    disk round trip) is batched: it runs once `sync_every` records are
+    pending or when a record is written `sync_interval` seconds or more
+    after the previous fsync, and always on close. A torn last line from a
+    power cut is dropped on replay instead of losing the whole state.
+
+    Per-image progress is only resumed from records written since the
+    journal was opened, widened by `resume_window`: older records describe
+    an earlier run whose gallery may no longer match. To pick up a batch
+    after a crash, set it (e.g. to RESUME_ANY) through get_journal() or the
+    entry points' --resume flag.
+
+    Once `compact_after` records have piled up the journal is rewritten as
+    a snapshot (one line for the cursor, one per image) via a temp file and
+    os.replace, so it never grows without bound.
+    """
+
+    def __init__(self, path: str = "gallery_progress.journal", sync_every: int = 8,
+                 sync_interval: float = 1.0, compact_after: int = 500,
+                 legacy_state: Optional[str] = "gallery_state.json", resume_window: float = 0.0):
+        """
+        Args:
+            path: Journal file
+            sync_every: Records between fsyncs
+            sync_interval: Seconds since the last fsync after which writing a record
+                           also fsyncs (checked on writes only; close() syncs the rest)
+            compact_after: Records appended before the journal is rewritten as a snapshot
+            legacy_state: Old gallery_state.json whose position seeds a new journal
+            resume_window: Seconds before opening whose records resume_step still
+                           trusts (RESUME_ANY: every record, to pick up after a crash)
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_after = compact_after
+        # Session start, at the records' millisecond precision
+        self.opened = float(f"{time.time():.3f}")
+        self.resume_window = resume_window
+
+        self._lock = threading.RLock()
+        self.cursor: Tuple[int, int] = (0, 0)
+        self.updated: Optional[float] = None
+        self._images: Dict[int, Tuple[str, str, float]] = {}  # image → (step, outcome, time)
+
+        self.records = 0       # Records in the file
+        self._snapshot = 0     # ...of which the last compaction wrote
+        self.appended = 0
+        self.syncs = 0
+        self.compactions = 0
+        self.dropped_lines = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        existed = os.path.exists(self.path)
+        if existed:
+            self._replay()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if not existed:
+            self._file.write(_HEADER)
+            if legacy_state and os.path.exists(legacy_state):
+                self._import_legacy(legacy_state)
+            self.sync()
+
+    def _replay(self) -> None:
+        good = 0
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for raw in data.splitlines(keepends=True):
+            if not raw.endswith(b'\n'):
+                self.dropped_lines += 1  # Torn final write
+                break
+            line = raw.decode('utf-8', 'replace').rstrip('\n')
+            if line and not line.startswith('#'):
+                try:
+                    self._apply(line.split('\t'))
+                except (ValueError, IndexError):
+                    self.dropped_lines += 1
+                    break
+                self.records += 1
+            good += len(raw)
+        if good < len(data):
+            # Cut the damaged tail so new records start on a clean line
+            with open(self.path, 'r+b') as f:
+                f.truncate(good)
+            print(f"⚠️ Progress journal {self.path}: dropped a damaged tail ({len(data) - good} bytes)")
+
+    def _apply(self, fields) -> None:
+        kind, when = fields[0], float(fields[1])
+        if kind == _CURSOR:
+            self.cursor = (int(fields[2]), int(fields[3]))
+        elif kind == _STEP:
+            self._images[int(fields[2])] = (fields[3], fields[4], when)
+        elif kind == _RESET:
+            self.cursor = (0, 0)
+            self._images.clear()
+        else:
+            raise ValueError(f"Unknown record kind {kind!r}")
+        self.updated = when
+
+    def _import_legacy(self, legacy_state: str) -> None:
+        try:
+            with open(legacy_state, 'r') as f:
+                state = json.load(f)
+            self._append(_CURSOR, int(state.get('current_row', 0)), int(state.get('current_col', 0)))
+            print(f"📥 Imported gallery position from {legacy_state}")
+        except (OSError, ValueError, TypeError) as e:
+            print(f"⚠️ Could not import {legacy_state}: {e}")
+
+    def _append(self, kind: str, *fields: Any) -> None:
+        when = time.time()
+        record = [kind, f"{when:.3f}", *(str(f) for f in fields)]
+        with self._lock:
+            self._apply(record)
+            self._file.write('\t'.join(record) + '\n')
+            self._file.flush()
+            self.records += 1
+            self.appended += 1
+            self._pending += 1
+            if (self._pending >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self.sync()
+            if self.records - self._snapshot >= self.compact_after:
+                self.compact()
+
+    def sync(self) -> None:
+        """fsync everything written so far."""
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+            self._last_sync = time.monotonic()
+            self.syncs += 1
+
+    def compact(self) -> None:
+        """Rewrite the journal as a snapshot of the current state."""
+        with self._lock:
+            tmp = self.path + ".tmp"
+            lines = [_HEADER]
+            stamp = f"{self.updated or time.time():.3f}"
+            lines.append('\t'.join([_CURSOR, stamp, str(self.cursor[0]), str(self.cursor[1])]) + '\n')
+            for image, (step, outcome, when) in sorted(self._images.items()):
+                lines.append('\t'.join([_STEP, f"{when:.3f}", str(image), step, outcome]) + '\n')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self.records = self._snapshot = len(lines) - 1
+            self._pending = 0
+            self.compactions += 1
+
+    # Gallery position
+    def set_cursor(self, row: int, col: int) -> None:
+        """Record the next grid position to select (skipped if unchanged)."""
+        if (row, col) != self.cursor:
+            self._append(_CURSOR, row, col)
+
+    def reset(self) -> None:
+        """Back to the first image with no per-image progress."""
+        self._append(_RESET)
+        self.compact()
+
+    # Per-image steps
+    def record(self, image: int, step: str, outcome: str) -> None:
+        self._append(_STEP, image, step, outcome)
+
+    def last(self, image: int) -> Optional[Tuple[str, str, float]]:
+        """(step, outcome, time) of the last record for an image, or None."""
+        return self._images.get(image)
+
+    def completed(self, image: int, steps: Sequence[str] = IMAGE_STEPS) -> bool:
+        last = self._images.get(image)
+        return last is not None and last[0] == steps[-1] and last[1] == OK
+
+    def resume_step(self, image: int, steps: Sequence[str] = IMAGE_STEPS) -> int:
+        """
+        Index into `steps` where processing of an image should pick up.
+
+        The step that failed (or was running when the process died) is
+        retried; a step that succeeded moves on to the next one. An image
+        with no history, one that already finished, or one whose last record
+        predates this session (see resume_window) starts from 0.
+        """
+        last = self._images.get(image)
+        if last is None or last[0] not in steps or last[2] < self.opened - self.resume_window:
+            return 0
+        index = steps.index(last[0])
+        if last[1] != OK:
+            return index
+        return index + 1 if index + 1 < len(steps) else 0
+
+    def run(self, image: int, step: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run one step of an image, journaling that it started and how it ended.
+
+        A step fails if it raises (re-raised after recording) or returns False.
+        """
+        self.record(image, step, STARTED)
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            self.record(image, step, FAILED)
+            raise
+        self.record(image, step, OK if result is not False else FAILED)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self.sync()
+            self._file.close()
+
+    def __enter__(self) -> "ProgressJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def stats(self) -> str:
+        return (f"📒 Progress journal: {self.appended} records appended, {self.syncs} fsyncs, "
+                f"{self.compactions} compactions, {self.records} records on disk")
+
+
+_default_journal = None
+
+
+def get_journal(resume_window: Optional[float] = None) -> ProgressJournal:
+    """
+    Process-wide journal shared by every GalleryNavigator.
+
+    Args:
+        resume_window: If given, replaces the journal's resume_window
+    """
+    global _default_journal
+    if _default_journal is None:
+        _default_journal = ProgressJournal()
+        atexit.register(_default_journal.close)
+    if resume_window is not None:
+        _default_journal.resume_window = resume_window
+    return _default_journal
+
+
+def set_journal(journal: ProgressJournal) -> None:
+    """Replace the shared journal, e.g. with one at another path."""
+    global _default_journal
+    _default_journal = journal
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from action_log import load_recording_data
+from iphone_automation import iPhoneAutomation
+from replay_plan import ReplayPlan, SUPPORTED_TYPES
+from screen_wait import ScreenWaiter
+
+
+class GapProfile:
+    """What the screen did during one recorded gap (from the previous action to this one)."""
+
+    def __init__(self, index: int, gap: float):
+        self.index = index
+        self.gap = gap
+        self.settle = 0.0       # Seconds after the previous action until the screen last changed
+        self.busy_at_end = False  # Screen still changing shortly before this action
+
+    def merge(self, other: "GapProfile") -> None:
+        self.settle = max(self.settle, other.settle)
+        self.busy_at_end = self.busy_at_end or other.busy_at_end
+
+
+class ReplayCompressor:
+    """
+    Removes human think-time from a recording while keeping waits on the UI.
+
+    A calibration replay runs the recording at its original timing and watches
+    the screen during every gap. If the screen was still changing just before
+    the next action, the user was waiting on the app: the gap is a UI wait and
+    is kept (optionally replaced by a change-detection wait on replay).
+    Otherwise the UI settled early and the rest of the gap was human idle
+    time, so the gap is cut to the observed settle time plus a margin.
+    """
+
+    def __init__(self, automation: iPhoneAutomation, waiter: Optional[ScreenWaiter] = None,
+                 min_gap: float = 0.15, margin: float = 0.3, busy_tail: float = 0.3):
+        self.automation = automation
+        self.waiter = waiter or ScreenWaiter.for_automation(automation)
+        self.min_gap = min_gap
+        self.margin = margin
+        # A change within this many seconds before the next action marks a UI wait
+        self.busy_tail = busy_tail
+
+    def calibrate(self, actions: List[Dict[str, Any]], runs: int = 1) -> List[GapProfile]:
+        """Replay at original timing `runs` times and profile every gap."""
+        plan = ReplayPlan.compile(actions)
+        profiles: Optional[List[GapProfile]] = None
+        for run in range(runs):
+            print(f"🔬 Calibration replay {run + 1}/{runs} ({plan.duration:.1f}s)...")
+            observed = self._observe(plan)
+            if profiles is None:
+                profiles = observed
+            else:
+                for mine, theirs in zip(profiles, observed):
+                    mine.merge(theirs)
+        return profiles or []
+
+    def _observe(self, plan: ReplayPlan) -> List[GapProfile]:
+        plan.refresh_window(self.automation)
+        waiter = self.waiter
+        profiles = []
+        start = time.monotonic()
+        last_action_at = start
+        previous_offset = 0.0
+        for i, step in enumerate(plan.steps):
+            profile = GapProfile(i, step.offset - previous_offset)
+            deadline = start + step.offset
+            previous = waiter.snapshot()
+            last_change = None
+            while time.monotonic() + waiter.interval < deadline:
+                time.sleep(waiter.interval)
+                current = waiter.snapshot()
+                if waiter.difference(current, previous) > waiter.threshold:
+                    last_change = time.monotonic()
+                previous = current
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+            if last_change is not None:
+                profile.settle = last_change - last_action_at
+                profile.busy_at_end = deadline - last_change <= self.busy_tail
+            profiles.append(profile)
+
+            self.automation._ensure_focus()
+            plan.execute_step(self.automation, step)
+            last_action_at = time.monotonic()
+            previous_offset = step.offset
+        return profiles
+
+    def compress(self, actions: List[Dict[str, Any]], profiles: List[GapProfile]) -> List[Dict[str, Any]]:
+        """Actions with idle gaps collapsed; UI waits keep their gap and are tagged wait='ui'."""
+        compressed = []
+        t = 0.0
+        for action, profile in zip(actions, profiles):
+            if profile.busy_at_end:
+                gap = profile.gap
+                kind = 'ui'
+            else:
+                gap = min(profile.gap, max(self.min_gap, profile.settle + self.margin))
+                kind = 'idle'
+            t += gap
+            out = dict(action)
+            out['timestamp'] = round(t, 3)
+            out['wait'] = kind
+            out['original_gap'] = round(profile.gap, 3)
+            compressed.append(out)
+        return compressed
+
+    @staticmethod
+    def report(compressed: List[Dict[str, Any]]) -> str:
+        original = sum(a['original_gap'] for a in compressed)
+        new = compressed[-1]['timestamp'] if compressed else 0.0
+        ui = [a for a in compressed if a['wait'] == 'ui']
+        lines = [f"📉 Per loop: {original:.1f}s → {new:.1f}s (saves {original - new:.1f}s, "
+                 f"{(original - new) / original * 100 if original else 0:.0f}%)",
+                 f"   {len(compressed) - len(ui)} idle gaps collapsed, {len(ui)} UI waits kept"]
+        previous = 0.0
+        for i, a in enumerate(compressed, 1):
+            gap = a['timestamp'] - previous
+            previous = a['timestamp']
+            target = f"({a['x']:.0f}, {a['y']:.0f})" if 'x' in a else a.get('key', '')
+            lines.append(f"   {i:3d}. {a['type']:6s} {target:14s} {a['wait']:4s} "
+                         f"{a['original_gap']:6.2f}s → {gap:5.2f}s")
+        return "\n".join(lines)
+
+
+def replay_compressed(automation: iPhoneAutomation, actions: List[Dict[str, Any]],
+                      waiter: Optional[ScreenWaiter] = None) -> None:
+    """
+    Replay a compressed recording. Idle gaps are slept as recorded; UI waits
+    become change-detection waits capped at the original gap.
+    """
+    waiter = waiter or ScreenWaiter.for_automation(automation)
+    actions = [a for a in actions if a.get('type') in SUPPORTED_TYPES]
+    plan = ReplayPlan.compile(actions)
+    plan.refresh_window(automation)
+    previous = 0.0
+    before = waiter.snapshot()
+    for i, (action, step) in enumerate(zip(actions, plan.steps), 1):
+        gap = step.offset - previous
+        previous = step.offset
+        if action.get('wait') == 'ui':
+            waiter.settle(f"ACTION_{i}", action.get('original_gap', gap), before)
+        elif gap > 0:
+            time.sleep(gap)
+        before = waiter.snapshot()
+        automation._ensure_focus()
+        plan.execute_step(automation, step)
+    print(waiter.report())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibrate a recording and write a time-compressed copy")
+    parser.add_argument("recording", help="Recording JSON or action log (e.g. recordings/liene_session_*.json)")
+    parser.add_argument("--runs", type=int, default=1, help="Calibration replays (default: 1)")
+    parser.add_argument("--min-gap", type=float, default=0.15, help="Shortest gap kept between actions")
+    parser.add_argument("--margin", type=float, default=0.3, help="Seconds added after the UI settled")
+    parser.add_argument("--out", help="Output path (default: <recording>_compressed.json)")
+    parser.add_argument("--replay", type=int, default=0, help="Replay the compressed recording N times afterwards")
+    args = parser.parse_args()
+
+    automation = iPhoneAutomation()
+    automation.window_title = "Liene Photo HD"
+    if not automation.focus_window():
+        print("❌ Could not find the app window")
+        sys.exit(1)
+
+    data = load_recording_data(args.recording)
+    # Only replayable actions, so gaps line up with the compiled plan's steps
+    actions = [a for a in data['actions'] if a.get('type') in SUPPORTED_TYPES]
+
+    compressor = ReplayCompressor(automation, min_gap=args.min_gap, margin=args.margin)
+    profiles = compressor.calibrate(actions, runs=args.runs)
+    compressed = compressor.compress(actions, profiles)
+
+    out = args.out or os.path.splitext(args.recording)[0] + "_compressed.json"
+    data = dict(data, actions=compressed, total_actions=len(compressed),
+                compressed_from=os.path.basename(args.recording))
+    with open(out, 'w') as f:
+        json.dump(data, f, indent=2)
+    print(f"💾 Compressed recording saved to {out}")
+    print(compressor.report(compressed))
+
+    for _ in range(args.replay):
+        replay_compressed(automation, compressed)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@
 
 import sys
 import os
-import time
 import argparse
 
 # Ensure we can import iphone_automation from project root
@@ -11,6 +10,7 @@ if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
 from iphone_automation import iPhoneAutomation
+from replay_plan import ReplayPlan
 
 
 def expand_path(path: str) -> str:
@@ -33,47 +33,17 @@ def replay_in_loop(recording_path: str, loops: int = 100, delay_seconds: float =
     print(f"Starting optimized looped playback: {loops} loops, {delay_seconds:.2f}s pause between runs")
     print(f"Loaded {len(actions)} actions per loop")
 
-    # Execute loops with minimal overhead
-    for loop_num in range(loops):
-        if loop_num % 10 == 0:  # Progress update every 10 loops
-            print(f"Loop {loop_num + 1}/{loops}")
-
-        # Execute all actions in sequence without replay_recording overhead
-        last_timestamp = 0
-        for action in actions:
-            # Wait for the appropriate time delay (preserve original timing)
-            delay = action['timestamp'] - last_timestamp
-            if delay > 0:
-                time.sleep(delay)
-            
-            # Execute the action directly
-            try:
-                if action['type'] == 'click':
-                    automation.click(action['x'], action['y'], button=action.get('button', 'left'))
-                
-                elif action['type'] == 'scroll':
-                    automation.native_scroll(action['x'], action['y'], 
-                                           delta_x=action['dx'], delta_y=action['dy'])
-                
-                elif action['type'] == 'continuous_scroll':
-                    automation.continuous_scroll(action['x'], action['y'], 
-                                               direction=action['direction'],
-                                               duration=action['duration'],
-                                               speed=action['speed'])
-                
-                elif action['type'] == 'key':
-                    automation.press_key(action['key'])
-                
-            except Exception as e:
-                print(f"Error in loop {loop_num + 1}, action: {e}")
-            
-            last_timestamp = action['timestamp']
-
-        # Pause between loops (except after the last one)
-        if loop_num < loops - 1:
-            time.sleep(delay_seconds)
+    # Compile once: absolute coordinates and deadlines instead of per-action dict dispatch
+    plan = ReplayPlan.compile(actions)
+    completed = plan.run(automation, loops=loops, loop_gap=delay_seconds, progress_every=10)
+    if completed < loops:
+        print(f"\nStopped after {completed}/{loops} loops")
+        print(plan.jitter_report())
+        return False
 
     print(f"\nAll {loops} loops completed!")
+    print(plan.jitter_report())
+    print(automation.focus_manager.report())
     return True
 
 
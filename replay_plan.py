@@ -0,0 +1,192 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import pyautogui
+from scroll_series import batch_series
+
+
+# Step kinds
+CLICK = 0
+SCROLL = 1
+CONTINUOUS_SCROLL = 2
+KEY = 3
+SCROLL_SERIES = 4
+
+_KINDS = {'click': CLICK, 'scroll': SCROLL, 'continuous_scroll': CONTINUOUS_SCROLL, 'key': KEY,
+          'scroll_series': SCROLL_SERIES}
+_NAMES = {v: k for k, v in _KINDS.items()}
+SUPPORTED_TYPES = frozenset(_KINDS)
+
+
+class PlanStep:
+    """One compiled action: its kind, schedule offset and pre-resolved arguments."""
+    __slots__ = ('kind', 'offset', 'x', 'y', 'abs_x', 'abs_y', 'button', 'key', 'dx', 'dy',
+                 'direction', 'duration', 'speed', 'batches')
+
+    def __init__(self, kind: int, offset: float, action: Dict[str, Any]):
+        self.kind = kind
+        self.offset = offset
+        self.x = action.get('x', 0)
+        self.y = action.get('y', 0)
+        self.abs_x = self.abs_y = 0
+        self.button = action.get('button', 'left')
+        self.key = action.get('key')
+        self.dx = action.get('dx', 0)
+        self.dy = action.get('dy', 0)
+        self.direction = action.get('direction')
+        self.duration = action.get('duration', 0.0)
+        self.speed = action.get('speed', 0)
+        # Scroll series are batched once here rather than on every replay
+        self.batches = batch_series(action['t'], action['dx'], action['dy']) if kind == SCROLL_SERIES else None
+
+    def describe(self) -> str:
+        if self.kind == KEY:
+            return f"key {self.key}"
+        return f"{_NAMES[self.kind]} ({self.x}, {self.y})"
+
+
+class ReplayPlan:
+    """
+    A recording compiled once into a flat list of slotted steps.
+
+    Window-relative coordinates are turned into absolute screen coordinates
+    once per window-bounds generation instead of once per action. Each
+    step runs at a monotonic deadline (loop start + recorded offset), so
+    time spent executing actions is absorbed rather than added to the next
+    sleep, and a long loop replay does not drift. The lateness of every
+    step against its deadline is kept for a jitter report.
+    """
+
+    def __init__(self, steps: List[PlanStep]):
+        self.steps = steps
+        self.duration = steps[-1].offset if steps else 0.0
+        self._resolved_for: Optional[Tuple[int, int, int]] = None
+
+        # Jitter (seconds late against the deadline) per step index
+        self.jitter: List[List[float]] = [[] for _ in steps]
+        self.loop_overruns: List[float] = []
+        self.resolves = 0
+
+        # Frame-checked scroll series (off unless verify_scrolls is set)
+        self.verify_scrolls = False
+        self.scroll_checks: List[Any] = []
+
+    @classmethod
+    def compile(cls, actions: List[Dict[str, Any]]) -> "ReplayPlan":
+        steps = []
+        for action in actions:
+            kind = _KINDS.get(action.get('type'))
+            if kind is None:
+                print(f"⚠️ Skipping unsupported action type: {action.get('type')}")
+                continue
+            steps.append(PlanStep(kind, float(action.get('timestamp', 0.0)), action))
+        return cls(steps)
+
+    def resolve(self, window_bounds: Dict[str, int], generation: int = 0) -> None:
+        """Precompute absolute coordinates unless they are current for these bounds."""
+        key = (generation, window_bounds['x'], window_bounds['y'])
+        if key == self._resolved_for:
+            return
+        ox, oy = window_bounds['x'], window_bounds['y']
+        for step in self.steps:
+            step.abs_x = ox + step.x
+            step.abs_y = oy + step.y
+        self._resolved_for = key
+        self.resolves += 1
+
+    def refresh_window(self, automation) -> None:
+        """Re-read the window bounds (cheap through the window index) and re-resolve if they moved."""
+        from window_index import get_window_index
+        automation.focus_window()
+        self.resolve(automation.window_bounds, get_window_index().generation)
+
+    def execute_step(self, automation, step: PlanStep) -> None:
+        """Perform one step immediately (coordinates must already be resolved)."""
+        if step.kind == CLICK:
+            pyautogui.click(step.abs_x, step.abs_y, button=step.button)
+        elif step.kind == KEY:
+            pyautogui.press(step.key)
+        elif step.kind == SCROLL:
+            automation.native_scroll(step.x, step.y, delta_x=step.dx, delta_y=step.dy)
+        elif step.kind == CONTINUOUS_SCROLL:
+            automation.continuous_scroll(step.x, step.y, direction=step.direction,
+                                         duration=step.duration, speed=step.speed)
+        elif step.kind == SCROLL_SERIES:
+            check = automation.scroll_series(step.x, step.y, batches=step.batches,
+                                             verify=self.verify_scrolls)
+            if check is not None:
+                self.scroll_checks.append(check)
+
+    def run(self, automation, loops: int = 1, loop_gap: float = 0.0, speed: float = 1.0,
+            verbose: bool = False, progress_every: int = 0) -> int:
+        """
+        Execute the plan.
+
+        Args:
+            automation: A focused iPhoneAutomation
+            loops: How many times to run the plan
+            loop_gap: Seconds between the last step of a loop and the start of the next
+            speed: Playback speed multiplier
+            verbose: Print every step
+            progress_every: Print a progress line every N loops (0 = never)
+
+        Returns:
+            Number of loops completed (less than loops if cancelled)
+        """
+        cancel = automation.cancel_event
+        period = self.duration / speed + loop_gap
+        origin = time.monotonic()
+        for loop in range(loops):
+            # Stay on the original schedule, but never start a loop early to catch up
+            loop_start = max(origin + loop * period, time.monotonic())
+            if progress_every and loop % progress_every == 0:
+                print(f"Loop {loop + 1}/{loops}")
+            self.refresh_window(automation)
+
+            with automation.action_batch():
+                for i, step in enumerate(self.steps):
+                    deadline = loop_start + step.offset / speed
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0 and cancel.wait(remaining):
+                        print(f"⏹️ Playback cancelled at loop {loop + 1}, action {i + 1}/{len(self.steps)}")
+                        return loop
+                    if cancel.is_set():
+                        return loop
+                    self.jitter[i].append(time.monotonic() - deadline)
+
+                    try:
+                        automation._ensure_focus()
+                        self.execute_step(automation, step)
+                        if verbose:
+                            print(f"  {i + 1}/{len(self.steps)}: {step.describe()}")
+                    except Exception as e:
+                        print(f"❌ Error executing action {i + 1} in loop {loop + 1}: {e}")
+
+            self.loop_overruns.append(time.monotonic() - (loop_start + self.duration / speed))
+            if loop < loops - 1 and loop_gap > 0:
+                next_start = loop_start + period
+                remaining = next_start - time.monotonic()
+                if remaining > 0 and cancel.wait(remaining):
+                    return loop + 1
+        return loops
+
+    def jitter_report(self) -> str:
+        samples = sorted(abs(j) for per_step in self.jitter for j in per_step)
+        if not samples:
+            return "📏 Jitter: no actions executed"
+        p50 = samples[len(samples) // 2] * 1000
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000
+        worst_step = max(range(len(self.jitter)),
+                         key=lambda i: max((abs(j) for j in self.jitter[i]), default=0.0))
+        worst = max(abs(j) for j in self.jitter[worst_step]) * 1000
+        lines = [f"📏 Jitter vs recorded timestamps over {len(samples)} actions: "
+                 f"p50 {p50:.1f}ms, p95 {p95:.1f}ms, max {worst:.1f}ms "
+                 f"(action {worst_step + 1}: {self.steps[worst_step].describe()})"]
+        if self.loop_overruns:
+            lines.append(f"   Loop end vs schedule: avg {sum(self.loop_overruns) / len(self.loop_overruns) * 1000:.1f}ms, "
+                         f"last {self.loop_overruns[-1] * 1000:.1f}ms over {len(self.loop_overruns)} loops; "
+                         f"coordinates resolved {self.resolves}x")
+        if self.scroll_checks:
+            off = [c for c in self.scroll_checks if not c.ok]
+            lines.append(f"   Scroll checks: {len(self.scroll_checks) - len(off)}/{len(self.scroll_checks)} on target"
+                         + (f", worst error {max(c.error for c in off):.0f}px" if off else ""))
+        return "\n".join(lines)
@@ -3,55 +3,58 @@
 import sys
 import os
 import time
-import json
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from batch_processor import BatchProcessor
+from progress_journal import IMAGE_STEPS, RESUME_ANY, get_journal
 
 class Robust16Processor:
-    def __init__(self):
+    def __init__(self, resume=False):
+        # resume: pick up images where a previous (crashed) run left them
+        if resume:
+            get_journal(resume_window=RESUME_ANY)
         self.processor = BatchProcessor()
         self.max_retries = 3
         self.results = {}
         
     def process_specific_image(self, image_num, max_attempts=3):
-        """Process a specific image number with retry logic."""
-        print(f"\n🎯 === PROCESSING IMAGE #{image_num} ===")
+        """Process a specific image number with retry logic.
         
-        # Calculate position for this image (1-indexed to 0-indexed)
-        row = (image_num - 1) // 4
-        col = (image_num - 1) % 4
+        Every attempt picks up at the step the journal says the previous
+        attempt stopped at; with resume, so does the first one after a crash.
+        """
+        print(f"\n🎯 === PROCESSING IMAGE #{image_num} ===")
+        navigator = self.processor.navigator
+        journal = navigator.journal
+        steps = {
+            # step → (message, action, pause after success, pause after failure)
+            'navigate_to_gallery': ("📂 Navigating to gallery...", navigator.navigate_to_gallery, 0, 2),
+            'select_image': (f"🖱️  Selecting Image #{image_num}...", navigator.select_next_image, 1.5, 2),
+            'core_workflow': (f"⚙️  Running workflow for Image #{image_num}...", self.processor.run_core_workflow, 0, 3),
+        }
         
         for attempt in range(1, max_attempts + 1):
             print(f"🔄 Attempt {attempt}/{max_attempts} for Image #{image_num}")
-            print(f"📍 Setting position: Row {row + 1}, Column {col + 1}")
             
             try:
                 # Set exact position for this image
-                self.processor.navigator.save_state(row, col)
-                
-                # Navigate to gallery
-                print("📂 Navigating to gallery...")
-                if not self.processor.navigator.navigate_to_gallery():
-                    print(f"❌ Attempt {attempt}: Failed to navigate to gallery")
-                    time.sleep(2)
-                    continue
+                row, col = navigator.set_image(image_num)
+                print(f"📍 Setting position: Row {row + 1}, Column {col + 1}")
                 
-                # Select the specific image
-                print(f"🖱️  Selecting Image #{image_num}...")
-                if not self.processor.navigator.select_next_image():
-                    print(f"❌ Attempt {attempt}: Failed to select image")
-                    time.sleep(2)
-                    continue
-                
-                # Wait for selection
-                time.sleep(1.5)
-                
-                # Run workflow
-                print(f"⚙️  Running workflow for Image #{image_num}...")
-                if not self.processor.run_core_workflow():
-                    print(f"❌ Attempt {attempt}: Core workflow failed")
-                    time.sleep(3)
+                start = journal.resume_step(image_num)
+                if start:
+                    print(f"↩️  Resuming at {IMAGE_STEPS[start]}")
+                failed = False
+                for step in IMAGE_STEPS[start:]:
+                    message, fn, pause, failure_pause = steps[step]
+                    print(message)
+                    if not journal.run(image_num, step, fn):
+                        print(f"❌ Attempt {attempt}: {step} failed")
+                        time.sleep(failure_pause)
+                        failed = True
+                        break
+                    time.sleep(pause)
+                if failed:
                     continue
                 
                 # Success!
@@ -120,6 +123,7 @@ class Robust16Processor:
         print(f"❌ Failed images: {failed}")
         print(f"📈 Success rate: {successful/16*100:.1f}%")
         print(f"⏰ Total time: {total_time/60:.1f} minutes")
+        print(self.processor.navigator.journal.stats())
         
         # Detailed results
         print(f"\n📋 Detailed Results:")
@@ -130,7 +134,9 @@ class Robust16Processor:
         return successful == 16
 
 def main():
-    processor = Robust16Processor()
+    # --resume: continue a crashed run from the steps its journal recorded
+    resume = "--resume" in sys.argv[1:]
+    processor = Robust16Processor(resume=resume)
     
     print("🤖 Robust 16-Image Processor")
     print("=" * 35)
@@ -139,6 +145,8 @@ def main():
     print("• Automatic retry on failures") 
     print("• Robust error recovery")
     print("• Detailed progress tracking")
+    if resume:
+        print("• Resuming images from the previous run's journal")
     
     input("\nPress Enter to start processing...")
     
@@ -0,0 +1,265 @@
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+
+
+Region = Tuple[int, int, int, int]  # (x, y, width, height) in window coordinates
+
+
+class ScreenWaiter:
+    """
+    Replaces fixed sleeps with waits on what the screen is doing.
+
+    Frames come from any BGR/BGRA capture function, e.g.
+    iPhoneAutomation.screenshot or android ScreencapSource.screenshot.
+    Each frame is reduced to a small grayscale image, and two frames differ
+    when their mean absolute difference exceeds `threshold` (0-255 gray
+    levels).
+
+    settle() is the drop-in for "act, then sleep N seconds". It waits for the
+    action to change the screen, then for the screen to stop changing, and
+    never waits longer than the old fixed delay. The time saved against that
+    delay is recorded per step.
+    """
+
+    def __init__(self, capture: Callable[[], np.ndarray], threshold: float = 1.5,
+                 stable_for: float = 0.25, interval: float = 0.05, downscale: int = 4):
+        self.capture = capture
+        self.threshold = threshold
+        self.stable_for = stable_for
+        self.interval = interval
+        self.downscale = max(1, downscale)
+
+        # Per-step timing: name -> list of (fixed_delay, actual_wait)
+        self.history: Dict[str, List[Tuple[float, float]]] = {}
+        self.frames = 0
+
+        # Outcome of the last settle(): 'settled', 'no_change' or 'timeout', and
+        # the seconds from the action until the screen stopped changing (for
+        # 'timeout', until the last change seen before the wait ran out)
+        self.last_outcome: Optional[str] = None
+        self.last_latency: Optional[float] = None
+        self._stable_since: Optional[float] = None
+
+    @property
+    def settle_tail(self) -> float:
+        """Seconds settle() needs after the last change to confirm the screen is still."""
+        return self.stable_for + self.interval
+
+    @classmethod
+    def for_automation(cls, automation, **kwargs) -> "ScreenWaiter":
+        """Waiter reading frames from an iPhoneAutomation instance's window."""
+        return cls(lambda: automation.screenshot(fmt='bgra'), **kwargs)
+
+    def snapshot(self, roi: Optional[Region] = None) -> np.ndarray:
+        """Current screen (or ROI) as a small grayscale image for comparison."""
+        frame = self.capture()
+        self.frames += 1
+        if roi is not None:
+            x, y, w, h = roi
+            frame = frame[max(0, y):y + h, max(0, x):x + w]
+        code = cv2.COLOR_BGRA2GRAY if frame.ndim == 3 and frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        gray = cv2.cvtColor(frame, code)
+        if self.downscale > 1:
+            size = (max(1, gray.shape[1] // self.downscale), max(1, gray.shape[0] // self.downscale))
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        return gray
+
+    @staticmethod
+    def difference(a: np.ndarray, b: np.ndarray) -> float:
+        if a.shape != b.shape:
+            return float('inf')
+        return float(cv2.absdiff(a, b).mean())
+
+    def wait_until_changed(self, reference: Optional[np.ndarray] = None, roi: Optional[Region] = None,
+                           threshold: Optional[float] = None, timeout: float = 5.0) -> bool:
+        """
+        Wait until the screen differs from `reference` (default: the screen right now).
+
+        Args:
+            reference: Snapshot to compare against, e.g. taken just before an action
+            roi: Optional (x, y, width, height) area to watch
+            threshold: Mean gray-level difference that counts as a change
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True once a change is seen, False on timeout
+        """
+        threshold = self.threshold if threshold is None else threshold
+        deadline = time.monotonic() + timeout
+        if reference is None:
+            reference = self.snapshot(roi)
+        while True:
+            if self.difference(self.snapshot(roi), reference) > threshold:
+                return True
+            if time.monotonic() + self.interval > deadline:
+                return False
+            time.sleep(self.interval)
+
+    def wait_until_stable(self, roi: Optional[Region] = None, threshold: Optional[float] = None,
+                          timeout: float = 5.0, stable_for: Optional[float] = None) -> bool:
+        """
+        Wait until consecutive frames stay within `threshold` for `stable_for` seconds.
+
+        Returns:
+            True once the screen has settled, False on timeout
+        """
+        threshold = self.threshold if threshold is None else threshold
+        stable_for = self.stable_for if stable_for is None else stable_for
+        deadline = time.monotonic() + timeout
+        previous = self.snapshot(roi)
+        stable_since = time.monotonic()
+        while True:
+            time.sleep(self.interval)
+            current = self.snapshot(roi)
+            now = time.monotonic()
+            if self.difference(current, previous) > threshold:
+                stable_since = now
+            elif now - stable_since >= stable_for:
+                self._stable_since = stable_since
+                return True
+            if now >= deadline:
+                self._stable_since = stable_since
+                return False
+            previous = current
+
+    def settle(self, step_name: str, fixed_delay: float, before: Optional[np.ndarray] = None,
+               roi: Optional[Region] = None, threshold: Optional[float] = None) -> float:
+        """
+        Wait after an action for the UI to respond and settle, capped at fixed_delay.
+
+        Args:
+            step_name: Name used for the time-saved log
+            fixed_delay: The sleep this wait replaces; also the upper bound
+            before: Snapshot taken before the action (see snapshot())
+            roi: Optional area to watch
+            threshold: Optional per-step change threshold
+
+        Returns:
+            Seconds actually waited
+        """
+        start = time.monotonic()
+        self.last_outcome, self.last_latency = 'timeout', None
+        if before is None:
+            # Nothing to compare against: only wait for the screen to be still
+            self._settle_stable(start, fixed_delay, roi, threshold)
+        elif self.wait_until_changed(before, roi, threshold, timeout=fixed_delay / 2):
+            self._settle_stable(start, fixed_delay, roi, threshold)
+        else:
+            # No visible response yet; keep the old, conservative delay
+            self.last_outcome = 'no_change'
+            remaining = fixed_delay - (time.monotonic() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+        return self._record(step_name, fixed_delay, time.monotonic() - start)
+
+    def _settle_stable(self, start: float, fixed_delay: float, roi: Optional[Region],
+                       threshold: Optional[float]) -> None:
+        remaining = fixed_delay - (time.monotonic() - start)
+        if remaining <= 0:
+            return
+        if self.wait_until_stable(roi, threshold, timeout=remaining):
+            self.last_outcome = 'settled'
+        self.last_latency = max(0.0, self._stable_since - start)
+
+    def probe(self, before: Optional[np.ndarray] = None, roi: Optional[Region] = None,
+              threshold: Optional[float] = None) -> "SettleProbe":
+        """
+        Non-blocking settle(): each call of the returned probe takes one
+        frame and returns True once the screen has changed from `before`
+        (skipped when None) and then held still for `stable_for`. For
+        schedulers that poll several waits from one thread; the probe's
+        outcome and latency mean what settle()'s do.
+        """
+        return SettleProbe(self, before, roi, self.threshold if threshold is None else threshold)
+
+    def hold(self, step_name: str, fixed_delay: float, roi: Optional[Region] = None,
+             minimum: float = 0.0) -> float:
+        """
+        Replacement for a plain "let the UI catch up" sleep: wait for stillness, capped at fixed_delay.
+
+        Stillness alone cannot tell a finished transition from one that has
+        not started yet, so after an action prefer settle() with a snapshot
+        taken before it. Without one, `minimum` keeps a floor under the wait.
+        """
+        start = time.monotonic()
+        if minimum > 0:
+            time.sleep(min(minimum, fixed_delay))
+        remaining = fixed_delay - (time.monotonic() - start)
+        if remaining > 0:
+            self.wait_until_stable(roi, timeout=remaining)
+        return self._record(step_name, fixed_delay, time.monotonic() - start)
+
+    def _record(self, step_name: str, fixed_delay: float, waited: float) -> float:
+        self.history.setdefault(step_name, []).append((fixed_delay, waited))
+        saved = fixed_delay - waited
+        print(f"   ⏱️  {step_name}: waited {waited:.2f}s instead of {fixed_delay:.2f}s "
+              f"(saved {saved:+.2f}s)")
+        return waited
+
+    def time_saved(self) -> float:
+        return sum(fixed - waited for runs in self.history.values() for fixed, waited in runs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                'runs': len(runs),
+                'fixed_total': round(sum(f for f, _ in runs), 3),
+                'waited_total': round(sum(w for _, w in runs), 3),
+                'saved_total': round(sum(f - w for f, w in runs), 3),
+            }
+            for name, runs in self.history.items()
+        }
+
+    def report(self) -> str:
+        fixed = sum(f for runs in self.history.values() for f, _ in runs)
+        waits = sum(len(runs) for runs in self.history.values())
+        saved = self.time_saved()
+        pct = saved / fixed * 100 if fixed else 0.0
+        lines = [f"⏱️  Waits: {waits} steps, {saved:.1f}s saved of {fixed:.1f}s fixed delay ({pct:.0f}%)"]
+        for name, s in sorted(self.stats().items(), key=lambda kv: -kv[1]['saved_total']):
+            lines.append(f"   {name:32s} x{s['runs']:<3d} saved {s['saved_total']:.2f}s")
+        return "\n".join(lines)
+
+
+class SettleProbe:
+    """One polled settle() (see ScreenWaiter.probe); latency is measured from its creation."""
+
+    def __init__(self, waiter: ScreenWaiter, before: Optional[np.ndarray], roi: Optional[Region],
+                 threshold: float):
+        self.waiter = waiter
+        self.before = before
+        self.roi = roi
+        self.threshold = threshold
+        self.start = time.monotonic()
+        self.changed = before is None
+        self.settled = False
+        self._previous: Optional[np.ndarray] = None
+        self._stable_since = self.start
+
+    @property
+    def outcome(self) -> str:
+        """'settled', 'no_change' or 'timeout', as ScreenWaiter.last_outcome."""
+        if self.settled:
+            return 'settled'
+        return 'timeout' if self.changed else 'no_change'
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Seconds from creation until the last change seen, once the screen has changed."""
+        return max(0.0, self._stable_since - self.start) if self.changed else None
+
+    def __call__(self) -> bool:
+        current = self.waiter.snapshot(self.roi)
+        now = time.monotonic()
+        if not self.changed:
+            if self.waiter.difference(current, self.before) <= self.threshold:
+                return False
+            self.changed = True
+            self._stable_since = now
+        elif self._previous is None or self.waiter.difference(current, self._previous) > self.threshold:
+            self._stable_since = now
+        self._previous = current
+        self.settled = now - self._stable_since >= self.waiter.stable_for
+        return self.settled
@@ -0,0 +1,200 @@
+import math
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+from Quartz import (CGEventCreateScrollWheelEvent, CGEventPost, CGEventSetIntegerValueField,
+                    kCGHIDEventTap, kCGScrollEventUnitPixel, kCGScrollWheelEventScrollPhase,
+                    kCGScrollWheelEventMomentumPhase)
+
+
+# Gesture phases (kCGScrollWheelEventScrollPhase): fingers on the trackpad
+PHASE_NONE = 0
+PHASE_BEGAN = 1
+PHASE_CHANGED = 2
+PHASE_ENDED = 4
+
+# Momentum phases (kCGScrollWheelEventMomentumPhase): the coast after lift-off
+MOMENTUM_NONE = 0
+MOMENTUM_BEGIN = 1
+MOMENTUM_CONTINUE = 2
+MOMENTUM_END = 3
+
+# Pixels one scroll-wheel line moves, for converting line-based amounts
+LINE_PIXELS = 10
+
+# (offset seconds, dx, dy, phase, momentum_phase)
+Tick = Tuple[float, int, int, int, int]
+
+
+def _post_quartz(dx: int, dy: int, phase: int, momentum: int) -> None:
+    event = CGEventCreateScrollWheelEvent(None, kCGScrollEventUnitPixel, 2, dy, dx)
+    if phase:
+        CGEventSetIntegerValueField(event, kCGScrollWheelEventScrollPhase, phase)
+    if momentum:
+        CGEventSetIntegerValueField(event, kCGScrollWheelEventMomentumPhase, momentum)
+    CGEventPost(kCGHIDEventTap, event)
+
+
+def _split(total: int, weights: Sequence[float]) -> List[int]:
+    """Integer parts of `total` in proportion to `weights` that sum exactly to `total`."""
+    scale = total / sum(weights)
+    parts = []
+    cumulative = 0.0
+    previous = 0
+    for w in weights:
+        cumulative += w * scale
+        current = round(cumulative)
+        parts.append(current - previous)
+        previous = current
+    return parts
+
+
+class ScrollStats:
+    """What one scroll gesture actually did against its plan."""
+
+    def __init__(self, target: Tuple[int, int], planned_duration: float):
+        self.target = target
+        self.planned_duration = planned_duration
+        self.events = 0
+        self.coalesced = 0
+        self.total_dx = 0
+        self.total_dy = 0
+        self.duration = 0.0
+        self.max_lateness = 0.0
+
+    @property
+    def timing_error(self) -> float:
+        """Seconds the gesture finished after (positive) or before its planned end."""
+        return self.duration - self.planned_duration
+
+    def report(self) -> str:
+        return (f"🌀 Scroll: {self.events} events ({self.coalesced} coalesced), "
+                f"delta ({self.total_dx}, {self.total_dy}) of ({self.target[0]}, {self.target[1]}) px, "
+                f"{self.duration:.3f}s vs {self.planned_duration:.3f}s planned "
+                f"(error {self.timing_error * 1000:+.1f}ms, max late {self.max_lateness * 1000:.1f}ms)")
+
+
+class ScrollEngine:
+    """
+    Scroll gestures that cover an exact pixel distance on a fixed schedule.
+
+    A gesture is planned up front as integer ticks whose deltas sum to the
+    target distance, then posted against a monotonic clock. When the thread
+    wakes late, every tick that is already due is merged into one event, so
+    scheduler jitter changes how many events are sent but never how far the
+    content moves or when the gesture ends.
+
+    With phases enabled a gesture is posted like a trackpad flick: a drag
+    (Began/Changed/Ended) followed by a decaying momentum tail
+    (Begin/Continue/End).
+    """
+
+    def __init__(self, rate: float = 120.0, momentum: float = 0.35,
+                 post: Optional[Callable[[int, int, int, int], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate: Ticks per second
+            momentum: Share of a gesture's ticks spent in the momentum tail
+            post: Event sink (dx, dy, phase, momentum_phase); defaults to CGEventPost
+            clock: Monotonic clock
+        """
+        self.rate = rate
+        self.momentum = momentum
+        self.post = post or _post_quartz
+        self.clock = clock
+
+        self.gestures = 0
+        self.events = 0
+        self.last: Optional[ScrollStats] = None
+
+    def plan(self, dx: int, dy: int, duration: float, events: Optional[int] = None,
+             phases: bool = True) -> List[Tick]:
+        """
+        Ticks for a gesture moving (dx, dy) pixels over `duration` seconds.
+
+        Args:
+            dx, dy: Total pixel distance (same signs as CGEventCreateScrollWheelEvent)
+            duration: Seconds from the first tick to the last
+            events: Number of ticks (default: duration * rate)
+            phases: Tag ticks with drag/momentum phases
+        """
+        n = max(1, events if events is not None else round(duration * self.rate))
+        momentum_ticks = round(n * self.momentum) if phases and n >= 4 else 0
+        drag_ticks = n - momentum_ticks
+        # Constant speed while dragging, then an exponential coast
+        weights = [1.0] * drag_ticks + [math.exp(-3.0 * (k + 1) / momentum_ticks)
+                                        for k in range(momentum_ticks)]
+        xs = _split(dx, weights)
+        ys = _split(dy, weights)
+        interval = duration / (n - 1) if n > 1 else 0.0
+
+        ticks: List[Tick] = []
+        for i in range(n):
+            phase = momentum_phase = 0
+            if phases:
+                if i < drag_ticks:
+                    phase = PHASE_BEGAN if i == 0 else PHASE_CHANGED
+                elif i == drag_ticks:
+                    momentum_phase = MOMENTUM_BEGIN
+                elif i == n - 1:
+                    momentum_phase = MOMENTUM_END
+                else:
+                    momentum_phase = MOMENTUM_CONTINUE
+            ticks.append((i * interval, xs[i], ys[i], phase, momentum_phase))
+            if phases and i == drag_ticks - 1:
+                # Lift-off: a zero-delta Ended event closes the drag
+                ticks.append((i * interval, 0, 0, PHASE_ENDED, 0))
+        if phases and momentum_ticks == 1:
+            offset, tx, ty, _, _ = ticks[-1]
+            ticks[-1] = (offset, tx, ty, 0, MOMENTUM_END)
+        return ticks
+
+    def play(self, ticks: Sequence[Tick], cancel_event: Optional[threading.Event] = None) -> ScrollStats:
+        """
+        Post planned ticks on schedule.
+
+        Returns:
+            ScrollStats for the gesture (also kept as self.last); stops early if cancel_event is set
+        """
+        target = (sum(t[1] for t in ticks), sum(t[2] for t in ticks))
+        stats = ScrollStats(target, ticks[-1][0] if ticks else 0.0)
+        start = self.clock()
+        i = 0
+        while i < len(ticks):
+            offset, dx, dy, phase, momentum = ticks[i]
+            deadline = start + offset
+            remaining = deadline - self.clock()
+            if remaining > 0:
+                if cancel_event is not None:
+                    if cancel_event.wait(remaining):
+                        break
+                else:
+                    time.sleep(remaining)
+            now = self.clock()
+            stats.max_lateness = max(stats.max_lateness, now - deadline)
+
+            # Merge following ticks that are already due and carry the same phases
+            j = i + 1
+            while j < len(ticks) and start + ticks[j][0] <= now and ticks[j][3:] == (phase, momentum):
+                dx += ticks[j][1]
+                dy += ticks[j][2]
+                j += 1
+            stats.coalesced += j - i - 1
+
+            self.post(dx, dy, phase, momentum)
+            stats.events += 1
+            stats.total_dx += dx
+            stats.total_dy += dy
+            i = j
+
+        stats.duration = self.clock() - start
+        self.gestures += 1
+        self.events += stats.events
+        self.last = stats
+        return stats
+
+    def scroll(self, dx: int, dy: int, duration: float, events: Optional[int] = None,
+               phases: bool = True, cancel_event: Optional[threading.Event] = None) -> ScrollStats:
+        """Plan and post a gesture in one call."""
+        return self.play(self.plan(dx, dy, duration, events, phases), cancel_event)
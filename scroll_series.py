@@ -0,0 +1,117 @@
+from typing import Any, Dict, List, Sequence, Tuple
+import cv2
+import numpy as np
+
+
+SERIES_TYPE = 'scroll_series'
+
+
+def build_series(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    One scroll_series action from a burst of raw scroll events.
+
+    Keeps every event: offsets from the first event (seconds) and the
+    pixel deltas as parallel arrays, so replay reproduces the exact
+    distance and pacing instead of a direction/speed summary.
+    """
+    first = events[0]
+    t0 = first['timestamp']
+    return {
+        'type': SERIES_TYPE,
+        'x': first['x'],
+        'y': first['y'],
+        'timestamp': t0,
+        't': [round(e['timestamp'] - t0, 4) for e in events],
+        'dx': [int(e['dx']) for e in events],
+        'dy': [int(e['dy']) for e in events],
+    }
+
+
+def series_totals(action: Dict[str, Any]) -> Tuple[int, int]:
+    """Total (dx, dy) pixels scrolled by a series."""
+    return sum(action['dx']), sum(action['dy'])
+
+
+def batch_series(t: Sequence[float], dx: Sequence[int], dy: Sequence[int],
+                 interval: float = 1 / 120) -> List[Tuple[float, int, int]]:
+    """
+    Merge events that fall in the same `interval` window into one post.
+
+    Deltas are summed, so the pixel totals are unchanged; only the number
+    of events posted (and the sleeps between them) goes down.
+
+    Returns:
+        [(offset, dx, dy), ...] with offsets relative to the first event
+    """
+    batches: List[Tuple[float, int, int]] = []
+    start = None
+    bx = by = 0
+    for ti, xi, yi in zip(t, dx, dy):
+        if start is not None and ti - start >= interval:
+            batches.append((start, bx, by))
+            start = None
+        if start is None:
+            start, bx, by = ti, 0, 0
+        bx += xi
+        by += yi
+    if start is not None:
+        batches.append((start, bx, by))
+    return batches
+
+
+def _gray(frame: np.ndarray) -> np.ndarray:
+    if frame.ndim == 2:
+        return frame
+    return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+
+
+def measure_shift(before: np.ndarray, after: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Content translation between two frames via phase correlation.
+
+    Returns:
+        (shift_x, shift_y, response); response near 1 means a clean translation
+    """
+    a = np.float32(_gray(before))
+    b = np.float32(_gray(after))
+    window = cv2.createHanningWindow(a.shape[::-1], cv2.CV_32F)
+    (sx, sy), response = cv2.phaseCorrelate(a, b, window)
+    return sx, sy, response
+
+
+class ScrollCheck:
+    """Expected vs measured content shift for one replayed scroll series."""
+
+    def __init__(self, expected: Tuple[float, float], measured: Tuple[float, float],
+                 response: float, tolerance: float):
+        self.expected = expected
+        self.measured = measured
+        self.response = response
+        self.error = max(abs(m - e) for m, e in zip(measured, expected))
+        # Allowed error: a fraction of the distance, but at least a few pixels
+        allowed = max(4.0, tolerance * max(abs(e) for e in expected))
+        self.ok = self.error <= allowed
+
+    def __repr__(self) -> str:
+        return (f"ScrollCheck(expected=({self.expected[0]:.0f}, {self.expected[1]:.0f}), "
+                f"measured=({self.measured[0]:.1f}, {self.measured[1]:.1f}), ok={self.ok})")
+
+
+def verify_shift(before: np.ndarray, after: np.ndarray, totals: Tuple[int, int],
+                 scale: float = 1.0, tolerance: float = 0.25) -> ScrollCheck:
+    """
+    Check that the frame moved by the series' pixel totals.
+
+    Only meaningful while the distance is under half the frame; beyond that
+    the phase correlation peak wraps around.
+
+    Args:
+        before, after: Frames captured before the series and after it settled
+        totals: (dx, dy) pixels posted; content moves in the same direction
+        scale: Image pixels per scroll pixel (1.0 for nominal-resolution captures)
+        tolerance: Allowed error as a fraction of the expected distance
+    """
+    sx, sy, response = measure_shift(before, after)
+    expected = (totals[0] * scale, totals[1] * scale)
+    return ScrollCheck(expected, (sx, sy), response, tolerance)
+
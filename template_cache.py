@@ -0,0 +1,375 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import cv2
+import numpy as np
+
+
+Region = Tuple[int, int, int, int]  # (x, y, width, height) in window coordinates
+
+
+class Template:
+    """A decoded template image plus the derived data matching needs."""
+
+    def __init__(self, path: str, mtime: float, image: np.ndarray, levels: int):
+        self.path = path
+        self.mtime = mtime
+        self.image = image
+        self.gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.height, self.width = image.shape[:2]
+
+        # pyramid[0] is the full-resolution gray image, each next level half the size
+        self.pyramid: List[np.ndarray] = [self.gray]
+        for _ in range(1, levels):
+            smaller = self.pyramid[-1]
+            if min(smaller.shape[:2]) < 16:
+                break
+            self.pyramid.append(cv2.pyrDown(smaller))
+
+    @property
+    def center_offset(self) -> Tuple[int, int]:
+        return self.width // 2, self.height // 2
+
+
+class FramePyramid:
+    """
+    One captured frame with its grayscale conversion and pyramid levels
+    computed lazily and at most once, so several searches on the same frame
+    share that work.
+    """
+
+    def __init__(self, frame: np.ndarray):
+        self.frame = frame
+        self._gray: Optional[np.ndarray] = None
+        self._levels: List[np.ndarray] = []
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.frame.shape
+
+    @property
+    def gray(self) -> np.ndarray:
+        with self._lock:
+            if self._gray is None:
+                self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+                self._levels = [self._gray]
+            return self._gray
+
+    def level(self, n: int) -> np.ndarray:
+        """Gray image downsampled n times by pyrDown (level 0 is full resolution)."""
+        gray = self.gray
+        if n == 0:
+            return gray
+        with self._lock:
+            while len(self._levels) <= n:
+                self._levels.append(cv2.pyrDown(self._levels[-1]))
+            return self._levels[n]
+
+
+def _clip_region(region: Region, shape: Tuple[int, ...]) -> Region:
+    x, y, w, h = region
+    x0, y0 = max(0, int(x)), max(0, int(y))
+    x1, y1 = min(shape[1], int(x + w)), min(shape[0], int(y + h))
+    return x0, y0, max(0, x1 - x0), max(0, y1 - y0)
+
+
+class TemplateRegistry:
+    """
+    Loads each template PNG once and keeps it decoded, with a grayscale copy
+    and pyramid levels, until the file's mtime changes.
+
+    match() reuses per-thread result buffers keyed by frame and template
+    size, so repeated polling (wait_for_element) neither re-reads the file nor
+    allocates a new score map every call.
+    """
+
+    def __init__(self, levels: int = 3, candidates: int = 3, near_miss: float = 0.15):
+        self.levels = levels
+        # Coarse-level peaks refined at full resolution
+        self.candidates = candidates
+        # A pyramid miss whose coarse score came within this much of the
+        # threshold is re-checked with an exact search, so small or
+        # low-contrast templates are not lost to downsampling
+        self.near_miss = near_miss
+        self._templates: Dict[str, Template] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        # Counters
+        self.loads = 0
+        self.reloads = 0
+        self.hits = 0
+        self.searches = 0
+        self.region_hits = 0
+        self.full_frame_fallbacks = 0
+        self.exact_fallbacks = 0
+
+    def get(self, path: str) -> Template:
+        """Return the cached template for path, loading it on first use or after it changed on disk."""
+        key = os.path.abspath(path)
+        try:
+            mtime = os.path.getmtime(key)
+        except OSError:
+            raise FileNotFoundError(f"Template not found: {path}")
+
+        with self._lock:
+            cached = self._templates.get(key)
+            if cached is not None and cached.mtime == mtime:
+                self.hits += 1
+                return cached
+
+            image = cv2.imread(key)
+            if image is None:
+                raise ValueError(f"Could not decode template: {path}")
+            if cached is not None:
+                self.reloads += 1
+            self.loads += 1
+            template = Template(key, mtime, image, self.levels)
+            self._templates[key] = template
+            return template
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop one template, or all of them."""
+        with self._lock:
+            if path is None:
+                self._templates.clear()
+            else:
+                self._templates.pop(os.path.abspath(path), None)
+
+    def result_buffer(self, image_shape: Tuple[int, ...], templ_shape: Tuple[int, ...]) -> np.ndarray:
+        """Preallocated float32 score map for matching a template of templ_shape against image_shape."""
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        shape = (image_shape[0] - templ_shape[0] + 1, image_shape[1] - templ_shape[1] + 1)
+        buf = buffers.get(shape)
+        if buf is None:
+            buf = buffers[shape] = np.empty(shape, dtype=np.float32)
+        return buf
+
+    def match_scores(self, image: np.ndarray, templ: np.ndarray,
+                     method: int = cv2.TM_CCOEFF_NORMED) -> Optional[np.ndarray]:
+        """cv2.matchTemplate into a reused buffer; None if the template does not fit in the image."""
+        if image.shape[0] < templ.shape[0] or image.shape[1] < templ.shape[1]:
+            return None
+        buf = self.result_buffer(image.shape, templ.shape)
+        return cv2.matchTemplate(image, templ, method, result=buf)
+
+    def match(self, frame: np.ndarray, path: str,
+              confidence: float = 0.8) -> Optional[Tuple[int, int, float]]:
+        """
+        Full-frame match of a template against a BGR frame.
+
+        Returns:
+            (center_x, center_y, score) in frame coordinates, or None below confidence
+        """
+        template = self.get(path)
+        scores = self.match_scores(frame, template.image)
+        if scores is None:
+            return None
+        _, max_val, _, max_loc = cv2.minMaxLoc(scores)
+        if max_val < confidence:
+            return None
+        ox, oy = template.center_offset
+        return max_loc[0] + ox, max_loc[1] + oy, max_val
+
+    def _coarse_level(self, template: Template, region: Region) -> int:
+        """Deepest pyramid level where both the template and the region are still usefully large."""
+        level = len(template.pyramid) - 1
+        while level > 0:
+            scale = 1 << level
+            if region[2] // scale >= template.pyramid[level].shape[1] * 2 and \
+                    region[3] // scale >= template.pyramid[level].shape[0] * 2:
+                break
+            level -= 1
+        return level
+
+    def _exact(self, frame: np.ndarray, template: Template, region: Region) -> Tuple[float, Tuple[int, int]]:
+        """Best full-resolution BGR match inside region; returns (score, top-left in frame coordinates)."""
+        x, y, w, h = region
+        scores = self.match_scores(frame[y:y + h, x:x + w], template.image)
+        if scores is None:
+            return -1.0, (0, 0)
+        _, max_val, _, max_loc = cv2.minMaxLoc(scores)
+        return max_val, (x + max_loc[0], y + max_loc[1])
+
+    def _pyramid_search(self, pyramid: FramePyramid, template: Template,
+                        region: Region) -> Tuple[float, Tuple[int, int], float]:
+        """
+        Match at a coarse level, then refine the best few peaks at full resolution.
+
+        Returns:
+            (score, top-left in frame coordinates, best coarse score)
+        """
+        level = self._coarse_level(template, region)
+        if level == 0:
+            score, loc = self._exact(pyramid.frame, template, region)
+            return score, loc, score
+
+        scale = 1 << level
+        x, y, w, h = region
+        coarse_img = pyramid.level(level)[y // scale:(y + h) // scale, x // scale:(x + w) // scale]
+        coarse_tpl = template.pyramid[level]
+        scores = self.match_scores(coarse_img, coarse_tpl)
+        if scores is None:
+            score, loc = self._exact(pyramid.frame, template, region)
+            return score, loc, score
+
+        # The refine step below may reuse this thread's buffer of the same shape
+        scores = scores.copy()
+        best_score, best_loc, coarse_best = -1.0, (0, 0), -1.0
+        th, tw = coarse_tpl.shape[:2]
+        margin = scale + 2
+        for _ in range(self.candidates):
+            _, peak, _, peak_loc = cv2.minMaxLoc(scores)
+            if peak < 0:
+                break
+            coarse_best = max(coarse_best, peak)
+            # Suppress this peak so the next iteration finds a different one
+            px, py = peak_loc
+            scores[max(0, py - th // 2):py + th // 2 + 1, max(0, px - tw // 2):px + tw // 2 + 1] = -1.0
+
+            fx = (x // scale + px) * scale
+            fy = (y // scale + py) * scale
+            window = _clip_region((fx - margin, fy - margin,
+                                   template.width + 2 * margin, template.height + 2 * margin),
+                                  pyramid.shape)
+            score, loc = self._exact(pyramid.frame, template, window)
+            if score > best_score:
+                best_score, best_loc = score, loc
+        return best_score, best_loc, coarse_best
+
+    def locate(self, frame: Union[np.ndarray, FramePyramid], path: str, confidence: float = 0.8,
+               roi: Optional[Region] = None, expected: Optional[Tuple[int, int]] = None,
+               search_radius: int = 80) -> Optional[Tuple[int, int, float]]:
+        """
+        Coarse-to-fine match, searching the hinted area first.
+
+        Args:
+            frame: BGR frame (or a FramePyramid wrapping one) in window coordinates
+            path: Template image path
+            confidence: Minimum TM_CCOEFF_NORMED score
+            roi: Optional (x, y, width, height) area the element is expected in
+            expected: Optional (x, y) where the element's center usually is
+            search_radius: How far from `expected` to look before giving up on the hint
+
+        Returns:
+            (center_x, center_y, score) in window coordinates, or None
+        """
+        pyramid = frame if isinstance(frame, FramePyramid) else FramePyramid(frame)
+        template = self.get(path)
+        full = (0, 0, pyramid.shape[1], pyramid.shape[0])
+        self.searches += 1
+
+        region = None
+        if roi is not None:
+            region = _clip_region(roi, pyramid.shape)
+        elif expected is not None:
+            ex, ey = expected
+            region = _clip_region((ex - template.width // 2 - search_radius,
+                                   ey - template.height // 2 - search_radius,
+                                   template.width + 2 * search_radius,
+                                   template.height + 2 * search_radius), pyramid.shape)
+
+        score, loc, coarse_best = -1.0, (0, 0), -1.0
+        if region is not None and region[2] >= template.width and region[3] >= template.height:
+            score, loc, coarse_best = self._pyramid_search(pyramid, template, region)
+            if score >= confidence:
+                self.region_hits += 1
+                return loc[0] + template.width // 2, loc[1] + template.height // 2, score
+            self.full_frame_fallbacks += 1
+
+        if region != full:
+            score, loc, coarse = self._pyramid_search(pyramid, template, full)
+            coarse_best = max(coarse_best, coarse)
+        if score < confidence and coarse_best >= confidence - self.near_miss:
+            self.exact_fallbacks += 1
+            score, loc = self._exact(pyramid.frame, template, full)
+        if score < confidence:
+            return None
+        return loc[0] + template.width // 2, loc[1] + template.height // 2, score
+
+    def stats(self) -> Dict[str, int]:
+        return {'templates': len(self._templates), 'loads': self.loads,
+                'reloads': self.reloads, 'hits': self.hits, 'searches': self.searches,
+                'region_hits': self.region_hits, 'full_frame_fallbacks': self.full_frame_fallbacks,
+                'exact_fallbacks': self.exact_fallbacks}
+
+
+class BatchMatcher:
+    """
+    Resolves a set of templates against one frame in a single pass.
+
+    The frame's grayscale conversion and pyramid levels are computed once
+    and shared by every template, and the per-template searches run in a
+    thread pool (OpenCV releases the GIL inside matchTemplate).
+    """
+
+    def __init__(self, registry: Optional[TemplateRegistry] = None, max_workers: Optional[int] = None):
+        self.registry = registry or get_template_registry()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 2),
+                                            thread_name_prefix="match")
+
+        # Stats
+        self.frames = 0
+        self.searches = 0
+
+    def match_all(self, frame: Union[np.ndarray, FramePyramid], templates: Sequence[str],
+                  confidence: float = 0.8,
+                  hints: Optional[Dict[str, Dict]] = None) -> Dict[str, Optional[Tuple[int, int, float]]]:
+        """
+        Locate every template in one frame.
+
+        Args:
+            frame: BGR frame in window coordinates
+            templates: Template paths
+            confidence: Minimum match score for each template
+            hints: Optional per-path locate() keyword hints, e.g. {path: {'expected': (x, y)}}
+
+        Returns:
+            {path: (center_x, center_y, score) or None}
+        """
+        pyramid = frame if isinstance(frame, FramePyramid) else FramePyramid(frame)
+        hints = hints or {}
+        self.frames += 1
+        self.searches += len(templates)
+        if len(templates) == 1:
+            path = templates[0]
+            return {path: self.registry.locate(pyramid, path, confidence, **hints.get(path, {}))}
+
+        # Compute shared levels up front instead of racing for them in the workers
+        pyramid.level(self.registry.levels - 1)
+        futures = {path: self._executor.submit(self.registry.locate, pyramid, path, confidence,
+                                               **hints.get(path, {}))
+                   for path in templates}
+        return {path: future.result() for path, future in futures.items()}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+_default_registry: Optional[TemplateRegistry] = None
+_default_matcher: Optional[BatchMatcher] = None
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Process-wide template registry shared by every automation instance."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = TemplateRegistry()
+    return _default_registry
+
+
+def set_template_registry(registry: TemplateRegistry) -> None:
+    global _default_registry
+    _default_registry = registry
+
+
+def get_batch_matcher() -> BatchMatcher:
+    """Process-wide batch matcher over the shared registry."""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = BatchMatcher(get_template_registry())
+    return _default_matcher
@@ -0,0 +1,160 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+
+class TimingProfile:
+    """
+    Per-step latency model learned from past runs.
+
+    Each named step records how long the UI took to reach its next state
+    (from ScreenWaiter.settle or a template hit). Once a step has enough
+    samples its wait is a high percentile of those latencies, plus the
+    time the waiter needs to confirm the screen is still, plus a margin,
+    instead of the hand-picked worst-case constant.
+
+    Every step also has a scale factor. A failure (a crash, no visible
+    response within the learned wait, or a screen still changing when the
+    wait ran out) multiplies it up, which loosens the wait. Each success
+    eases it back toward 1.0.
+    """
+
+    def __init__(self, path: str = "timing_profile.json", percentile: float = 95.0,
+                 margin: float = 0.15, min_samples: int = 5, max_samples: int = 200,
+                 floor: float = 0.05):
+        self.path = path
+        self.percentile = percentile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.floor = floor
+
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self.steps = json.load(f).get('steps', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load timing profile {self.path}: {e}")
+            self.steps = {}
+
+    def save(self) -> None:
+        """Write the profile if it changed (atomically, so a crash never leaves half a file)."""
+        if not self._dirty:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'updated': time.time(), 'steps': self.steps}, f, indent=2)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def _step(self, name: str) -> Dict[str, Any]:
+        return self.steps.setdefault(name, {'samples': [], 'scale': 1.0, 'failures': 0, 'successes': 0})
+
+    def record(self, name: str, latency: float, tail: Optional[float] = None) -> None:
+        """
+        Record an observed latency (seconds until the UI reached its next state).
+
+        Args:
+            name: Step name
+            latency: Seconds from the action until the UI stopped changing
+            tail: Seconds the waiter needs after that to confirm it (added to the wait)
+        """
+        step = self._step(name)
+        step['samples'].append(round(latency, 3))
+        if tail is not None:
+            step['tail'] = round(tail, 3)
+        del step['samples'][:-self.max_samples]
+        step['successes'] += 1
+        # Ease back toward the learned wait after successes
+        step['scale'] = max(1.0, step['scale'] * 0.95)
+        self._dirty = True
+
+    def record_failure(self, name: str, factor: float = 1.5, max_scale: float = 3.0) -> None:
+        """Loosen a step's wait after it failed or the UI had not responded in time."""
+        step = self._step(name)
+        step['failures'] += 1
+        step['scale'] = min(max_scale, step['scale'] * factor)
+        self._dirty = True
+
+    def learn(self, name: str, outcome: Optional[str], latency: Optional[float], tail: float) -> None:
+        """
+        Update a step from the outcome of a screen wait.
+
+        Args:
+            name: Step name
+            outcome: 'settled', 'no_change' or 'timeout' (as ScreenWaiter.last_outcome)
+            latency: Seconds from the action until the screen stopped changing (for
+                     'timeout', until the last change seen)
+            tail: Seconds the waiter needs after the last change to confirm stillness
+        """
+        if outcome == 'settled':
+            self.record(name, latency, tail)
+        elif outcome == 'no_change':
+            self.record_failure(name)
+        elif outcome == 'timeout':
+            learned = self.latency(name)
+            if latency is not None and learned is not None and latency <= learned:
+                # The screen had gone still in time; only confirming it ran out
+                return
+            # Still changing past the learned latency, so the wait is too short
+            self.record_failure(name)
+
+    def learn_from(self, name: str, waiter) -> None:
+        """Update a step from the outcome of the ScreenWaiter.settle() that just ran for it."""
+        self.learn(name, waiter.last_outcome, waiter.last_latency, waiter.settle_tail)
+
+    def _percentile(self, samples: List[float], pct: Optional[float] = None) -> float:
+        ordered = sorted(samples)
+        k = (len(ordered) - 1) * (self.percentile if pct is None else pct) / 100.0
+        lo = int(k)
+        hi = min(lo + 1, len(ordered) - 1)
+        return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+    def latency(self, name: str) -> Optional[float]:
+        """Learned latency percentile for a step, or None until it has enough samples."""
+        step = self.steps.get(name)
+        if not step or len(step['samples']) < self.min_samples:
+            return None
+        return self._percentile(step['samples'])
+
+    def wait_for(self, name: str, default: float) -> float:
+        """
+        Wait to use for a step.
+
+        Args:
+            name: Step name
+            default: The static delay, used until enough samples exist
+
+        Returns:
+            Seconds to wait: learned percentile + confirmation tail + margin,
+            scaled up after failures
+        """
+        latency = self.latency(name)
+        if latency is None:
+            return default
+        step = self.steps[name]
+        learned = (latency + step.get('tail', 0.0) + self.margin) * step['scale']
+        # Tighten freely, but only loosen past the static delay after failures
+        upper = default * max(1.0, step['scale'])
+        return round(max(self.floor, min(learned, upper)), 3)
+
+    def report(self, defaults: Optional[Dict[str, float]] = None) -> str:
+        lines = [f"📐 Timing profile ({self.path}): p{self.percentile:.0f} + {self.margin:.2f}s"]
+        for name, step in sorted(self.steps.items()):
+            samples = step['samples']
+            if not samples:
+                continue
+            default = (defaults or {}).get(name)
+            wait = self.wait_for(name, default) if default is not None else None
+            lines.append(f"   {name:32s} n={len(samples):<4d} p50={self._percentile(samples, 50):.2f}s "
+                         f"p{self.percentile:.0f}={self._percentile(samples):.2f}s scale={step['scale']:.2f}"
+                         + (f" wait={wait:.2f}s (was {default:.2f}s)" if wait is not None else ""))
+        return "\n".join(lines)
+
@@ -1,52 +1,22 @@
 import time
 import subprocess
 import json
-from typing import Optional, Dict, Tuple, Any
+from typing import Optional, Dict, Tuple, Any, Sequence, Union
 import Quartz
 import pyautogui
+from window_index import get_window_index
 
 def find_iphone_window(title: str = "iPhone Mirroring") -> Optional[Any]:
     try:
-        script = f'''
-        tell application "System Events"
-            set windowList to {{}}
-            repeat with proc in application processes
-                try
-                    repeat with win in windows of proc
-                        if name of win contains "{title}" then
-                            return {{name of proc, name of win, position of win, size of win}}
-                        end if
-                    end repeat
-                end try
-            end repeat
-        end tell
-        '''
-        
-        result = subprocess.run(['osascript', '-e', script], 
-                              capture_output=True, text=True)
-        
-        if result.stdout.strip():
-            return parse_applescript_result(result.stdout.strip())
-        
+        return get_window_index().find(title)
     except Exception as e:
         print(f"Error finding window: {e}")
     
     return None
 
-def parse_applescript_result(result: str) -> Dict[str, Any]:
-    parts = result.split(', ')
-    if len(parts) >= 6:
-        return {
-            'app': parts[0],
-            'title': parts[1],
-            'x': int(parts[2]),
-            'y': int(parts[3]),
-            'width': int(parts[4]),
-            'height': int(parts[5])
-        }
-    return None
-
 def get_window_bounds(window_info: Dict[str, Any]) -> Dict[str, int]:
+    if 'window_id' in window_info:
+        return get_window_index().bounds(window_info)
     return {
         'x': window_info['x'],
         'y': window_info['y'],
@@ -63,14 +33,56 @@ def activate_window(app_name: str) -> None:
     subprocess.run(['osascript', '-e', script])
     time.sleep(0.5)
 
-def wait_for_element(automation_obj, template_path: str, 
-                    confidence: float = 0.8, timeout: float = 10.0) -> Optional[Tuple[int, int]]:
+def get_frontmost_app() -> Optional[str]:
+    """Owner name of the frontmost normal-layer window, read from Quartz."""
+    options = Quartz.kCGWindowListOptionOnScreenOnly | Quartz.kCGWindowListExcludeDesktopElements
+    windows = Quartz.CGWindowListCopyWindowInfo(options, Quartz.kCGNullWindowID) or []
+    # On-screen windows are listed front to back; layer 0 holds normal app windows
+    for window in windows:
+        if window.get('kCGWindowLayer', 0) == 0:
+            return window.get('kCGWindowOwnerName')
+    return None
+
+def wait_for_element(automation_obj, template_path: Union[str, Sequence[str]], 
+                    confidence: float = 0.8, timeout: float = 10.0,
+                    roi: Optional[Tuple[int, int, int, int]] = None,
+                    expected: Optional[Tuple[int, int]] = None,
+                    mode: str = 'any') -> Optional[Any]:
+    """
+    Poll until a template (or a set of templates) appears.
+    
+    Args:
+        automation_obj: Object providing find_element (and find_elements for sets)
+        template_path: One template path, or a list of them
+        confidence: Minimum match score
+        timeout: Seconds to keep polling
+        roi: Optional search area hint for a single template
+        expected: Optional expected center hint for a single template
+        mode: For a list of templates, 'any' returns as soon as one is visible,
+              'all' waits until every one is visible in the same frame
+    
+    Returns:
+        (x, y) for a single template; {path: (x, y)} of the visible templates for a list; None on timeout
+    """
+    if mode not in ('any', 'all'):
+        raise ValueError(f"mode must be 'any' or 'all', not '{mode}'")
+    single = isinstance(template_path, str)
     start_time = time.time()
+    hints = {k: v for k, v in (('roi', roi), ('expected', expected)) if v is not None}
     
     while time.time() - start_time < timeout:
-        element = automation_obj.find_element(template_path, confidence)
-        if element:
-            return element
+        if single:
+            element = automation_obj.find_element(template_path, confidence, **hints)
+            if element:
+                return element
+        else:
+            if hasattr(automation_obj, 'find_elements'):
+                found = automation_obj.find_elements(list(template_path), confidence)
+            else:
+                found = {p: automation_obj.find_element(p, confidence) for p in template_path}
+            found = {p: tuple(m[:2]) for p, m in found.items() if m}
+            if found and (mode == 'any' or len(found) == len(set(template_path))):
+                return found
         time.sleep(0.5)
     
     return None
@@ -0,0 +1,141 @@
+import time
+from typing import Optional, Tuple
+import numpy as np
+import cv2
+
+
+class CaptureStats:
+    """Frame and copy counters shared by the capture backends."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.frames = 0
+        self.bytes_copied = 0
+        self.capture_seconds = 0.0
+        self._first = None
+        self._last = None
+
+    def record(self, bytes_copied: int, seconds: float) -> None:
+        now = time.perf_counter()
+        if self._first is None:
+            self._first = now
+        self._last = now
+        self.frames += 1
+        self.bytes_copied += bytes_copied
+        self.capture_seconds += seconds
+
+    @property
+    def fps(self) -> float:
+        """Achieved frames per second between the first and last capture."""
+        if self.frames < 2 or self._last == self._first:
+            return 0.0
+        return (self.frames - 1) / (self._last - self._first)
+
+    @property
+    def avg_capture_ms(self) -> float:
+        return self.capture_seconds / self.frames * 1000.0 if self.frames else 0.0
+
+    def report(self) -> str:
+        mb = self.bytes_copied / 1e6
+        return (f"📷 {self.name}: {self.frames} frames, {self.fps:.1f} fps, "
+                f"{self.avg_capture_ms:.1f}ms/capture, {mb:.1f} MB copied")
+
+
+class WindowCapture:
+    """
+    Captures one window with CGWindowListCreateImage and wraps the CGImage's
+    bitmap as a NumPy view.
+
+    The BGRA view itself costs no Python-side copy (CoreGraphics still copies
+    once when handing out the bitmap). Asking for BGR, or passing `out`,
+    costs exactly one copy into the caller's buffer. Images are taken at
+    nominal resolution so pixel coordinates match window points on Retina
+    displays.
+    """
+
+    def __init__(self, nominal_resolution: bool = True):
+        import Quartz
+        self._quartz = Quartz
+        self.nominal_resolution = nominal_resolution
+        self.stats = CaptureStats("CGWindowListCreateImage")
+
+    def _image_options(self) -> int:
+        q = self._quartz
+        options = q.kCGWindowImageBoundsIgnoreFraming
+        if self.nominal_resolution:
+            options |= q.kCGWindowImageNominalResolution
+        return options
+
+    def _bgra_view(self, window_id: int) -> Tuple[np.ndarray, object]:
+        q = self._quartz
+        image = q.CGWindowListCreateImage(q.CGRectNull, q.kCGWindowListOptionIncludingWindow,
+                                          window_id, self._image_options())
+        if image is None:
+            raise RuntimeError(f"Could not capture window {window_id}")
+
+        width = q.CGImageGetWidth(image)
+        height = q.CGImageGetHeight(image)
+        bytes_per_row = q.CGImageGetBytesPerRow(image)
+        if q.CGImageGetBitsPerPixel(image) != 32:
+            raise RuntimeError("Unexpected window image format")
+
+        data = q.CGDataProviderCopyData(q.CGImageGetDataProvider(image))
+        flat = np.frombuffer(data, dtype=np.uint8)
+        # Rows may be padded; slice them back to width * 4 without copying
+        view = flat[:height * bytes_per_row].reshape(height, bytes_per_row)[:, :width * 4].reshape(height, width, 4)
+
+        byte_order = q.CGImageGetBitmapInfo(image) & q.kCGBitmapByteOrderMask
+        if byte_order != q.kCGBitmapByteOrder32Little:
+            view = view[:, :, ::-1]  # ARGB in memory -> BGRA
+        return view, data
+
+    def capture(self, window_id: int, fmt: str = "bgr", out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Capture a window.
+
+        Args:
+            window_id: CGWindowID, e.g. window_info['window_id'] from find_iphone_window
+            fmt: 'bgra' for the raw view, 'bgr' for a 3-channel image
+            out: Optional reusable output array of the right shape
+
+        Returns:
+            The captured frame (a view into the CGImage bitmap for 'bgra' without out)
+        """
+        start = time.perf_counter()
+        view, _ = self._bgra_view(window_id)
+        copied = 0
+
+        if fmt == "bgra":
+            if out is not None:
+                np.copyto(out, view)
+                copied = out.nbytes
+                frame = out
+            else:
+                frame = view
+        elif fmt == "bgr":
+            frame = cv2.cvtColor(view, cv2.COLOR_BGRA2BGR, dst=out)
+            copied = frame.nbytes
+        else:
+            raise ValueError(f"Unknown format '{fmt}' (use 'bgr' or 'bgra')")
+
+        self.stats.record(copied, time.perf_counter() - start)
+        return frame
+
+
+class ScreenRegionCapture:
+    """The pyautogui capture path, instrumented with the same counters for comparison."""
+
+    def __init__(self):
+        self.stats = CaptureStats("pyautogui.screenshot")
+
+    def capture(self, region: Optional[Tuple[int, int, int, int]], fmt: str = "bgr",
+                out: Optional[np.ndarray] = None) -> np.ndarray:
+        import pyautogui
+        start = time.perf_counter()
+        image = pyautogui.screenshot(region=region)
+        rgb = np.array(image)
+        code = cv2.COLOR_RGB2BGRA if fmt == "bgra" else cv2.COLOR_RGB2BGR
+        frame = cv2.cvtColor(rgb, code, dst=out)
+        # PIL image -> np.array -> cvtColor output
+        self.stats.record(rgb.nbytes * 2 + frame.nbytes, time.perf_counter() - start)
+        return frame
@@ -0,0 +1,185 @@
+import json
+from typing import Optional, Dict, List, Tuple, Any
+
+
+class QuartzWindowBackend:
+    """Reads window information from CGWindowListCopyWindowInfo."""
+
+    def __init__(self):
+        import Quartz
+        self._quartz = Quartz
+
+    def list_windows(self) -> List[Dict[str, Any]]:
+        q = self._quartz
+        options = q.kCGWindowListOptionOnScreenOnly | q.kCGWindowListExcludeDesktopElements
+        return list(q.CGWindowListCopyWindowInfo(options, q.kCGNullWindowID) or [])
+
+    def describe_window(self, window_id: int) -> Optional[Dict[str, Any]]:
+        q = self._quartz
+        windows = q.CGWindowListCopyWindowInfo(q.kCGWindowListOptionIncludingWindow, window_id) or []
+        for window in windows:
+            if window.get('kCGWindowNumber') == window_id:
+                return window
+        return None
+
+
+class RecordedWindowBackend:
+    """Serves a recorded window list, e.g. for exercising the index off macOS."""
+
+    def __init__(self, windows: List[Dict[str, Any]]):
+        self.windows = list(windows)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'RecordedWindowBackend':
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def list_windows(self) -> List[Dict[str, Any]]:
+        return list(self.windows)
+
+    def describe_window(self, window_id: int) -> Optional[Dict[str, Any]]:
+        for window in self.windows:
+            if window.get('kCGWindowNumber') == window_id:
+                return window
+        return None
+
+
+def parse_window_info(raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convert a CGWindowList dictionary into the window_info dict used across the repo."""
+    bounds = raw.get('kCGWindowBounds')
+    if not bounds:
+        return None
+    try:
+        return {
+            'app': str(raw.get('kCGWindowOwnerName') or ''),
+            'title': str(raw.get('kCGWindowName') or ''),
+            'x': int(bounds['X']),
+            'y': int(bounds['Y']),
+            'width': int(bounds['Width']),
+            'height': int(bounds['Height']),
+            'window_id': int(raw.get('kCGWindowNumber', 0)),
+            'pid': int(raw.get('kCGWindowOwnerPID', 0)),
+            'layer': int(raw.get('kCGWindowLayer', 0))
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class WindowIndex:
+    """
+    Cache of on-screen windows keyed by (owner, title), built from one
+    window-list snapshot.
+
+    A cached entry is validated by asking for that single window; if it has
+    disappeared or moved, the snapshot is rebuilt and the generation counter
+    is bumped so callers holding absolute coordinates know to recompute them.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self.generation = 0
+        self._by_key: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._order: List[Tuple[str, str]] = []
+        self._lookups: Dict[str, Tuple[str, str]] = {}
+
+        # Counters
+        self.snapshots = 0
+        self.hits = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = QuartzWindowBackend()
+        return self._backend
+
+    def refresh(self) -> None:
+        """Rebuild the index from a fresh window-list snapshot."""
+        self._by_key = {}
+        self._order = []
+        self._lookups = {}
+        for raw in self.backend.list_windows():
+            info = parse_window_info(raw)
+            if not info or info['width'] <= 1 or info['height'] <= 1:
+                continue
+            key = (info['app'], info['title'])
+            if key not in self._by_key:
+                self._by_key[key] = info
+                self._order.append(key)
+        self.snapshots += 1
+        self.generation += 1
+
+    def invalidate(self) -> None:
+        self._by_key = {}
+        self._order = []
+        self._lookups = {}
+
+    def _is_current(self, info: Dict[str, Any]) -> bool:
+        live = parse_window_info(self.backend.describe_window(info['window_id']) or {})
+        if not live:
+            return False
+        if (live['x'], live['y'], live['width'], live['height']) != \
+                (info['x'], info['y'], info['width'], info['height']):
+            info.update(x=live['x'], y=live['y'], width=live['width'], height=live['height'])
+            self.generation += 1
+        return True
+
+    def _search(self, title: str) -> Optional[Tuple[str, str]]:
+        # Prefer a window-title match, then an owner-name match (window titles
+        # are blank without Screen Recording permission); normal layer first.
+        for matcher in (lambda k: title in k[1], lambda k: title in k[0]):
+            candidates = [k for k in self._order if matcher(k)]
+            candidates.sort(key=lambda k: self._by_key[k]['layer'] != 0)
+            if candidates:
+                return candidates[0]
+        return None
+
+    def find(self, title: str) -> Optional[Dict[str, Any]]:
+        """Find the first window whose title or owner contains title."""
+        key = self._lookups.get(title)
+        if key is not None:
+            info = self._by_key.get(key)
+            if info and self._is_current(info):
+                self.hits += 1
+                return dict(info)
+
+        self.refresh()
+        key = self._search(title)
+        if key is None:
+            return None
+        self._lookups[title] = key
+        return dict(self._by_key[key])
+
+    def bounds(self, window_info: Dict[str, Any]) -> Dict[str, int]:
+        """Current bounds for a window previously returned by find()."""
+        key = (window_info['app'], window_info['title'])
+        info = self._by_key.get(key)
+        if info is None or info['window_id'] != window_info.get('window_id') or not self._is_current(info):
+            info = window_info
+        return {
+            'x': info['x'],
+            'y': info['y'],
+            'width': info['width'],
+            'height': info['height']
+        }
+
+    def windows(self) -> List[Dict[str, Any]]:
+        if not self._order:
+            self.refresh()
+        return [dict(self._by_key[k]) for k in self._order]
+
+
+_default_index = None
+
+
+def get_window_index() -> WindowIndex:
+    """Process-wide window index shared by every automation instance."""
+    global _default_index
+    if _default_index is None:
+        _default_index = WindowIndex()
+    return _default_index
+
+
+def set_window_index(index: WindowIndex) -> None:
+    """Replace the shared index, e.g. with one backed by a RecordedWindowBackend."""
+    global _default_index
+    _default_index = index
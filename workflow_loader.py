@@ -0,0 +1,208 @@
+import ast
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+from iphone_automation import iPhoneAutomation, ActionCancelled
+from action_log import load_recording_data
+
+
+class _CancellableTime:
+    """Stands in for the `time` module inside a loaded script so its sleeps end early on cancel."""
+
+    def __init__(self, cancel_event: threading.Event):
+        self._cancel_event = cancel_event
+
+    def sleep(self, seconds: float) -> None:
+        if self._cancel_event.wait(max(0.0, seconds)):
+            raise ActionCancelled("Automation cancelled")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(time, name)
+
+
+class Workflow(ABC):
+    """
+    A recording or generated script that runs in this process against an
+    existing, already-focused iPhoneAutomation, instead of a fresh interpreter.
+
+    run() enforces the timeout with a watchdog thread: when it fires, the
+    automation's cancel_event is set, the workflow's sleeps return early and
+    its next action raises ActionCancelled.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = None
+        self.loads = 0
+        self.runs = 0
+        # Seconds spent preparing the last run (reload check + focus)
+        self.last_overhead = 0.0
+        self.last_timed_out = False
+
+    @abstractmethod
+    def _load(self) -> None:
+        """Read the workflow file."""
+
+    @abstractmethod
+    def _execute(self, automation: iPhoneAutomation) -> Any:
+        """Run the loaded workflow once; returning False marks the run as failed."""
+
+    def prepare(self) -> None:
+        """Load the workflow, or reload it if the file changed since the last run."""
+        mtime = os.path.getmtime(self.path)
+        if mtime != self.mtime:
+            self._load()
+            self.mtime = mtime
+            self.loads += 1
+
+    def run(self, automation: iPhoneAutomation, timeout: float = 120.0) -> bool:
+        """
+        Run the workflow.
+
+        Args:
+            automation: Shared automation instance (its window is focused here if needed)
+            timeout: Seconds before the watchdog cancels the run
+
+        Returns:
+            True if the workflow completed without returning False, raising or timing out
+        """
+        start = time.perf_counter()
+        self.prepare()
+        if not automation.window_bounds and not automation.focus_window():
+            print("❌ Could not focus window for workflow")
+            return False
+        self.last_overhead = time.perf_counter() - start
+
+        automation.cancel_event.clear()
+        self.last_timed_out = False
+
+        def expire():
+            self.last_timed_out = True
+            automation.cancel_event.set()
+
+        watchdog = threading.Timer(timeout, expire)
+        watchdog.daemon = True
+        watchdog.start()
+        self.runs += 1
+        try:
+            result = self._execute(automation)
+        except ActionCancelled:
+            result = False
+        finally:
+            watchdog.cancel()
+            automation.cancel_event.clear()
+
+        if self.last_timed_out:
+            print(f"⏰ Workflow timed out after {timeout:.0f}s")
+            return False
+        return result is not False
+
+
+class RecordingWorkflow(Workflow):
+    """A JSON recording or action log (as saved by save_recording), replayed with replay_recording()."""
+
+    def __init__(self, path: str, speed_multiplier: float = 1.0):
+        super().__init__(path)
+        self.speed_multiplier = speed_multiplier
+        self.actions: List[Dict[str, Any]] = []
+
+    def _load(self) -> None:
+        self.actions = load_recording_data(self.path)['actions']
+
+    def _execute(self, automation: iPhoneAutomation) -> Any:
+        automation.replay_recording(self.actions, self.speed_multiplier)
+        return True
+
+
+class ScriptWorkflow(Workflow):
+    """
+    A generated script (generate_script output or a hand-written loop script).
+
+    The module is imported once. Its `iPhoneAutomation` name is swapped for
+    one that returns the shared instance, and its `time` for a cancellable
+    one. The entry point is whatever the script's `__main__` block calls.
+    """
+
+    def __init__(self, path: str, entry: Optional[str] = None):
+        super().__init__(path)
+        self.entry = entry
+        self.module: Optional[types.ModuleType] = None
+        self._function: Optional[Callable[[], Any]] = None
+        self._shared: Optional[iPhoneAutomation] = None
+
+    def _find_entry(self, source: str) -> str:
+        """Name of the first module-level function called from `if __name__ == "__main__":`."""
+        tree = ast.parse(source)
+        functions = {node.name for node in tree.body if isinstance(node, ast.FunctionDef)}
+        for node in tree.body:
+            if isinstance(node, ast.If) and "__main__" in ast.unparse(node.test):
+                for call in ast.walk(node):
+                    if isinstance(call, ast.Call) and isinstance(call.func, ast.Name) \
+                            and call.func.id in functions:
+                        return call.func.id
+        raise ValueError(f"No entry point found in {self.path}; pass entry= explicitly")
+
+    def _load(self) -> None:
+        with open(self.path, 'r') as f:
+            source = f.read()
+        entry = self.entry or self._find_entry(source)
+
+        name = "workflow_" + os.path.splitext(os.path.basename(self.path))[0]
+        spec = importlib.util.spec_from_file_location(name, self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        workflow = self
+
+        class SharedAutomation:
+            """Called like iPhoneAutomation() by the script; hands back the shared instance."""
+            def __new__(cls, *args, **kwargs):
+                return workflow._shared
+
+        module.iPhoneAutomation = SharedAutomation
+        self.module = module
+        self._function = getattr(module, entry)
+
+    def _execute(self, automation: iPhoneAutomation) -> Any:
+        self._shared = automation
+        self.module.time = _CancellableTime(automation.cancel_event)
+        title = automation.window_title
+        try:
+            return self._function()
+        finally:
+            # Scripts may retitle the window they look for; keep the caller's setting
+            automation.window_title = title
+
+
+def load_workflow(path: str) -> Workflow:
+    """Workflow for a .json/.alog recording or a .py generated script."""
+    if path.endswith(('.json', '.alog')):
+        return RecordingWorkflow(path)
+    if path.endswith('.py'):
+        return ScriptWorkflow(path)
+    raise ValueError(f"Unsupported workflow file: {path}")
+
+
+def measure_subprocess_overhead(runs: int = 1) -> float:
+    """
+    Seconds a per-image subprocess spent before its first action: interpreter
+    start, imports (cv2, pyautogui, Quartz, pynput), iPhoneAutomation() and
+    focus_window().
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = ("import sys; sys.path.insert(0, %r)\n"
+            "from iphone_automation import iPhoneAutomation\n"
+            "iPhoneAutomation().focus_window()\n") % here
+    total = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], capture_output=True, timeout=60)
+        total += time.perf_counter() - start
+    return total / runs